@@ -5,8 +5,128 @@ d = { 'settings': { 'branch': 'master',
                 'doc_host': 'https://michaelaye.github.io',
                 'git_url': 'https://github.com/michaelaye/p4tools',
                 'lib_path': 'p4tools'},
-  'syms': { 'p4tools.data_extract': {},
-            'p4tools.io': { 'p4tools.io._get_hash': ('io.html#_get_hash', 'p4tools/io.py'),
+  'syms': { 'p4tools.aio': { 'p4tools.aio.AsyncClient': ('aio.html#asyncclient', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.__init__': ('aio.html#asyncclient.__init__', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient._coalesce': ('aio.html#asyncclient._coalesce', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient._download': ('aio.html#asyncclient._download', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient._run': ('aio.html#asyncclient._run', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.afetch_subframe': ('aio.html#asyncclient.afetch_subframe', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.aget_markings_for_tile': ( 'aio.html#asyncclient.aget_markings_for_tile',
+                                                                                 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.aget_subframe': ('aio.html#asyncclient.aget_subframe', 'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.aget_url_for_tile_id': ( 'aio.html#asyncclient.aget_url_for_tile_id',
+                                                                               'p4tools/aio.py'),
+                             'p4tools.aio.AsyncClient.aprefetch': ('aio.html#asyncclient.aprefetch', 'p4tools/aio.py'),
+                             'p4tools.aio._aiohttp_get': ('aio.html#_aiohttp_get', 'p4tools/aio.py'),
+                             'p4tools.aio._decode': ('aio.html#_decode', 'p4tools/aio.py'),
+                             'p4tools.aio._get_once': ('aio.html#_get_once', 'p4tools/aio.py'),
+                             'p4tools.aio._has_aiohttp': ('aio.html#_has_aiohttp', 'p4tools/aio.py'),
+                             'p4tools.aio._read_chunked': ('aio.html#_read_chunked', 'p4tools/aio.py'),
+                             'p4tools.aio._stdlib_get': ('aio.html#_stdlib_get', 'p4tools/aio.py'),
+                             'p4tools.aio._tile_url_index': ('aio.html#_tile_url_index', 'p4tools/aio.py'),
+                             'p4tools.aio._write_atomic': ('aio.html#_write_atomic', 'p4tools/aio.py'),
+                             'p4tools.aio.aget_markings_for_tile': ('aio.html#aget_markings_for_tile', 'p4tools/aio.py'),
+                             'p4tools.aio.aget_subframe': ('aio.html#aget_subframe', 'p4tools/aio.py'),
+                             'p4tools.aio.aprefetch': ('aio.html#aprefetch', 'p4tools/aio.py'),
+                             'p4tools.aio.default_client': ('aio.html#default_client', 'p4tools/aio.py'),
+                             'p4tools.aio.http_get': ('aio.html#http_get', 'p4tools/aio.py')},
+            'p4tools.cli': { 'p4tools.cli.ChunkWriter': ('cli.html#chunkwriter', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter.__enter__': ('cli.html#chunkwriter.__enter__', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter.__exit__': ('cli.html#chunkwriter.__exit__', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter.__init__': ('cli.html#chunkwriter.__init__', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter._write_parquet': ('cli.html#chunkwriter._write_parquet', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter.close': ('cli.html#chunkwriter.close', 'p4tools/cli.py'),
+                             'p4tools.cli.ChunkWriter.write': ('cli.html#chunkwriter.write', 'p4tools/cli.py'),
+                             'p4tools.cli._pyarrow': ('cli.html#_pyarrow', 'p4tools/cli.py'),
+                             'p4tools.cli.counts': ('cli.html#counts', 'p4tools/cli.py'),
+                             'p4tools.cli.export': ('cli.html#export', 'p4tools/cli.py'),
+                             'p4tools.cli.main': ('cli.html#main', 'p4tools/cli.py'),
+                             'p4tools.cli.output_options': ('cli.html#output_options', 'p4tools/cli.py'),
+                             'p4tools.cli.partition': ('cli.html#partition', 'p4tools/cli.py'),
+                             'p4tools.cli.prefetch': ('cli.html#prefetch', 'p4tools/cli.py'),
+                             'p4tools.cli.profile_option': ('cli.html#profile_option', 'p4tools/cli.py'),
+                             'p4tools.cli.read_ids': ('cli.html#read_ids', 'p4tools/cli.py'),
+                             'p4tools.cli.select': ('cli.html#select', 'p4tools/cli.py'),
+                             'p4tools.cli.select_tile_ids': ('cli.html#select_tile_ids', 'p4tools/cli.py'),
+                             'p4tools.cli.selection_options': ('cli.html#selection_options', 'p4tools/cli.py'),
+                             'p4tools.cli.urls': ('cli.html#urls', 'p4tools/cli.py'),
+                             'p4tools.cli.write_chunked': ('cli.html#write_chunked', 'p4tools/cli.py')},
+            'p4tools.data_extract': {},
+            'p4tools.dedup': { 'p4tools.dedup._candidate_pairs': ('dedup.html#_candidate_pairs', 'p4tools/dedup.py'),
+                               'p4tools.dedup._connected_components': ('dedup.html#_connected_components', 'p4tools/dedup.py'),
+                               'p4tools.dedup._tolerances': ('dedup.html#_tolerances', 'p4tools/dedup.py'),
+                               'p4tools.dedup.deduplicate': ('dedup.html#deduplicate', 'p4tools/dedup.py'),
+                               'p4tools.dedup.duplicate_groups': ('dedup.html#duplicate_groups', 'p4tools/dedup.py'),
+                               'p4tools.dedup.find_duplicates': ('dedup.html#find_duplicates', 'p4tools/dedup.py'),
+                               'p4tools.dedup.marking_kind': ('dedup.html#marking_kind', 'p4tools/dedup.py')},
+            'p4tools.features': { 'p4tools.features._as_table': ('features.html#_as_table', 'p4tools/features.py'),
+                                  'p4tools.features._extract': ('features.html#_extract', 'p4tools/features.py'),
+                                  'p4tools.features._parts': ('features.html#_parts', 'p4tools/features.py'),
+                                  'p4tools.features._read_part': ('features.html#_read_part', 'p4tools/features.py'),
+                                  'p4tools.features._replace_part': ('features.html#_replace_part', 'p4tools/features.py'),
+                                  'p4tools.features._write_part': ('features.html#_write_part', 'p4tools/features.py'),
+                                  'p4tools.features.default_path': ('features.html#default_path', 'p4tools/features.py'),
+                                  'p4tools.features.drop_features': ('features.html#drop_features', 'p4tools/features.py'),
+                                  'p4tools.features.extract_features': ('features.html#extract_features', 'p4tools/features.py'),
+                                  'p4tools.features.footprint_mask': ('features.html#footprint_mask', 'p4tools/features.py'),
+                                  'p4tools.features.stored_features': ('features.html#stored_features', 'p4tools/features.py'),
+                                  'p4tools.features.tile_features': ('features.html#tile_features', 'p4tools/features.py')},
+            'p4tools.footprints': { 'p4tools.footprints._chunks': ('footprints.html#_chunks', 'p4tools/footprints.py'),
+                                    'p4tools.footprints._create_layer': ('footprints.html#_create_layer', 'p4tools/footprints.py'),
+                                    'p4tools.footprints._gpkg_geometries': ('footprints.html#_gpkg_geometries', 'p4tools/footprints.py'),
+                                    'p4tools.footprints._kind': ('footprints.html#_kind', 'p4tools/footprints.py'),
+                                    'p4tools.footprints._quote': ('footprints.html#_quote', 'p4tools/footprints.py'),
+                                    'p4tools.footprints._sql_type': ('footprints.html#_sql_type', 'p4tools/footprints.py'),
+                                    'p4tools.footprints.iter_footprints': ('footprints.html#iter_footprints', 'p4tools/footprints.py'),
+                                    'p4tools.footprints.to_geojsonl': ('footprints.html#to_geojsonl', 'p4tools/footprints.py'),
+                                    'p4tools.footprints.to_geopackage': ('footprints.html#to_geopackage', 'p4tools/footprints.py')},
+            'p4tools.instrument': { 'p4tools.instrument.OperationStats': ('instrument.html#operationstats', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.OperationStats.__init__': ( 'instrument.html#operationstats.__init__',
+                                                                                    'p4tools/instrument.py'),
+                                    'p4tools.instrument.OperationStats.add_counters': ( 'instrument.html#operationstats.add_counters',
+                                                                                        'p4tools/instrument.py'),
+                                    'p4tools.instrument.OperationStats.add_time': ( 'instrument.html#operationstats.add_time',
+                                                                                    'p4tools/instrument.py'),
+                                    'p4tools.instrument.OperationStats.mean': ( 'instrument.html#operationstats.mean',
+                                                                                'p4tools/instrument.py'),
+                                    'p4tools.instrument.OperationStats.to_dict': ( 'instrument.html#operationstats.to_dict',
+                                                                                   'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler': ('instrument.html#profiler', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.__enter__': ( 'instrument.html#profiler.__enter__',
+                                                                               'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.__exit__': ('instrument.html#profiler.__exit__', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.__init__': ('instrument.html#profiler.__init__', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.__repr__': ('instrument.html#profiler.__repr__', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.__str__': ('instrument.html#profiler.__str__', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler._get': ('instrument.html#profiler._get', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.report': ('instrument.html#profiler.report', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.reset': ('instrument.html#profiler.reset', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.start': ('instrument.html#profiler.start', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.stop': ('instrument.html#profiler.stop', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.summary': ('instrument.html#profiler.summary', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.to_dict': ('instrument.html#profiler.to_dict', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.Profiler.to_json': ('instrument.html#profiler.to_json', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.is_enabled': ('instrument.html#is_enabled', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.profile': ('instrument.html#profile', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.record': ('instrument.html#record', 'p4tools/instrument.py'),
+                                    'p4tools.instrument.timed': ('instrument.html#timed', 'p4tools/instrument.py')},
+            'p4tools.io': { 'p4tools.io.Catalogs': ('io.html#catalogs', 'p4tools/io.py'),
+                            'p4tools.io.Catalogs.__getitem__': ('io.html#catalogs.__getitem__', 'p4tools/io.py'),
+                            'p4tools.io.Catalogs.__init__': ('io.html#catalogs.__init__', 'p4tools/io.py'),
+                            'p4tools.io._apply_filters': ('io.html#_apply_filters', 'p4tools/io.py'),
+                            'p4tools.io._as_list': ('io.html#_as_list', 'p4tools/io.py'),
+                            'p4tools.io._csv_catalog': ('io.html#_csv_catalog', 'p4tools/io.py'),
+                            'p4tools.io._get_hash': ('io.html#_get_hash', 'p4tools/io.py'),
+                            'p4tools.io._has_pyarrow': ('io.html#_has_pyarrow', 'p4tools/io.py'),
+                            'p4tools.io._imread': ('io.html#_imread', 'p4tools/io.py'),
+                            'p4tools.io._marking_filters': ('io.html#_marking_filters', 'p4tools/io.py'),
+                            'p4tools.io._query_tile': ('io.html#_query_tile', 'p4tools/io.py'),
+                            'p4tools.io._read_csv': ('io.html#_read_csv', 'p4tools/io.py'),
+                            'p4tools.io._read_markings': ('io.html#_read_markings', 'p4tools/io.py'),
+                            'p4tools.io._retrieve': ('io.html#_retrieve', 'p4tools/io.py'),
+                            'p4tools.io._selects_nothing': ('io.html#_selects_nothing', 'p4tools/io.py'),
+                            'p4tools.io.columnar_catalog': ('io.html#columnar_catalog', 'p4tools/io.py'),
+                            'p4tools.io.fetch_subframe': ('io.html#fetch_subframe', 'p4tools/io.py'),
                             'p4tools.io.fetch_zipped_file': ('io.html#fetch_zipped_file', 'p4tools/io.py'),
                             'p4tools.io.get_blotch_catalog': ('io.html#get_blotch_catalog', 'p4tools/io.py'),
                             'p4tools.io.get_blotches_for_tile': ('io.html#get_blotches_for_tile', 'p4tools/io.py'),
@@ -22,7 +142,8 @@ d = { 'settings': { 'branch': 'master',
                             'p4tools.io.get_tile_urls': ('io.html#get_tile_urls', 'p4tools/io.py'),
                             'p4tools.io.get_url_for_tile': ('io.html#get_url_for_tile', 'p4tools/io.py'),
                             'p4tools.io.get_url_for_tile_id': ('io.html#get_url_for_tile_id', 'p4tools/io.py'),
-                            'p4tools.io.normalize_tile_id': ('io.html#normalize_tile_id', 'p4tools/io.py')},
+                            'p4tools.io.normalize_tile_id': ('io.html#normalize_tile_id', 'p4tools/io.py'),
+                            'p4tools.io.query_markings': ('io.html#query_markings', 'p4tools/io.py')},
             'p4tools.markings': { 'p4tools.markings.Blotch': ('markings.html#blotch', 'p4tools/markings.py'),
                                   'p4tools.markings.Blotch.__init__': ('markings.html#blotch.__init__', 'p4tools/markings.py'),
                                   'p4tools.markings.Blotch.__repr__': ('markings.html#blotch.__repr__', 'p4tools/markings.py'),
@@ -49,6 +170,24 @@ d = { 'settings': { 'branch': 'master',
                                   'p4tools.markings.Blotch.x2': ('markings.html#blotch.x2', 'p4tools/markings.py'),
                                   'p4tools.markings.Blotch.y1': ('markings.html#blotch.y1', 'p4tools/markings.py'),
                                   'p4tools.markings.Blotch.y2': ('markings.html#blotch.y2', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord': ('markings.html#blotchrecord', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.__init__': ('markings.html#blotchrecord.__init__', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord._derived': ('markings.html#blotchrecord._derived', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.area': ('markings.html#blotchrecord.area', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.limit_points': ( 'markings.html#blotchrecord.limit_points',
+                                                                                  'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.p1': ('markings.html#blotchrecord.p1', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.p2': ('markings.html#blotchrecord.p2', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.p3': ('markings.html#blotchrecord.p3', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.p4': ('markings.html#blotchrecord.p4', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.to_artist': ( 'markings.html#blotchrecord.to_artist',
+                                                                               'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.to_shapely': ( 'markings.html#blotchrecord.to_shapely',
+                                                                                'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.x1': ('markings.html#blotchrecord.x1', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.x2': ('markings.html#blotchrecord.x2', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.y1': ('markings.html#blotchrecord.y1', 'p4tools/markings.py'),
+                                  'p4tools.markings.BlotchRecord.y2': ('markings.html#blotchrecord.y2', 'p4tools/markings.py'),
                                   'p4tools.markings.Fan': ('markings.html#fan', 'p4tools/markings.py'),
                                   'p4tools.markings.Fan.__init__': ('markings.html#fan.__init__', 'p4tools/markings.py'),
                                   'p4tools.markings.Fan.__repr__': ('markings.html#fan.__repr__', 'p4tools/markings.py'),
@@ -75,14 +214,105 @@ d = { 'settings': { 'branch': 'master',
                                   'p4tools.markings.Fan.store': ('markings.html#fan.store', 'p4tools/markings.py'),
                                   'p4tools.markings.Fan.tile_id': ('markings.html#fan.tile_id', 'p4tools/markings.py'),
                                   'p4tools.markings.Fan.to_shapely': ('markings.html#fan.to_shapely', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord': ('markings.html#fanrecord', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.__init__': ('markings.html#fanrecord.__init__', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord._derived': ('markings.html#fanrecord._derived', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord._unit': ('markings.html#fanrecord._unit', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.area': ('markings.html#fanrecord.area', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.armlength': ('markings.html#fanrecord.armlength', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.base': ('markings.html#fanrecord.base', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.center': ('markings.html#fanrecord.center', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.circle_base': ('markings.html#fanrecord.circle_base', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.coords': ('markings.html#fanrecord.coords', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.inside_half': ('markings.html#fanrecord.inside_half', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.radius': ('markings.html#fanrecord.radius', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.semi_circle_center': ( 'markings.html#fanrecord.semi_circle_center',
+                                                                                     'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.to_artist': ('markings.html#fanrecord.to_artist', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.to_shapely': ('markings.html#fanrecord.to_shapely', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.v1': ('markings.html#fanrecord.v1', 'p4tools/markings.py'),
+                                  'p4tools.markings.FanRecord.v2': ('markings.html#fanrecord.v2', 'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord': ('markings.html#markingrecord', 'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.__init__': ( 'markings.html#markingrecord.__init__',
+                                                                               'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.__repr__': ( 'markings.html#markingrecord.__repr__',
+                                                                               'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.center': ('markings.html#markingrecord.center', 'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.from_data': ( 'markings.html#markingrecord.from_data',
+                                                                                'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.from_frame': ( 'markings.html#markingrecord.from_frame',
+                                                                                 'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.is_equal': ( 'markings.html#markingrecord.is_equal',
+                                                                               'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.store': ('markings.html#markingrecord.store', 'p4tools/markings.py'),
+                                  'p4tools.markings.MarkingRecord.values': ('markings.html#markingrecord.values', 'p4tools/markings.py'),
                                   'p4tools.markings.TileBlotches': ('markings.html#tileblotches', 'p4tools/markings.py'),
                                   'p4tools.markings.TileBlotches.__init__': ('markings.html#tileblotches.__init__', 'p4tools/markings.py'),
                                   'p4tools.markings.TileBlotches.plot': ('markings.html#tileblotches.plot', 'p4tools/markings.py'),
+                                  'p4tools.markings._xy_columns': ('markings.html#_xy_columns', 'p4tools/markings.py'),
                                   'p4tools.markings.calc_fig_size': ('markings.html#calc_fig_size', 'p4tools/markings.py'),
                                   'p4tools.markings.rotate_vector': ('markings.html#rotate_vector', 'p4tools/markings.py'),
                                   'p4tools.markings.set_subframe_size': ('markings.html#set_subframe_size', 'p4tools/markings.py'),
                                   'p4tools.markings.show_subframe': ('markings.html#show_subframe', 'p4tools/markings.py')},
-            'p4tools.plotting': { 'p4tools.plotting.plot_blotches_for_tile': ( 'plotting.html#plot_blotches_for_tile',
+            'p4tools.mosaic': { 'p4tools.mosaic.ObsidMosaic': ('mosaic.html#obsidmosaic', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.__init__': ('mosaic.html#obsidmosaic.__init__', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.__repr__': ('mosaic.html#obsidmosaic.__repr__', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic._checkpoint': ('mosaic.html#obsidmosaic._checkpoint', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic._place': ('mosaic.html#obsidmosaic._place', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic._state_path': ('mosaic.html#obsidmosaic._state_path', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.build': ('mosaic.html#obsidmosaic.build', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.default_path': ('mosaic.html#obsidmosaic.default_path', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.markings_in_window': ( 'mosaic.html#obsidmosaic.markings_in_window',
+                                                                                   'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.missing': ('mosaic.html#obsidmosaic.missing', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.open': ('mosaic.html#obsidmosaic.open', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.plot': ('mosaic.html#obsidmosaic.plot', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.read': ('mosaic.html#obsidmosaic.read', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.ObsidMosaic.shape': ('mosaic.html#obsidmosaic.shape', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic._as_rgb8': ('mosaic.html#_as_rgb8', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic._extent': ('mosaic.html#_extent', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.mosaic_shape': ('mosaic.html#mosaic_shape', 'p4tools/mosaic.py'),
+                                'p4tools.mosaic.tile_region': ('mosaic.html#tile_region', 'p4tools/mosaic.py')},
+            'p4tools.partitions': { 'p4tools.partitions.PartitionedDataset': ( 'partitions.html#partitioneddataset',
+                                                                               'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.__init__': ( 'partitions.html#partitioneddataset.__init__',
+                                                                                        'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.__repr__': ( 'partitions.html#partitioneddataset.__repr__',
+                                                                                        'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.columns': ( 'partitions.html#partitioneddataset.columns',
+                                                                                       'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.kinds': ( 'partitions.html#partitioneddataset.kinds',
+                                                                                     'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.partitions': ( 'partitions.html#partitioneddataset.partitions',
+                                                                                          'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.prune': ( 'partitions.html#partitioneddataset.prune',
+                                                                                     'p4tools/partitions.py'),
+                                    'p4tools.partitions.PartitionedDataset.read': ( 'partitions.html#partitioneddataset.read',
+                                                                                    'p4tools/partitions.py'),
+                                    'p4tools.partitions._describe': ('partitions.html#_describe', 'p4tools/partitions.py'),
+                                    'p4tools.partitions._read': ('partitions.html#_read', 'p4tools/partitions.py'),
+                                    'p4tools.partitions._write': ('partitions.html#_write', 'p4tools/partitions.py'),
+                                    'p4tools.partitions.add_region_names': ('partitions.html#add_region_names', 'p4tools/partitions.py'),
+                                    'p4tools.partitions.enrich_catalog': ('partitions.html#enrich_catalog', 'p4tools/partitions.py'),
+                                    'p4tools.partitions.export_partitioned': ( 'partitions.html#export_partitioned',
+                                                                               'p4tools/partitions.py'),
+                                    'p4tools.partitions.filter_rows': ('partitions.html#filter_rows', 'p4tools/partitions.py')},
+            'p4tools.plotting': { 'p4tools.plotting.RenderCache': ('plotting.html#rendercache', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.__init__': ('plotting.html#rendercache.__init__', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.__len__': ('plotting.html#rendercache.__len__', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.__repr__': ('plotting.html#rendercache.__repr__', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache._file': ('plotting.html#rendercache._file', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache._hash': ('plotting.html#rendercache._hash', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.clear': ('plotting.html#rendercache.clear', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.evict': ('plotting.html#rendercache.evict', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.get': ('plotting.html#rendercache.get', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.inputs': ('plotting.html#rendercache.inputs', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.key': ('plotting.html#rendercache.key', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.migrate': ('plotting.html#rendercache.migrate', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.nbytes': ('plotting.html#rendercache.nbytes', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.RenderCache.put': ('plotting.html#rendercache.put', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.default_render_cache': ('plotting.html#default_render_cache', 'p4tools/plotting.py'),
+                                  'p4tools.plotting.plot_blotches_for_tile': ( 'plotting.html#plot_blotches_for_tile',
                                                                                'p4tools/plotting.py'),
                                   'p4tools.plotting.plot_fans_for_tile': ('plotting.html#plot_fans_for_tile', 'p4tools/plotting.py'),
                                   'p4tools.plotting.plot_original_and_blotches': ( 'plotting.html#plot_original_and_blotches',
@@ -93,4 +323,154 @@ d = { 'settings': { 'branch': 'master',
                                                                                     'p4tools/plotting.py'),
                                   'p4tools.plotting.plot_original_tile': ('plotting.html#plot_original_tile', 'p4tools/plotting.py'),
                                   'p4tools.plotting.plot_x_random_tiles_with_n_fans': ( 'plotting.html#plot_x_random_tiles_with_n_fans',
-                                                                                        'p4tools/plotting.py')}}}
+                                                                                        'p4tools/plotting.py'),
+                                  'p4tools.plotting.render_tile': ('plotting.html#render_tile', 'p4tools/plotting.py')},
+            'p4tools.shared': { 'p4tools.shared.SharedTable': ('shared.html#sharedtable', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.__enter__': ('shared.html#sharedtable.__enter__', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.__exit__': ('shared.html#sharedtable.__exit__', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.__init__': ('shared.html#sharedtable.__init__', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.__repr__': ('shared.html#sharedtable.__repr__', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.attach': ('shared.html#sharedtable.attach', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.close': ('shared.html#sharedtable.close', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.name': ('shared.html#sharedtable.name', 'p4tools/shared.py'),
+                                'p4tools.shared.SharedTable.nbytes': ('shared.html#sharedtable.nbytes', 'p4tools/shared.py'),
+                                'p4tools.shared._aligned': ('shared.html#_aligned', 'p4tools/shared.py'),
+                                'p4tools.shared._init_worker': ('shared.html#_init_worker', 'p4tools/shared.py'),
+                                'p4tools.shared._is_masked': ('shared.html#_is_masked', 'p4tools/shared.py'),
+                                'p4tools.shared._is_numeric': ('shared.html#_is_numeric', 'p4tools/shared.py'),
+                                'p4tools.shared._is_string': ('shared.html#_is_string', 'p4tools/shared.py'),
+                                'p4tools.shared._layout': ('shared.html#_layout', 'p4tools/shared.py'),
+                                'p4tools.shared._open': ('shared.html#_open', 'p4tools/shared.py'),
+                                'p4tools.shared._run_tile': ('shared.html#_run_tile', 'p4tools/shared.py'),
+                                'p4tools.shared._untracked': ('shared.html#_untracked', 'p4tools/shared.py'),
+                                'p4tools.shared._views': ('shared.html#_views', 'p4tools/shared.py'),
+                                'p4tools.shared._with_tile_id': ('shared.html#_with_tile_id', 'p4tools/shared.py'),
+                                'p4tools.shared.attach': ('shared.html#attach', 'p4tools/shared.py'),
+                                'p4tools.shared.imap_tiles': ('shared.html#imap_tiles', 'p4tools/shared.py'),
+                                'p4tools.shared.map_tiles': ('shared.html#map_tiles', 'p4tools/shared.py'),
+                                'p4tools.shared.tile_slice': ('shared.html#tile_slice', 'p4tools/shared.py')},
+            'p4tools.thumbnails': { 'p4tools.thumbnails.ThumbnailStore': ('thumbnails.html#thumbnailstore', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.__contains__': ( 'thumbnails.html#thumbnailstore.__contains__',
+                                                                                        'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.__init__': ( 'thumbnails.html#thumbnailstore.__init__',
+                                                                                    'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.__len__': ( 'thumbnails.html#thumbnailstore.__len__',
+                                                                                   'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.__repr__': ( 'thumbnails.html#thumbnailstore.__repr__',
+                                                                                    'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore._check': ( 'thumbnails.html#thumbnailstore._check',
+                                                                                  'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore._file': ( 'thumbnails.html#thumbnailstore._file',
+                                                                                 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore._write': ( 'thumbnails.html#thumbnailstore._write',
+                                                                                  'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.add': ( 'thumbnails.html#thumbnailstore.add',
+                                                                               'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.build': ( 'thumbnails.html#thumbnailstore.build',
+                                                                                 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.default_path': ( 'thumbnails.html#thumbnailstore.default_path',
+                                                                                        'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.get': ( 'thumbnails.html#thumbnailstore.get',
+                                                                               'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.ThumbnailStore.level_shape': ( 'thumbnails.html#thumbnailstore.level_shape',
+                                                                                       'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails._check_levels': ('thumbnails.html#_check_levels', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails._downsample': ('thumbnails.html#_downsample', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails._fit': ('thumbnails.html#_fit', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.contact_sheet': ('thumbnails.html#contact_sheet', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.default_store': ('thumbnails.html#default_store', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.get_thumbnail': ('thumbnails.html#get_thumbnail', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.pyramid': ('thumbnails.html#pyramid', 'p4tools/thumbnails.py'),
+                                    'p4tools.thumbnails.subframe_image': ('thumbnails.html#subframe_image', 'p4tools/thumbnails.py')},
+            'p4tools.transforms': { 'p4tools.transforms.ObsidGeometry': ('transforms.html#obsidgeometry', 'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.__init__': ( 'transforms.html#obsidgeometry.__init__',
+                                                                                   'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.__repr__': ( 'transforms.html#obsidgeometry.__repr__',
+                                                                                   'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry._directions': ( 'transforms.html#obsidgeometry._directions',
+                                                                                      'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.angle_to_azimuth': ( 'transforms.html#obsidgeometry.angle_to_azimuth',
+                                                                                           'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.azimuth_to_angle': ( 'transforms.html#obsidgeometry.azimuth_to_angle',
+                                                                                           'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.fit': ('transforms.html#obsidgeometry.fit', 'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.image_to_body_fixed': ( 'transforms.html#obsidgeometry.image_to_body_fixed',
+                                                                                              'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.image_to_latlon': ( 'transforms.html#obsidgeometry.image_to_latlon',
+                                                                                          'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.latlon_to_image': ( 'transforms.html#obsidgeometry.latlon_to_image',
+                                                                                          'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.meters_per_pixel': ( 'transforms.html#obsidgeometry.meters_per_pixel',
+                                                                                           'p4tools/transforms.py'),
+                                    'p4tools.transforms.ObsidGeometry.to_dict': ( 'transforms.html#obsidgeometry.to_dict',
+                                                                                  'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer': ('transforms.html#transformer', 'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.__init__': ( 'transforms.html#transformer.__init__',
+                                                                                 'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer._per_obsid': ( 'transforms.html#transformer._per_obsid',
+                                                                                   'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer._tile_columns': ( 'transforms.html#transformer._tile_columns',
+                                                                                      'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.angle_to_azimuth': ( 'transforms.html#transformer.angle_to_azimuth',
+                                                                                         'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.azimuth_to_angle': ( 'transforms.html#transformer.azimuth_to_angle',
+                                                                                         'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.geometry': ( 'transforms.html#transformer.geometry',
+                                                                                 'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.image_to_latlon': ( 'transforms.html#transformer.image_to_latlon',
+                                                                                        'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.image_to_tile': ( 'transforms.html#transformer.image_to_tile',
+                                                                                      'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.latlon_to_image': ( 'transforms.html#transformer.latlon_to_image',
+                                                                                        'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.parameters': ( 'transforms.html#transformer.parameters',
+                                                                                   'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.pixels_to_meters': ( 'transforms.html#transformer.pixels_to_meters',
+                                                                                         'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.tile_to_image': ( 'transforms.html#transformer.tile_to_image',
+                                                                                      'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.tile_to_latlon': ( 'transforms.html#transformer.tile_to_latlon',
+                                                                                       'p4tools/transforms.py'),
+                                    'p4tools.transforms.Transformer.transform_markings': ( 'transforms.html#transformer.transform_markings',
+                                                                                           'p4tools/transforms.py'),
+                                    'p4tools.transforms._local_basis': ('transforms.html#_local_basis', 'p4tools/transforms.py'),
+                                    'p4tools.transforms.image_to_tile': ('transforms.html#image_to_tile', 'p4tools/transforms.py'),
+                                    'p4tools.transforms.tile_to_image': ('transforms.html#tile_to_image', 'p4tools/transforms.py')},
+            'p4tools.versions': { 'p4tools.versions.Registry': ('versions.html#registry', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.__init__': ('versions.html#registry.__init__', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.__repr__': ('versions.html#registry.__repr__', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.activate': ('versions.html#registry.activate', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.catalogs': ('versions.html#registry.catalogs', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.diff': ('versions.html#registry.diff', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.digests': ('versions.html#registry.digests', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.fetch': ('versions.html#registry.fetch', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.load': ('versions.html#registry.load', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.names': ('versions.html#registry.names', 'p4tools/versions.py'),
+                                  'p4tools.versions.Registry.register': ('versions.html#registry.register', 'p4tools/versions.py'),
+                                  'p4tools.versions.ReleaseCatalogs': ('versions.html#releasecatalogs', 'p4tools/versions.py'),
+                                  'p4tools.versions.ReleaseCatalogs.__getitem__': ( 'versions.html#releasecatalogs.__getitem__',
+                                                                                    'p4tools/versions.py'),
+                                  'p4tools.versions.ReleaseCatalogs.__init__': ( 'versions.html#releasecatalogs.__init__',
+                                                                                 'p4tools/versions.py'),
+                                  'p4tools.versions.changed_tiles': ('versions.html#changed_tiles', 'p4tools/versions.py'),
+                                  'p4tools.versions.default_registry': ('versions.html#default_registry', 'p4tools/versions.py'),
+                                  'p4tools.versions.diff_digests': ('versions.html#diff_digests', 'p4tools/versions.py'),
+                                  'p4tools.versions.digest_table': ('versions.html#digest_table', 'p4tools/versions.py'),
+                                  'p4tools.versions.refresh': ('versions.html#refresh', 'p4tools/versions.py'),
+                                  'p4tools.versions.row_digests': ('versions.html#row_digests', 'p4tools/versions.py')},
+            'p4tools.winds': { 'p4tools.winds.WindAggregator': ('winds.html#windaggregator', 'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator.__init__': ('winds.html#windaggregator.__init__', 'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator._combine': ('winds.html#windaggregator._combine', 'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator._groups': ('winds.html#windaggregator._groups', 'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator._unit_vectors': ( 'winds.html#windaggregator._unit_vectors',
+                                                                               'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator.add': ('winds.html#windaggregator.add', 'p4tools/winds.py'),
+                               'p4tools.winds.WindAggregator.result': ('winds.html#windaggregator.result', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField': ('winds.html#windfield', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField.__init__': ('winds.html#windfield.__init__', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField.__repr__': ('winds.html#windfield.__repr__', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField._select': ('winds.html#windfield._select', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField.groups': ('winds.html#windfield.groups', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField.plot': ('winds.html#windfield.plot', 'p4tools/winds.py'),
+                               'p4tools.winds.WindField.quiver_arrays': ('winds.html#windfield.quiver_arrays', 'p4tools/winds.py'),
+                               'p4tools.winds.wind_field': ('winds.html#wind_field', 'p4tools/winds.py')}}}
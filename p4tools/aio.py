@@ -0,0 +1,284 @@
+"""asyncio API for tiles and markings, for use in async services"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/12_aio.ipynb.
+
+# %% auto 0
+__all__ = ['REDIRECTS', 'http_get', 'AsyncClient', 'default_client', 'aget_subframe', 'aget_markings_for_tile', 'aprefetch']
+
+# %% ../notebooks/12_aio.ipynb 3
+import asyncio
+import gzip
+import importlib.util
+import os
+import ssl
+import time
+import weakref
+import zlib
+from functools import partial
+from pathlib import Path
+
+import pooch
+from pooch.utils import unique_file_name
+from yarl import URL
+
+from . import instrument, io
+
+# %% ../notebooks/12_aio.ipynb 4
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+def _has_aiohttp():
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+async def _aiohttp_get(url, timeout, max_redirects) -> bytes:
+    import aiohttp
+
+    # trust_env: proxies and .netrc from the environment, as for pooch downloads
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=client_timeout, trust_env=True) as session:
+            async with session.get(str(url), max_redirects=max_redirects) as response:
+                if response.status != 200:
+                    raise OSError(f"HTTP {response.status} for {url}")
+                return await response.read()
+    except aiohttp.ClientError as e:
+        raise OSError(f"{type(e).__name__} for {url}: {e}") from e
+
+
+async def _read_chunked(reader) -> bytes:
+    body = bytearray()
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            # skip trailers
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            return bytes(body)
+        body += await reader.readexactly(size)
+        await reader.readline()
+
+
+def _decode(body, encoding, url) -> bytes:
+    "Undo a content encoding the server applied although only identity was accepted."
+    if encoding in ("", "identity"):
+        return body
+    if encoding in ("gzip", "x-gzip"):
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    raise OSError(f"Unsupported content encoding {encoding!r} for {url}")
+
+
+async def _get_once(url: URL):
+    "One GET request; returns status, headers and body."
+    context = ssl.create_default_context() if url.scheme == "https" else None
+    reader, writer = await asyncio.open_connection(url.host, url.port, ssl=context)
+    try:
+        host = f"[{url.raw_host}]" if ":" in url.raw_host else url.raw_host
+        if not url.is_default_port():
+            host = f"{host}:{url.port}"
+        request = (
+            f"GET {url.raw_path_qs} HTTP/1.1\r\n"
+            f"Host: {host}\r\n"
+            "User-Agent: p4tools\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        writer.write(request.encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        parts = status_line.split()
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/") or not parts[1].isdigit():
+            raise OSError(f"Malformed HTTP status line from {url}: {status_line[:100]!r}")
+        status = int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        if status in REDIRECTS or status == 204:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await _read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+        encoding = headers.get("content-encoding", "").lower()
+        return status, headers, _decode(body, encoding, url)
+    except (ValueError, asyncio.IncompleteReadError, zlib.error, gzip.BadGzipFile) as e:
+        raise OSError(f"Malformed HTTP response from {url}: {e}") from e
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, ssl.SSLError):
+            pass
+
+
+async def _stdlib_get(url, timeout, max_redirects) -> bytes:
+    url = URL(str(url))
+    for _ in range(max_redirects + 1):
+        status, headers, body = await asyncio.wait_for(_get_once(url), timeout)
+        if status in REDIRECTS and "location" in headers:
+            url = url.join(URL(headers["location"]))
+            continue
+        if status != 200:
+            raise OSError(f"HTTP {status} for {url}")
+        return body
+    raise OSError(f"Too many redirects for {url}")
+
+
+async def http_get(url, timeout: float = 60, max_redirects: int = 5) -> bytes:
+    """Body of a GET request to `url`, following redirects; raises OSError for other statuses.
+
+    Uses aiohttp if it is installed (`pip install p4tools[aio]`), which also handles proxies.
+    Otherwise a minimal HTTP/1.1 client on asyncio streams is used, which connects directly.
+    """
+    get = _aiohttp_get if _has_aiohttp() else _stdlib_get
+    return await get(url, timeout, max_redirects)
+
+# %% ../notebooks/12_aio.ipynb 5
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.part")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return str(path)
+
+
+def _tile_url_index(catalogs):
+    return catalogs["tile_urls"].set_index("tile_id").tile_url
+
+# %% ../notebooks/12_aio.ipynb 6
+class AsyncClient:
+    """Non-blocking access to Planet Four tiles and markings.
+
+    Create one per event loop; all methods are coroutines.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,  # simultaneous downloads
+        executor=None,  # executor for decoding and catalog reads, the loop's default if None
+        timeout: float = 60,  # seconds per download request
+        catalogs=None,  # `io.Catalogs` or dict with "tile_urls", loaded via `io` if None
+    ):
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.timeout = timeout
+        self.catalogs = io.Catalogs() if catalogs is None else catalogs
+        self._semaphore = None
+        self._inflight = {}
+        self._urls = None
+        self._prepared = set()
+
+    async def _run(self, func, *args, **kwargs):
+        "Run a blocking function in the executor."
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def _coalesce(self, key, factory):
+        "Await the running task for `key`, or start `factory()` as the one for all callers."
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # one cancelled caller must not cancel the others
+        return await asyncio.shield(task)
+
+    async def aget_url_for_tile_id(self, tile_id) -> str:
+        tile_id = io.normalize_tile_id(tile_id)
+        if self._urls is None:
+            load = partial(self._run, _tile_url_index, self.catalogs)
+            self._urls = await self._coalesce("tile_urls", load)
+        return self._urls.at[tile_id]
+
+    async def afetch_subframe(self, url) -> str:
+        "Download the subframe at `url` into the tile cache if needed, return its path."
+        path = Path(pooch.os_cache("p4tools/tiles")) / unique_file_name(str(url))
+        if path.exists():
+            instrument.record("aio.fetch_subframe.cached", cache_hits=1)
+            return str(path)
+        return await self._coalesce(("download", str(url)), partial(self._download, url, path))
+
+    async def _download(self, url, path):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            t0 = time.perf_counter()
+            data = await http_get(url, timeout=self.timeout)
+        instrument.record(
+            "aio.fetch_subframe.download",
+            time.perf_counter() - t0,
+            cache_misses=1,
+            bytes_downloaded=len(data),
+        )
+        return await self._run(_write_atomic, path, data)
+
+    async def aget_subframe(self, tile_id):
+        "Image array of a tile, downloaded if needed and decoded in the executor."
+        url = await self.aget_url_for_tile_id(tile_id)
+        path = await self.afetch_subframe(url)
+        return await self._run(io._imread, path)
+
+    async def aget_markings_for_tile(self, tile_id, kind: str = "fans", columns=None):
+        "Markings of one tile, queried with `io.query_markings` in the executor."
+        tile_id = io.normalize_tile_id(tile_id)
+        # the first queries of a kind share building its columnar copy, or reading the CSV
+        # catalog without pyarrow, instead of holding an executor thread each while waiting
+        load = io.columnar_catalog if io._has_pyarrow() else io._csv_catalog
+        for k in io.MARKING_KINDS if kind == "both" else [kind]:
+            if k in io.MARKING_KINDS and (k, load) not in self._prepared:
+                await self._coalesce(("prepare", k), partial(self._run, load, k))
+                self._prepared.add((k, load))
+        key = ("markings", kind, tile_id, None if columns is None else tuple(columns))
+        query = partial(io.query_markings, kind, tile_ids=[tile_id], columns=columns)
+        return await self._coalesce(key, partial(self._run, query))
+
+    async def aprefetch(self, tile_ids):
+        """Download the subframes of `tile_ids` concurrently.
+
+        Returns a dict tile_id -> path and a dict tile_id -> exception for the failures.
+        """
+        tile_ids = [io.normalize_tile_id(tile_id) for tile_id in tile_ids]
+
+        async def fetch(tile_id):
+            return await self.afetch_subframe(await self.aget_url_for_tile_id(tile_id))
+
+        results = await asyncio.gather(*map(fetch, tile_ids), return_exceptions=True)
+        paths, failures = {}, {}
+        for tile_id, result in zip(tile_ids, results):
+            if isinstance(result, BaseException):
+                failures[tile_id] = result
+            else:
+                paths[tile_id] = result
+        return paths, failures
+
+# %% ../notebooks/12_aio.ipynb 7
+# default clients, one per event loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def default_client() -> AsyncClient:
+    "The `AsyncClient` of the running event loop."
+    loop = asyncio.get_running_loop()
+    if loop not in _clients:
+        _clients[loop] = AsyncClient()
+    return _clients[loop]
+
+
+async def aget_subframe(tile_id):
+    return await default_client().aget_subframe(tile_id)
+
+
+async def aget_markings_for_tile(tile_id, kind="fans", columns=None):
+    return await default_client().aget_markings_for_tile(tile_id, kind, columns)
+
+
+async def aprefetch(tile_ids):
+    return await default_client().aprefetch(tile_ids)
@@ -0,0 +1,316 @@
+"""Batch command line tools for the Planet Four catalogs"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/05_cli.ipynb.
+
+# %% auto 0
+__all__ = ['CHUNKSIZE', 'FORMATS', 'read_ids', 'select', 'select_tile_ids', 'ChunkWriter', 'write_chunked', 'selection_options',
+           'output_options', 'profile_option', 'main', 'export', 'urls', 'prefetch', 'counts', 'partition']
+
+# %% ../notebooks/05_cli.ipynb 3
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import wraps
+
+import click
+import pandas as pd
+
+from . import instrument, io, partitions
+
+# %% ../notebooks/05_cli.ipynb 4
+CHUNKSIZE = 100_000
+FORMATS = ["csv", "jsonl", "parquet"]
+
+# %% ../notebooks/05_cli.ipynb 5
+def read_ids(values) -> list:
+    """Expand ID arguments into a flat list.
+
+    Values can be comma separated, `@path` reads one ID per line from a file and `@-` from stdin.
+    """
+    ids = []
+    for value in values:
+        if value.startswith("@"):
+            with click.open_file(value[1:]) as f:
+                ids.extend(line.strip() for line in f if line.strip())
+        else:
+            ids.extend(v.strip() for v in value.split(",") if v.strip())
+    return ids
+
+
+def select(df, catalogs, tile_ids=None, obsids=None, regions=None) -> pd.DataFrame:
+    "Filter `df` (with `tile_id` and `obsid` columns) on all given selections at once."
+    mask = pd.Series(True, index=df.index)
+    if tile_ids:
+        mask &= df.tile_id.isin([io.normalize_tile_id(t) for t in tile_ids])
+    if obsids:
+        mask &= df.obsid.isin(obsids)
+    if regions:
+        names = catalogs["region_names"]
+        mask &= df.obsid.isin(names.loc[names.roi_name.isin(regions), "obsid"])
+    return df[mask]
+
+
+def select_tile_ids(catalogs, tile_ids=None, obsids=None, regions=None) -> pd.Index:
+    "Resolve the selections to the matching tile IDs, using the tile coordinates table."
+    if not (tile_ids or obsids or regions):
+        raise click.UsageError("Select tiles with --tile-id, --obsid and/or --region.")
+    if tile_ids and not (obsids or regions):
+        # no catalog needed for plain tile id lists
+        return pd.Index([io.normalize_tile_id(t) for t in tile_ids]).unique()
+    coords = catalogs["tile_coords"][["tile_id", "obsid"]]
+    return pd.Index(select(coords, catalogs, tile_ids, obsids, regions).tile_id.unique())
+
+# %% ../notebooks/05_cli.ipynb 6
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise click.UsageError("Parquet output needs the optional `pyarrow` package.")
+    return pa, pq
+
+
+class ChunkWriter:
+    """Write DataFrame chunks to csv, jsonl or parquet as they come in.
+
+    Parquet chunks are written with `schema`, or the one of the first chunk if None.
+    """
+
+    def __init__(self, output, fmt="csv", schema=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+        self.output = output
+        self.fmt = fmt
+        self.schema = schema
+        self.rows = 0
+        self._f = None
+        self._parquet = None
+        if fmt == "parquet":
+            if output == "-":
+                raise click.UsageError("Parquet output needs a file name (--output).")
+        else:
+            self._f = click.open_file(output, "w")
+
+    def write(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self._f, index=False, header=self.rows == 0)
+        elif self.fmt == "jsonl":
+            if len(df):
+                self._f.write(df.to_json(orient="records", lines=True).rstrip("\n") + "\n")
+        else:
+            self._write_parquet(df)
+        self.rows += len(df)
+
+    def _write_parquet(self, df):
+        pa, pq = _pyarrow()
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self._parquet is None:
+            self.schema = table.schema
+            self._parquet = pq.ParquetWriter(self.output, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._f is not None:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_chunked(df, output, fmt="csv", chunksize=CHUNKSIZE) -> int:
+    "Stream `df` in chunks of `chunksize` rows to `output`, return number of rows."
+    schema = None
+    if fmt == "parquet":
+        # from the whole frame, a chunk alone can miss e.g. the type of a mostly empty column
+        schema = _pyarrow()[0].Schema.from_pandas(df, preserve_index=False)
+    with ChunkWriter(output, fmt, schema) as writer:
+        for start in range(0, max(len(df), 1), chunksize):
+            writer.write(df.iloc[start : start + chunksize])
+    return writer.rows
+
+# %% ../notebooks/05_cli.ipynb 7
+def selection_options(func):
+    "Shared --tile-id/--obsid/--region options, expanded with `read_ids`."
+
+    @click.option(
+        "-t", "--tile-id", "tile_ids", multiple=True, help="Tile IDs, comma separated or @FILE."
+    )
+    @click.option(
+        "--obsid", "obsids", multiple=True, help="HiRISE obsids, comma separated or @FILE."
+    )
+    @click.option(
+        "-r", "--region", "regions", multiple=True, help="Region names, comma separated or @FILE."
+    )
+    @wraps(func)
+    def wrapper(tile_ids, obsids, regions, **kwargs):
+        return func(
+            tile_ids=read_ids(tile_ids),
+            obsids=read_ids(obsids),
+            regions=read_ids(regions),
+            **kwargs,
+        )
+
+    return wrapper
+
+
+def output_options(func):
+    "Shared --output/--format/--chunksize options."
+    options = [
+        click.option(
+            "-o", "--output", default="-", show_default=True, help="Output file, '-' for stdout."
+        ),
+        click.option(
+            "-f", "--format", "fmt", type=click.Choice(FORMATS), default="csv", show_default=True
+        ),
+        click.option(
+            "--chunksize", default=CHUNKSIZE, show_default=True, help="Rows per written chunk."
+        ),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
+def profile_option(func):
+    "Shared --profile option, writing an `instrument` profile of the command as JSON."
+
+    @click.option(
+        "--profile",
+        "profile_path",
+        type=click.Path(dir_okay=False),
+        help="Write a timing profile as JSON to this file.",
+    )
+    @wraps(func)
+    def wrapper(profile_path, **kwargs):
+        if profile_path is None:
+            return func(**kwargs)
+        prof = instrument.Profiler()
+        try:
+            with prof:
+                return func(**kwargs)
+        finally:
+            prof.to_json(profile_path)
+
+    return wrapper
+
+# %% ../notebooks/05_cli.ipynb 8
+@click.group(invoke_without_command=True)
+@click.pass_context
+def main(ctx):
+    """Batch tools for the Planet Four catalogs.
+
+    Every command loads each catalog at most once per run.
+    ID options take comma separated values or @FILE with one ID per line (@- for stdin).
+    """
+    ctx.obj = io.Catalogs()
+    if ctx.invoked_subcommand is None:
+        click.echo("p4tools.cli.main: choose one of the commands below.\n")
+        click.echo(ctx.get_help())
+
+# %% ../notebooks/05_cli.ipynb 9
+@main.command()
+@click.argument("kind", type=click.Choice(["fans", "blotches"]))
+@selection_options
+@output_options
+@profile_option
+@click.pass_obj
+def export(catalogs, kind, tile_ids, obsids, regions, output, fmt, chunksize):
+    "Export the fan or blotch markings of the selected tiles, obsids or regions."
+    df = select(catalogs[kind], catalogs, tile_ids, obsids, regions)
+    n = write_chunked(df, output, fmt, chunksize)
+    click.echo(f"Exported {n} {kind}.", err=True)
+
+
+@main.command()
+@selection_options
+@output_options
+@profile_option
+@click.pass_obj
+def urls(catalogs, tile_ids, obsids, regions, output, fmt, chunksize):
+    "Resolve the image URLs of the selected tiles."
+    selected = select_tile_ids(catalogs, tile_ids, obsids, regions)
+    tile_urls = catalogs["tile_urls"]
+    df = tile_urls[tile_urls.tile_id.isin(selected)]
+    missing = len(selected) - len(df)
+    if missing:
+        click.echo(f"Warning: no URL found for {missing} tiles.", err=True)
+    write_chunked(df, output, fmt, chunksize)
+
+
+@main.command()
+@selection_options
+@click.option("--workers", default=8, show_default=True, help="Number of concurrent downloads.")
+@profile_option
+@click.pass_obj
+def prefetch(catalogs, tile_ids, obsids, regions, workers):
+    "Download the images of the selected tiles into the cache."
+    selected = select_tile_ids(catalogs, tile_ids, obsids, regions)
+    tile_urls = catalogs["tile_urls"].set_index("tile_id").tile_url
+    found = selected[selected.isin(tile_urls.index)]
+    failed = len(selected) - len(found)
+    with ThreadPoolExecutor(workers) as pool:
+        futures = {
+            pool.submit(io.fetch_subframe, tile_urls.at[tile_id], progressbar=False): tile_id
+            for tile_id in found
+        }
+        for future in as_completed(futures):
+            try:
+                click.echo(f"{futures[future]}\t{future.result()}")
+            except Exception as e:
+                failed += 1
+                click.echo(f"Failed {futures[future]}: {e}", err=True)
+    if failed:
+        click.echo(f"{failed} of {len(selected)} tiles could not be fetched.", err=True)
+        sys.exit(1)
+
+
+@main.command()
+@selection_options
+@output_options
+@profile_option
+@click.pass_obj
+def counts(catalogs, tile_ids, obsids, regions, output, fmt, chunksize):
+    "Print the number of fans and blotches per tile."
+    df = pd.DataFrame(
+        {
+            "n_fans": catalogs["fans"].tile_id.value_counts(),
+            "n_blotches": catalogs["blotches"].tile_id.value_counts(),
+        }
+    )
+    if tile_ids or obsids or regions:
+        df = df.reindex(select_tile_ids(catalogs, tile_ids, obsids, regions))
+    df = df.fillna(0).astype(int).sort_index()
+    df.index.name = "tile_id"
+    write_chunked(df.reset_index(), output, fmt, chunksize)
+
+# %% ../notebooks/05_cli.ipynb 10
+@main.command()
+@click.argument("root", type=click.Path(file_okay=False))
+@click.option(
+    "-k", "--kind", "kinds", multiple=True, type=click.Choice(["fans", "blotches"]),
+    default=["fans", "blotches"], show_default=True,
+)
+@click.option(
+    "--by",
+    type=click.Choice(list(partitions.PARTITION_COLUMNS)),
+    default="obsid",
+    show_default=True,
+)
+@click.option(
+    "--enrich/--no-enrich", default=True, show_default=True, help="Add region names and metadata."
+)
+@click.option(
+    "-f", "--format", "fmt", type=click.Choice(list(partitions.FORMATS)),
+    default="parquet", show_default=True,
+)
+@profile_option
+@click.pass_obj
+def partition(catalogs, root, kinds, by, enrich, fmt):
+    "Write the catalogs as dataset partitioned by obsid or region into ROOT."
+    manifest = partitions.export_partitioned(root, kinds, by, enrich, fmt, catalogs=catalogs)
+    for kind, v in manifest["kinds"].items():
+        click.echo(f"{kind}: {v['rows']} rows in {len(v['partitions'])} partitions", err=True)
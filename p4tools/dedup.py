@@ -0,0 +1,146 @@
+"""Vectorized detection of exact and near-duplicate markings in the catalogs"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/07_dedup.ipynb.
+
+# %% auto 0
+__all__ = ['FAN_TOLERANCES', 'BLOTCH_TOLERANCES', 'ANGLE_PERIODS', 'marking_kind', 'duplicate_groups', 'find_duplicates',
+           'deduplicate']
+
+# %% ../notebooks/07_dedup.ipynb 3
+import numpy as np
+import pandas as pd
+
+# %% ../notebooks/07_dedup.ipynb 4
+FAN_TOLERANCES = {
+    "image_x": 0.5,
+    "image_y": 0.5,
+    "angle": 1.0,
+    "spread": 1.0,
+    "distance": 1.0,
+}
+BLOTCH_TOLERANCES = {
+    "image_x": 0.5,
+    "image_y": 0.5,
+    "angle": 1.0,
+    "radius_1": 1.0,
+    "radius_2": 1.0,
+}
+# angles are compared modulo these periods, an ellipse is symmetric under rotation by 180 degrees
+ANGLE_PERIODS = {"fans": 360.0, "blotches": 180.0}
+
+# %% ../notebooks/07_dedup.ipynb 5
+def marking_kind(df) -> str:
+    "'fans' or 'blotches', depending on the columns of `df`."
+    if "spread" in df:
+        return "fans"
+    if "radius_1" in df:
+        return "blotches"
+    raise ValueError("Can't tell if these are fans or blotches.")
+
+
+def _tolerances(kind, tolerances):
+    defaults = FAN_TOLERANCES if kind == "fans" else BLOTCH_TOLERANCES
+    if tolerances is None:
+        return dict(defaults)
+    if np.isscalar(tolerances):
+        return {col: float(tolerances) for col in defaults}
+    return {**defaults, **tolerances}
+
+# %% ../notebooks/07_dedup.ipynb 6
+def _candidate_pairs(group_codes, x, y, cell):
+    "Index pairs (i < j) of points in the same or neighbouring grid cells of the same group."
+    points = pd.DataFrame(
+        {
+            "g": group_codes,
+            "ix": np.floor(x / cell).astype(np.int64),
+            "iy": np.floor(y / cell).astype(np.int64),
+            "i": np.arange(len(x)),
+        }
+    )
+    pairs = []
+    # half of the 3x3 neighbourhood is enough, the other half is found from the other side
+    for dx, dy in [(0, 0), (1, -1), (1, 0), (1, 1), (0, 1)]:
+        shifted = points.assign(ix=points.ix + dx, iy=points.iy + dy)
+        merged = points.merge(shifted, on=["g", "ix", "iy"], suffixes=("", "_other"))
+        i, j = merged.i.values, merged.i_other.values
+        keep = i < j if (dx, dy) == (0, 0) else i != j
+        pairs.append(np.column_stack([i[keep], j[keep]]))
+    pairs = np.concatenate(pairs)
+    return np.sort(pairs, axis=1)
+
+
+def _connected_components(n, pairs):
+    "Label of the smallest member of each connected component, for `n` nodes."
+    labels = np.arange(n)
+    if len(pairs) == 0:
+        return labels
+    i, j = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[i], labels[j])
+        new = labels.copy()
+        np.minimum.at(new, i, low)
+        np.minimum.at(new, j, low)
+        # pointer jumping to the root label
+        new = new[new]
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+# %% ../notebooks/07_dedup.ipynb 7
+def duplicate_groups(
+    df: pd.DataFrame,  # fan or blotch catalog (or a part of it)
+    tolerances=None,  # dict column->max. absolute difference, scalar for all, 0 for exact
+    across_tiles: bool = True,  # compare markings of all tiles of an obsid, not only within a tile
+) -> pd.Series:
+    """Group label for every marking, equal for markings that duplicate each other.
+
+    Two markings are duplicates if all compared columns differ by at most their
+    tolerance, angles being compared modulo their period. Duplicates are grouped
+    transitively. The label is the position of the first member of the group in `df`.
+    """
+    kind = marking_kind(df)
+    tol = _tolerances(kind, tolerances)
+    group_col = "obsid" if across_tiles else "tile_id"
+    group_codes = pd.factorize(df[group_col])[0]
+    if all(v == 0 for v in tol.values()):
+        keys = df.assign(_g=group_codes).groupby(["_g"] + list(tol), sort=False, dropna=False)
+        labels = keys.ngroup()
+        first = pd.Series(np.arange(len(df))).groupby(labels.values).transform("min")
+        return pd.Series(first.values, index=df.index, name="dup_group")
+    x = df.image_x.to_numpy(dtype=float)
+    y = df.image_y.to_numpy(dtype=float)
+    cell = max(tol["image_x"], tol["image_y"]) or 1.0
+    pairs = _candidate_pairs(group_codes, x, y, cell)
+    i, j = pairs[:, 0], pairs[:, 1]
+    match = np.ones(len(pairs), dtype=bool)
+    for col, limit in tol.items():
+        values = df[col].to_numpy(dtype=float)
+        diff = np.abs(values[i] - values[j])
+        if col == "angle":
+            period = ANGLE_PERIODS[kind]
+            diff = np.abs((diff + period / 2) % period - period / 2)
+        match &= diff <= limit
+    labels = _connected_components(len(df), pairs[match])
+    return pd.Series(labels, index=df.index, name="dup_group")
+
+# %% ../notebooks/07_dedup.ipynb 8
+def find_duplicates(df, tolerances=None, across_tiles=True) -> pd.DataFrame:
+    "Only the markings that have duplicates, with their `dup_group` and sorted by it."
+    groups = duplicate_groups(df, tolerances, across_tiles)
+    sizes = groups.map(groups.value_counts())
+    return df.assign(dup_group=groups)[sizes.values > 1].sort_values("dup_group", kind="stable")
+
+
+def deduplicate(df, tolerances=None, across_tiles=True, keep="first") -> pd.DataFrame:
+    """Remove duplicated markings, keeping one per group.
+
+    `keep` is "first" for the first occurrence in `df`, or the name of a column,
+    e.g. "n_votes", to keep the marking with the largest value.
+    """
+    groups = duplicate_groups(df, tolerances, across_tiles)
+    if keep == "first":
+        return df[groups.values == np.arange(len(df))]
+    order = np.lexsort((np.arange(len(df)), -df[keep].to_numpy()))
+    # the first of every group in the sort order is the one with the largest value
+    first = ~pd.Series(groups.values[order]).duplicated().values
+    return df.iloc[np.sort(order[first])]
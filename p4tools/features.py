@@ -0,0 +1,197 @@
+"""Per-tile image statistics for correlating markings with surface brightness and texture"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/14_features.ipynb.
+
+# %% auto 0
+__all__ = ['RECORDS', 'COLUMNS', 'footprint_mask', 'tile_features', 'default_path', 'stored_features', 'drop_features',
+           'extract_features']
+
+# %% ../notebooks/14_features.ipynb 3
+from functools import partial
+from math import ceil, floor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pooch
+import shapely
+from PIL import Image
+
+from . import io, markings, shared
+
+# %% ../notebooks/14_features.ipynb 4
+RECORDS = {"fans": markings.FanRecord, "blotches": markings.BlotchRecord}
+
+
+def footprint_mask(records, shape=(markings.IMG_Y_SIZE, markings.IMG_X_SIZE)) -> np.ndarray:
+    "Boolean mask of the pixels whose centre lies inside any of the marking `records`."
+    mask = np.zeros(shape, dtype=bool)
+    for record in records:
+        polygon = record.to_shapely()
+        x0, y0, x1, y1 = polygon.bounds
+        col0, row0 = max(floor(x0), 0), max(floor(y0), 0)
+        col1, row1 = min(ceil(x1) + 1, shape[1]), min(ceil(y1) + 1, shape[0])
+        if col0 >= col1 or row0 >= row1:
+            continue
+        rows, cols = np.mgrid[row0:row1, col0:col1]
+        mask[row0:row1, col0:col1] |= shapely.contains_xy(polygon, cols, rows)
+    return mask
+
+
+def tile_features(
+    im: np.ndarray,  # uint8 RGB image of the tile
+    fans=None,  # fan catalog rows of the tile
+    blotches=None,  # blotch catalog rows of the tile
+    bins: int = 16,  # number of brightness histogram bins over 0..255
+) -> dict:
+    "Image statistics and marking coverage of one tile."
+    pixels = im.reshape(-1, 3)
+    mean, std = pixels.mean(axis=0), pixels.std(axis=0)
+    features = {}
+    for i, channel in enumerate("rgb"):
+        features[f"mean_{channel}"] = mean[i]
+        features[f"std_{channel}"] = std[i]
+    brightness = pixels.mean(axis=1)
+    counts = np.bincount((brightness * bins / 256).astype(np.intp), minlength=bins)
+    for i, count in enumerate(counts / len(pixels)):
+        features[f"hist_{i:02d}"] = count
+    masks = {}
+    for kind, df in [("fans", fans), ("blotches", blotches)]:
+        records = [] if df is None else RECORDS[kind].from_frame(df)
+        masks[kind] = footprint_mask(records, im.shape[:2])
+        features[f"n_{kind}"] = len(records)
+    features["fan_fraction"] = masks["fans"].mean()
+    features["blotch_fraction"] = masks["blotches"].mean()
+    features["marked_fraction"] = (masks["fans"] | masks["blotches"]).mean()
+    return features
+
+# %% ../notebooks/14_features.ipynb 5
+# catalog columns the workers need
+COLUMNS = {
+    "fans": ["x", "y", "angle", "spread", "distance"],
+    "blotches": ["x", "y", "angle", "radius_1", "radius_2"],
+    "tile_urls": ["tile_url"],
+}
+
+
+def _extract(tile_id, fans, blotches, tile_urls, bins):
+    "Worker side: features of one tile, or the error that prevented them."
+    try:
+        fpath = io.fetch_subframe(tile_urls.tile_url.iloc[0], progressbar=False)
+        with Image.open(fpath) as im:
+            data = np.asarray(im.convert("RGB"))
+        return tile_id, tile_features(data, fans, blotches, bins), None
+    except Exception as e:
+        return tile_id, None, repr(e)
+
+
+def _as_table(rows):
+    df = pd.DataFrame(rows)
+    counts = [col for col in ["n_fans", "n_blotches"] if col in df]
+    floats = df.columns.difference(["tile_id"] + counts)
+    return df.astype({**{col: np.float32 for col in floats}, **{col: np.int32 for col in counts}})
+
+
+def _parts(path):
+    return sorted(Path(path).glob("part-*.parquet")) + sorted(Path(path).glob("part-*.csv"))
+
+
+def _read_part(fpath, columns=None):
+    if fpath.suffix == ".parquet":
+        return pd.read_parquet(fpath, columns=columns)
+    return pd.read_csv(fpath, usecols=columns)
+
+
+def _write_part(df, path, number):
+    suffix = ".parquet" if io._has_pyarrow() else ".csv"
+    _replace_part(df, Path(path) / f"part-{number:05d}{suffix}")
+
+
+def _replace_part(df, fpath):
+    tmp = fpath.with_name(fpath.name + ".tmp")
+    if fpath.suffix == ".parquet":
+        df.to_parquet(tmp, index=False)
+    else:
+        df.to_csv(tmp, index=False)
+    # a part exists completely or not at all
+    tmp.replace(fpath)
+
+# %% ../notebooks/14_features.ipynb 6
+def default_path():
+    return Path(pooch.os_cache("p4tools")) / "features"
+
+
+def stored_features(path=None) -> pd.DataFrame:
+    "All features stored in `path`, the features directory in the p4tools cache if None."
+    path = Path(path) if path is not None else default_path()
+    parts = [_read_part(fpath) for fpath in _parts(path)]
+    if not parts:
+        return pd.DataFrame({"tile_id": pd.Series(dtype=str)})
+    return _as_table(pd.concat(parts, ignore_index=True))
+
+
+def drop_features(tile_ids, path=None) -> int:
+    "Remove the features of `tile_ids` stored in `path`; returns the number of tiles removed."
+    path = Path(path) if path is not None else default_path()
+    tile_ids = {io.normalize_tile_id(tile_id) for tile_id in tile_ids}
+    n = 0
+    for fpath in _parts(path):
+        df = _read_part(fpath)
+        drop = df.tile_id.isin(tile_ids)
+        if drop.any():
+            # emptied parts are kept, new parts are numbered after the existing ones
+            _replace_part(df[~drop], fpath)
+            n += int(drop.sum())
+    return n
+
+
+def extract_features(
+    tile_ids,  # (partial) tile IDs
+    path=None,  # directory for the results, the features directory in the p4tools cache if None
+    bins: int = 16,  # number of brightness histogram bins
+    workers=None,  # number of processes, all CPUs if None
+    batch_size: int = 1000,  # tiles per stored part
+    catalogs=None,  # `io.Catalogs` or dict with "fans", "blotches" and "tile_urls"
+    mp_context=None,  # multiprocessing context for the pool
+) -> pd.DataFrame:
+    """Features of `tile_ids`, one row per tile; tiles stored in `path` before are not recomputed.
+
+    Tiles that could not be processed are left out and listed in `attrs["failed"]` with their error.
+    """
+    path = Path(path) if path is not None else default_path()
+    path.mkdir(parents=True, exist_ok=True)
+    tile_ids = list(dict.fromkeys(io.normalize_tile_id(tile_id) for tile_id in tile_ids))
+    parts = _parts(path)
+    if parts and sum(col.startswith("hist_") for col in _read_part(parts[0]).columns) != bins:
+        raise ValueError(f"{path} holds features with another number of bins.")
+    done = set()
+    for fpath in parts:
+        done.update(_read_part(fpath, columns=["tile_id"]).tile_id)
+    todo = [tile_id for tile_id in tile_ids if tile_id not in done]
+    failed = {}
+    if todo:
+        catalogs = io.Catalogs() if catalogs is None else catalogs
+        results = shared.imap_tiles(
+            partial(_extract, bins=bins),
+            todo,
+            kinds=("fans", "blotches", "tile_urls"),
+            catalogs=catalogs,
+            workers=workers,
+            columns=COLUMNS,
+            mp_context=mp_context,
+        )
+        rows, number = [], len(parts)
+        for tile_id, features, error in results:
+            if error is not None:
+                failed[tile_id] = error
+                continue
+            rows.append({"tile_id": tile_id, **features})
+            if len(rows) == batch_size:
+                _write_part(_as_table(rows), path, number)
+                rows, number = [], number + 1
+        if rows:
+            _write_part(_as_table(rows), path, number)
+    df = stored_features(path)
+    df = df[df.tile_id.isin(tile_ids)].reset_index(drop=True)
+    df.attrs["failed"] = failed
+    return df
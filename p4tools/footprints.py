@@ -0,0 +1,238 @@
+"""Stream marking footprints as polygons into newline-delimited GeoJSON or GeoPackage files"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/15_footprints.ipynb.
+
+# %% auto 0
+__all__ = ['FRAMES', 'RECORDS', 'MARS_SRS', 'SRS_IDS', 'GPKG_SCHEMA', 'SPATIAL_REF_SYS', 'iter_footprints', 'to_geojsonl',
+           'to_geopackage']
+
+# %% ../notebooks/15_footprints.ipynb 3
+import sqlite3
+import struct
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from . import io, markings, transforms
+
+# %% ../notebooks/15_footprints.ipynb 4
+FRAMES = {"tile": "planet4", "hirise": "hirise", "latlon": "hirise"}
+RECORDS = {"fans": markings.FanRecord, "blotches": markings.BlotchRecord}
+
+
+def _kind(df):
+    if "spread" in df:
+        return "fans"
+    if "radius_1" in df:
+        return "blotches"
+    raise ValueError("Cannot tell fans from blotches: need `spread` or `radius_1` columns.")
+
+
+def _chunks(source, chunksize):
+    "DataFrames of at most `chunksize` rows from a DataFrame, DataFrames or a catalog name."
+    if isinstance(source, str):
+        if source not in RECORDS:
+            raise ValueError(f"Unknown catalog: {source}")
+        with pd.read_csv(io.fetch_zipped_file(source), chunksize=chunksize) as reader:
+            yield from reader
+    elif isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start : start + chunksize]
+    else:
+        for df in source:
+            yield from _chunks(df, chunksize)
+
+
+def iter_footprints(
+    source,  # DataFrame, iterable of DataFrames, or "fans" / "blotches"
+    frame: str = "hirise",  # "tile", "hirise" or "latlon"
+    chunksize: int = 10_000,  # rows per chunk
+    transformer=None,  # `transforms.Transformer` for frame="latlon", created if None
+    fan_segments: int = 100,  # points on the semi-circle closing a fan
+):
+    "Yield (kind, attributes, polygons) per chunk; attributes are the catalog rows of the polygons."
+    if frame not in FRAMES:
+        raise ValueError(f"Unknown frame: {frame}")
+    for df in _chunks(source, chunksize):
+        if len(df) == 0:
+            continue
+        kind = _kind(df)
+        records = RECORDS[kind].from_frame(df, scope=FRAMES[frame])
+        if kind == "fans":
+            polygons = [record.to_shapely(fan_segments) for record in records]
+        else:
+            polygons = [record.to_shapely() for record in records]
+        polygons = np.array(polygons, dtype=object)
+        if frame == "latlon":
+            if transformer is None:
+                transformer = transforms.Transformer()
+            xy, index = shapely.get_coordinates(polygons, return_index=True)
+            obsids = df.obsid.to_numpy()[index]
+            lat, lon = transformer.image_to_latlon(xy[:, 0], xy[:, 1], obsids)
+            # within 180 degrees of the first vertex, so a polygon on 0/360 does not span the globe
+            lon0 = lon[np.searchsorted(index, index)]
+            lon = lon0 + (lon - lon0 + 180) % 360 - 180
+            polygons = shapely.set_coordinates(polygons, np.column_stack([lon, lat]))
+        yield kind, df.reset_index(drop=True), polygons
+
+# %% ../notebooks/15_footprints.ipynb 5
+def to_geojsonl(
+    source,  # DataFrame, iterable of DataFrames, or "fans" / "blotches"
+    path,  # output file, usually with the suffix .geojsonl
+    frame: str = "hirise",  # "tile", "hirise" or "latlon"
+    chunksize: int = 10_000,  # rows per chunk
+    transformer=None,  # `transforms.Transformer` for frame="latlon"
+    fan_segments: int = 100,  # points on the semi-circle closing a fan
+) -> int:
+    "Write footprints as newline-delimited GeoJSON features; returns the number written."
+    n = 0
+    with open(path, "w") as f:
+        chunks = iter_footprints(source, frame, chunksize, transformer, fan_segments)
+        for _, attributes, polygons in chunks:
+            properties = attributes.to_json(orient="records", lines=True).splitlines()
+            geometries = shapely.to_geojson(polygons)
+            for geometry, props in zip(geometries, properties):
+                f.write(f'{{"type":"Feature","geometry":{geometry},"properties":{props}}}\n')
+            n += len(polygons)
+    return n
+
+# %% ../notebooks/15_footprints.ipynb 6
+# Mars sphere with planetocentric latitudes, as IAU_2015:49900
+MARS_SRS = (
+    "Mars (2015) - Sphere / Ocentric",
+    49900,
+    "IAU_2015",
+    49900,
+    'GEOGCS["Mars (2015) - Sphere / Ocentric",DATUM["Mars (2015) - Sphere",'
+    'SPHEROID["Mars (2015) - Sphere",3396190,0]],PRIMEM["Reference Meridian",0],'
+    'UNIT["degree",0.0174532925199433]]',
+    "Mars sphere, planetocentric latitude, positive east longitude",
+)
+SRS_IDS = {"tile": -1, "hirise": -1, "latlon": MARS_SRS[1]}
+GPKG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT);
+CREATE TABLE IF NOT EXISTS gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, identifier TEXT UNIQUE,
+    description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+    FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id));
+CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+    table_name TEXT NOT NULL, column_name TEXT NOT NULL, geometry_type_name TEXT NOT NULL,
+    srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL,
+    PRIMARY KEY (table_name, column_name),
+    FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+    FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id));
+"""
+SPATIAL_REF_SYS = [
+    ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", "undefined cartesian coordinates"),
+    ("Undefined geographic SRS", 0, "NONE", 0, "undefined", "undefined geographic coordinates"),
+    (
+        "WGS 84 geodetic",
+        4326,
+        "EPSG",
+        4326,
+        'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],'
+        'PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433]]',
+        "longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid",
+    ),
+    MARS_SRS,
+]
+
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "BOOLEAN"
+    if pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "DOUBLE"
+    return "TEXT"
+
+
+def _gpkg_geometries(polygons, srs_id):
+    "GeoPackage geometry blobs: header with the xy envelope, followed by little endian WKB."
+    bounds = shapely.bounds(polygons)
+    wkbs = shapely.to_wkb(polygons, byte_order=1)
+    # flags 0b011: little endian, envelope [minx, maxx, miny, maxy]
+    return [
+        struct.pack("<2sBBi4d", b"GP", 0, 0b011, srs_id, b[0], b[2], b[1], b[3]) + wkb
+        for b, wkb in zip(bounds, wkbs)
+    ]
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def to_geopackage(
+    source,  # DataFrame, iterable of DataFrames, or "fans" / "blotches"
+    path,  # GeoPackage file, created if needed
+    layer=None,  # table name, the marking kind if None; an existing layer is replaced
+    frame: str = "hirise",  # "tile", "hirise" or "latlon"
+    chunksize: int = 10_000,  # rows per chunk
+    transformer=None,  # `transforms.Transformer` for frame="latlon"
+    fan_segments: int = 100,  # points on the semi-circle closing a fan
+) -> int:
+    "Write footprints as polygon layer of a GeoPackage; returns the number written."
+    srs_id = SRS_IDS.get(frame)
+    con = sqlite3.connect(path)
+    try:
+        con.execute("PRAGMA application_id = 1196444487")  # "GPKG"
+        con.execute("PRAGMA user_version = 10200")
+        con.executescript(GPKG_SCHEMA)
+        con.executemany(
+            "INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", SPATIAL_REF_SYS
+        )
+        n, table, columns = 0, None, None
+        extent = np.array([np.inf, np.inf, -np.inf, -np.inf])
+        chunks = iter_footprints(source, frame, chunksize, transformer, fan_segments)
+        for kind, attributes, polygons in chunks:
+            if table is None:
+                table = layer or kind
+                columns = list(attributes.columns)
+                _create_layer(con, table, attributes, srs_id)
+                insert = (
+                    f"INSERT INTO {_quote(table)} (geom, {', '.join(map(_quote, columns))}) "
+                    f"VALUES (?{', ?' * len(columns)})"
+                )
+            values = attributes[columns].astype(object)
+            values = values.where(attributes[columns].notna(), None).to_numpy()
+            geometries = _gpkg_geometries(polygons, srs_id)
+            con.executemany(insert, ([g, *row] for g, row in zip(geometries, values)))
+            bounds = shapely.total_bounds(polygons)
+            extent[:2] = np.minimum(extent[:2], bounds[:2])
+            extent[2:] = np.maximum(extent[2:], bounds[2:])
+            n += len(polygons)
+        if table is not None:
+            con.execute(
+                "UPDATE gpkg_contents SET min_x = ?, min_y = ?, max_x = ?, max_y = ? "
+                "WHERE table_name = ?",
+                (*extent.tolist(), table),
+            )
+        con.commit()
+    finally:
+        con.close()
+    return n
+
+
+def _create_layer(con, table, attributes, srs_id):
+    con.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+    con.execute("DELETE FROM gpkg_geometry_columns WHERE table_name = ?", (table,))
+    con.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (table,))
+    definitions = [f"{_quote(col)} {_sql_type(dtype)}" for col, dtype in attributes.dtypes.items()]
+    con.execute(
+        f"CREATE TABLE {_quote(table)} (fid INTEGER PRIMARY KEY AUTOINCREMENT, geom POLYGON, "
+        f"{', '.join(definitions)})"
+    )
+    con.execute(
+        "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) "
+        "VALUES (?, 'features', ?, ?)",
+        (table, table, srs_id),
+    )
+    con.execute(
+        "INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', 'POLYGON', ?, 0, 0)", (table, srs_id)
+    )
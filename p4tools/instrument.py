@@ -0,0 +1,199 @@
+"""Optional timing and counter instrumentation for the p4tools hot paths"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/03_instrument.ipynb.
+
+# %% auto 0
+__all__ = ['COUNTERS', 'is_enabled', 'OperationStats', 'Profiler', 'profile', 'record', 'timed']
+
+# %% ../notebooks/03_instrument.ipynb 3
+import json
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import pandas as pd
+
+# %% ../notebooks/03_instrument.ipynb 4
+_active = []
+_lock = threading.Lock()
+
+COUNTERS = [
+    "bytes_downloaded",
+    "bytes_read",
+    "cache_hits",
+    "cache_misses",
+    "rows",
+]
+
+# %% ../notebooks/03_instrument.ipynb 5
+def is_enabled() -> bool:
+    "True if at least one `Profiler` is currently recording."
+    return bool(_active)
+
+# %% ../notebooks/03_instrument.ipynb 6
+class OperationStats:
+    "Accumulated calls, timings and counters of one named operation."
+
+    __slots__ = ["name", "count", "total", "min", "max"] + COUNTERS
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+
+    def add_time(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def add_counters(self, **counters):
+        for counter, value in counters.items():
+            if counter not in COUNTERS:
+                raise ValueError(f"Unknown counter: {counter}")
+            setattr(self, counter, getattr(self, counter) + value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self):
+        d = {
+            "operation": self.name,
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.mean,
+            "min_s": self.min if self.count else 0.0,
+            "max_s": self.max,
+        }
+        d.update({counter: getattr(self, counter) for counter in COUNTERS})
+        return d
+
+# %% ../notebooks/03_instrument.ipynb 7
+class Profiler:
+    """Collect timings and counters of instrumented p4tools operations.
+
+    Use it as a context manager, or call `start` and `stop` explicitly.
+    Profilers can be nested; every active profiler records every operation.
+
+    Examples
+    --------
+    >>> with Profiler() as prof:
+    ...     io.get_fans_for_tile("APF0000cia")
+    >>> print(prof.report())
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self.wall_time = 0.0
+        self._t0 = None
+
+    def start(self):
+        with _lock:
+            _active.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.wall_time += time.perf_counter() - self._t0
+        with _lock:
+            _active.remove(self)
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _get(self, name):
+        try:
+            return self.stats[name]
+        except KeyError:
+            return self.stats.setdefault(name, OperationStats(name))
+
+    def reset(self):
+        self.stats = {}
+        self.wall_time = 0.0
+
+    def summary(self) -> pd.DataFrame:
+        "Table with one row per operation, sorted by total time."
+        columns = ["count", "total_s", "mean_s", "min_s", "max_s"] + COUNTERS
+        rows = [s.to_dict() for s in self.stats.values()]
+        if not rows:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name="operation"))
+        df = pd.DataFrame(rows).set_index("operation")
+        return df[columns].sort_values("total_s", ascending=False)
+
+    def report(self) -> str:
+        "Human readable summary table."
+        return f"wall time: {self.wall_time:.3f} s\n" + self.summary().to_string()
+
+    def to_dict(self) -> dict:
+        "Machine readable summary."
+        return {
+            "wall_time_s": self.wall_time,
+            "operations": [s.to_dict() for s in self.stats.values()],
+        }
+
+    def to_json(self, fpath=None):
+        "Return the summary as JSON string, or write it to `fpath`."
+        s = json.dumps(self.to_dict(), indent=2)
+        if fpath is None:
+            return s
+        with open(fpath, "w") as f:
+            f.write(s)
+
+    def __str__(self):
+        return self.report()
+
+    def __repr__(self):
+        return f"<Profiler: {len(self.stats)} operations, {self.wall_time:.3f} s>"
+
+# %% ../notebooks/03_instrument.ipynb 8
+@contextmanager
+def profile():
+    "Context manager yielding an active `Profiler`."
+    prof = Profiler()
+    with prof:
+        yield prof
+
+# %% ../notebooks/03_instrument.ipynb 9
+def record(name, seconds=None, **counters):
+    """Record one call of `name` and/or add counters to it in all active profilers.
+
+    Hot paths should guard expensive counter calculations with `is_enabled()`.
+    """
+    if not _active:
+        return
+    with _lock:
+        for prof in _active:
+            stats = prof._get(name)
+            if seconds is not None:
+                stats.add_time(seconds)
+            if counters:
+                stats.add_counters(**counters)
+
+
+def timed(name):
+    "Decorator recording the wall time of every call under `name` while profiling."
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _active:
+                return func(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - t0)
+
+        return wrapper
+
+    return decorator
@@ -3,18 +3,28 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/00_io.ipynb.
 
 # %% auto 0
-__all__ = ['logger', 'base_url', 'urls', 'hashes', 'fetch_zipped_file', 'get_blotch_catalog', 'get_fan_catalog', 'get_meta_data',
-           'get_tile_coords', 'get_region_names', 'get_tile_urls', 'normalize_tile_id', 'get_subframe',
-           'get_url_for_tile_id', 'get_url_for_tile', 'get_subframe_by_tile_id', 'get_subframe_for_tile',
-           'get_fans_for_tile', 'get_blotches_for_tile', 'get_hirise_id_for_tile']
+__all__ = ['logger', 'base_url', 'urls', 'hashes', 'MARKING_KINDS', 'ROW_GROUP_SIZE', 'fetch_zipped_file', 'get_blotch_catalog',
+           'get_fan_catalog', 'get_meta_data', 'get_tile_coords', 'get_region_names', 'get_tile_urls', 'Catalogs',
+           'normalize_tile_id', 'fetch_subframe', 'get_subframe', 'get_url_for_tile_id', 'get_url_for_tile',
+           'get_subframe_by_tile_id', 'get_subframe_for_tile', 'get_fans_for_tile', 'get_blotches_for_tile',
+           'get_hirise_id_for_tile', 'columnar_catalog', 'query_markings']
 
 # %% ../notebooks/00_io.ipynb 2
+import importlib.util
+import os
+import threading
+import time
+from pathlib import Path
+
 import matplotlib.image as mplimg
 import pandas as pd
 import pooch
 from matplotlib import pyplot as plt
+from pooch.utils import unique_file_name
 from yarl import URL
 
+from . import instrument
+
 # %% ../notebooks/00_io.ipynb 3
 logger = pooch.get_logger()
 logger.setLevel("WARNING")
@@ -51,10 +61,35 @@ def _get_hash(key):
     return pooch.file_hash(path)
 
 
+def _retrieve(url, path, **kwargs):
+    """Wrap `pooch.retrieve` to report cache hits and downloads to the profiler.
+
+    For a cached file with a known hash, the retrieve time is the hash check.
+    """
+    if not instrument.is_enabled():
+        return pooch.retrieve(url, path=path, **kwargs)
+    cached = Path(path) / unique_file_name(url)
+    hit = cached.exists()
+    t0 = time.perf_counter()
+    fpath = pooch.retrieve(url, path=path, **kwargs)
+    seconds = time.perf_counter() - t0
+    if hit:
+        instrument.record("io.retrieve.cached", seconds, cache_hits=1)
+    else:
+        instrument.record(
+            "io.retrieve.download",
+            seconds,
+            cache_misses=1,
+            bytes_downloaded=cached.stat().st_size,
+        )
+    return fpath
+
+
+@instrument.timed("io.fetch_zipped_file")
 def fetch_zipped_file(key):
     url = base_url / urls[key]
     hash = hashes[key]
-    fpath = pooch.retrieve(
+    fpath = _retrieve(
         str(url),
         path=pooch.os_cache("p4tools"),
         known_hash=hash,
@@ -64,30 +99,68 @@ def fetch_zipped_file(key):
     return fpath[0]
 
 # %% ../notebooks/00_io.ipynb 8
+@instrument.timed("io.read_csv")
+def _read_csv(fpath) -> pd.DataFrame:
+    df = pd.read_csv(fpath)
+    if instrument.is_enabled():
+        instrument.record("io.read_csv", bytes_read=os.path.getsize(fpath), rows=len(df))
+    return df
+
+
+@instrument.timed("io.get_blotch_catalog")
 def get_blotch_catalog() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("blotches"))
+    return _read_csv(fetch_zipped_file("blotches"))
 
 
+@instrument.timed("io.get_fan_catalog")
 def get_fan_catalog() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("fans"))
+    return _read_csv(fetch_zipped_file("fans"))
 
 
+@instrument.timed("io.get_meta_data")
 def get_meta_data() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("metadata"))
+    return _read_csv(fetch_zipped_file("metadata"))
 
 
+@instrument.timed("io.get_tile_coords")
 def get_tile_coords() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("tile_coords"))
+    return _read_csv(fetch_zipped_file("tile_coords"))
 
 
+@instrument.timed("io.get_region_names")
 def get_region_names() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("region_names"))
+    return _read_csv(fetch_zipped_file("region_names"))
 
 
+@instrument.timed("io.get_tile_urls")
 def get_tile_urls() -> pd.DataFrame:
-    return pd.read_csv(fetch_zipped_file("tile_urls"))
+    return _read_csv(fetch_zipped_file("tile_urls"))
+
+# %% ../notebooks/00_io.ipynb 13
+class Catalogs:
+    """Lazily loaded catalogs, each one read at most once per instance.
+
+    Access them by key, e.g. `catalogs["fans"]`.
+    """
+
+    loaders = {
+        "fans": "get_fan_catalog",
+        "blotches": "get_blotch_catalog",
+        "metadata": "get_meta_data",
+        "tile_coords": "get_tile_coords",
+        "region_names": "get_region_names",
+        "tile_urls": "get_tile_urls",
+    }
 
-# %% ../notebooks/00_io.ipynb 12
+    def __init__(self):
+        self._cache = {}
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            self._cache[key] = globals()[self.loaders[key]]()
+        return self._cache[key]
+
+# %% ../notebooks/00_io.ipynb 14
 def normalize_tile_id(tile_id: str) -> str:
     """Normalize a tile ID by adding 'APF' prefix and leading zeros if necessary.
 
@@ -129,15 +202,33 @@ def normalize_tile_id(tile_id: str) -> str:
     # Add APF prefix
     return f"APF{padded_id}"
 
-# %% ../notebooks/00_io.ipynb 14
-def get_subframe(url):
-    targetpath = pooch.retrieve(
-        url, path=pooch.os_cache("p4tools/tiles"), known_hash=None, progressbar=True
+# %% ../notebooks/00_io.ipynb 16
+def fetch_subframe(url, progressbar=True) -> str:
+    "Download the subframe at `url` into the tile cache if needed, return its path."
+    return _retrieve(
+        url,
+        path=pooch.os_cache("p4tools/tiles"),
+        known_hash=None,
+        progressbar=progressbar,
     )
-    im = mplimg.imread(targetpath)
+
+
+@instrument.timed("io.imread")
+def _imread(fpath):
+    im = mplimg.imread(fpath)
+    if instrument.is_enabled():
+        instrument.record("io.imread", bytes_read=os.path.getsize(fpath))
+    return im
+
+
+@instrument.timed("io.get_subframe")
+def get_subframe(url):
+    targetpath = fetch_subframe(url)
+    im = _imread(targetpath)
     return im
 
-# %% ../notebooks/00_io.ipynb 15
+# %% ../notebooks/00_io.ipynb 17
+@instrument.timed("io.get_url_for_tile_id")
 def get_url_for_tile_id(tile_id):
     return get_tile_urls().set_index("tile_id").squeeze().at[normalize_tile_id(tile_id)]
 
@@ -146,7 +237,7 @@ def get_url_for_tile(tile_id):
     # alias for get_url_for_tile_id
     return get_url_for_tile_id(tile_id)
 
-# %% ../notebooks/00_io.ipynb 19
+# %% ../notebooks/00_io.ipynb 21
 def get_subframe_by_tile_id(tile_id):
     url = get_url_for_tile_id(tile_id)
     return get_subframe(url)
@@ -157,19 +248,29 @@ def get_subframe_for_tile(tile_id):
     return get_subframe_by_tile_id(tile_id)
 
 
-# %% ../notebooks/00_io.ipynb 21
+# %% ../notebooks/00_io.ipynb 23
+@instrument.timed("io.query_tile")
+def _query_tile(df, tile_id):
+    df = df.query("tile_id == @tile_id")
+    if instrument.is_enabled():
+        instrument.record("io.query_tile", rows=len(df))
+    return df
+
+
+@instrument.timed("io.get_fans_for_tile")
 def get_fans_for_tile(tile_id):
     tile_id = normalize_tile_id(tile_id)
     fans = get_fan_catalog()
-    return fans.query("tile_id == @tile_id")
+    return _query_tile(fans, tile_id)
 
-# %% ../notebooks/00_io.ipynb 23
+# %% ../notebooks/00_io.ipynb 27
+@instrument.timed("io.get_blotches_for_tile")
 def get_blotches_for_tile(tile_id):
     tile_id = normalize_tile_id(tile_id)
     blotches = get_blotch_catalog()
-    return blotches.query("tile_id == @tile_id")
+    return _query_tile(blotches, tile_id)
 
-# %% ../notebooks/00_io.ipynb 26
+# %% ../notebooks/00_io.ipynb 30
 def get_hirise_id_for_tile(tile_id):
     tile_id = normalize_tile_id(tile_id)
     try:
@@ -181,3 +282,209 @@ def get_hirise_id_for_tile(tile_id):
             raise ValueError(f"No obsid found for tile {tile_id}")
     else:
         return obsid
+
+# %% ../notebooks/00_io.ipynb 33
+MARKING_KINDS = ["fans", "blotches"]
+ROW_GROUP_SIZE = 50_000
+
+
+def _as_list(values):
+    if values is None:
+        return None
+    return [values] if isinstance(values, str) else list(values)
+
+
+def _has_pyarrow():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+@instrument.timed("io.columnar_catalog")
+def columnar_catalog(kind) -> Path:
+    """Path of the parquet copy of the `kind` marking catalog, created on first use.
+
+    The copy is sorted by obsid and tile_id, so that row group statistics allow skipping
+    most of the file for obsid, region or l_s selections.
+    """
+    version = hashes[kind].split(":")[-1]
+    path = Path(pooch.os_cache("p4tools")) / "columnar" / f"{kind}-{version}.parquet"
+    if not path.exists():
+        df = globals()[Catalogs.loaders[kind]]()
+        df = df.sort_values(["obsid", "tile_id"], kind="stable")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # one tmp file per writer, processes or threads may build the copy at the same time
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        df.to_parquet(tmp, index=False, row_group_size=ROW_GROUP_SIZE)
+        tmp.replace(path)
+    return path
+
+
+# kind -> ((hash, loader), catalog) of the catalogs read by queries without pyarrow
+_csv_catalogs = {}
+_csv_lock = threading.Lock()
+
+
+def _csv_catalog(kind) -> pd.DataFrame:
+    "The `kind` marking catalog for queries without pyarrow, read once per process and release."
+    loader = globals()[Catalogs.loaders[kind]]
+    key = (hashes[kind], loader)
+    with _csv_lock:
+        cached = _csv_catalogs.get(kind)
+        if cached is None or cached[0] != key:
+            cached = _csv_catalogs[kind] = (key, loader())
+    return cached[1]
+
+# %% ../notebooks/00_io.ipynb 34
+def _marking_filters(tile_ids=None, obsids=None, l_s=None, bbox=None) -> list:
+    """Selection as filters in disjunctive normal form, as understood by `pd.read_parquet`.
+
+    `bbox` is (lon_min, lat_min, lon_max, lat_max); lon_min > lon_max crosses 0 degrees.
+    """
+    common = []
+    if tile_ids is not None:
+        common.append(("tile_id", "in", tile_ids))
+    if obsids is not None:
+        common.append(("obsid", "in", obsids))
+    if l_s is not None:
+        common += [("l_s", ">=", l_s[0]), ("l_s", "<=", l_s[1])]
+    if bbox is None:
+        return [common] if common else []
+    lon_min, lat_min, lon_max, lat_max = bbox
+    common += [
+        ("PlanetocentricLatitude", ">=", lat_min),
+        ("PlanetocentricLatitude", "<=", lat_max),
+    ]
+    if lon_min <= lon_max:
+        return [common + [("Longitude", ">=", lon_min), ("Longitude", "<=", lon_max)]]
+    return [common + [("Longitude", ">=", lon_min)], common + [("Longitude", "<=", lon_max)]]
+
+
+def _selects_nothing(filters) -> bool:
+    "True if every conjunction has an `in` filter with an empty list of values."
+    return bool(filters) and all(
+        any(op == "in" and len(value) == 0 for _, op, value in conjunction)
+        for conjunction in filters
+    )
+
+
+def _apply_filters(df, filters) -> pd.DataFrame:
+    "Evaluate `_marking_filters` output on a DataFrame."
+    if not filters:
+        return df
+    ops = {
+        "in": lambda s, v: s.isin(v),
+        ">=": lambda s, v: s >= v,
+        "<=": lambda s, v: s <= v,
+    }
+    mask = pd.Series(False, index=df.index)
+    for conjunction in filters:
+        match = pd.Series(True, index=df.index)
+        for col, op, value in conjunction:
+            match &= ops[op](df[col], value)
+        mask |= match
+    return df[mask]
+
+# %% ../notebooks/00_io.ipynb 35
+def _read_markings(kind, filters, columns, dataset=None, prune=None, strict=True):
+    """Read one marking kind with the filters; returns the DataFrame and the query plan.
+
+    `prune` holds the tile_ids, obsids and l_s selection for partition pruning of `dataset`.
+    """
+    if dataset is not None:
+        from p4tools import partitions
+
+        source = partitions.PartitionedDataset(dataset)
+        available = source.columns(kind)
+    elif _has_pyarrow():
+        import pyarrow.parquet as pq
+
+        source = columnar_catalog(kind)
+        available = pq.read_schema(source).names
+    else:
+        source = _csv_catalog(kind)
+        available = list(source.columns)
+    wanted = available if columns is None else list(columns)
+    extra = [col for col in wanted if col not in available]
+    meta = get_meta_data().rename(columns={"OBSERVATION_ID": "obsid"}) if extra else None
+    if extra:
+        joinable = ["roi_name"] + [col for col in meta.columns if col != "obsid"]
+        unknown = [col for col in extra if col not in joinable]
+        if unknown and strict:
+            raise KeyError(f"Unknown columns for {kind}: {unknown}")
+        extra = [col for col in extra if col in joinable]
+        wanted = [col for col in wanted if col in available or col in extra]
+    filter_columns = [col for conjunction in filters for col, _, _ in conjunction]
+    read = [col for col in wanted if col in available]
+    read = list(dict.fromkeys(read + filter_columns + (["obsid"] if extra else [])))
+    plan = {"columns": read, "filters": filters, "joined": extra}
+    if dataset is not None:
+        df = _apply_filters(source.read(kind, columns=read, **(prune or {})), filters)
+        plan["source"] = f"dataset {dataset}"
+    elif isinstance(source, Path):
+        if _selects_nothing(filters):
+            # pyarrow cannot filter with an empty value set, and nothing would match anyway
+            df = pq.read_schema(source).empty_table().to_pandas()[read]
+        else:
+            df = pd.read_parquet(source, columns=read, filters=filters or None)
+        plan["source"] = f"parquet {source}"
+    else:
+        df = _apply_filters(source, filters)[read]
+        plan["source"] = "csv"
+    if "roi_name" in extra:
+        from p4tools import partitions
+
+        df = partitions.add_region_names(df, get_region_names())
+    meta_columns = [col for col in extra if col != "roi_name"]
+    if meta_columns:
+        meta = meta[["obsid"] + meta_columns].drop_duplicates("obsid")
+        df = df.merge(meta, on="obsid", how="left")
+    return df[wanted].reset_index(drop=True), plan
+
+# %% ../notebooks/00_io.ipynb 36
+@instrument.timed("io.query_markings")
+def query_markings(
+    kind: str = "fans",  # "fans", "blotches" or "both"
+    tile_ids=None,  # (list of) tile IDs, short forms like "cia" are allowed
+    obsids=None,  # (list of) HiRISE obsids
+    regions=None,  # (list of) region names, see `get_region_names`
+    l_s=None,  # (lo, hi) solar longitude range, inclusive
+    bbox=None,  # (lon_min, lat_min, lon_max, lat_max), planetocentric degrees, east longitude
+    columns=None,  # columns to return, all catalog columns if None
+    dataset=None,  # root of a dataset written by `partitions.export_partitioned`
+) -> pd.DataFrame:
+    """Markings matching all given selections, reading only the needed columns and rows.
+
+    `columns` may also name "roi_name" and obsid metadata columns (see `get_meta_data`),
+    which are joined to the result. For kind="both" the fans and blotches are concatenated
+    with a categorical `kind` column, columns missing in one kind are NaN there.
+    The query plan for every kind is available in `df.attrs["query"]`.
+    """
+    kinds = MARKING_KINDS if kind == "both" else [kind]
+    if any(k not in MARKING_KINDS for k in kinds):
+        raise ValueError(f"Unknown kind: {kind}")
+    tile_ids = _as_list(tile_ids)
+    if tile_ids is not None:
+        tile_ids = [normalize_tile_id(tile_id) for tile_id in tile_ids]
+    obsids = _as_list(obsids)
+    regions = _as_list(regions)
+    if regions is not None:
+        names = get_region_names()
+        in_regions = names.loc[names.roi_name.isin(regions), "obsid"].unique().tolist()
+        obsids = in_regions if obsids is None else [o for o in obsids if o in in_regions]
+    filters = _marking_filters(tile_ids, obsids, l_s, bbox)
+    prune = dict(tile_ids=tile_ids, obsids=obsids, l_s=l_s)
+    frames, plans = [], {}
+    for k in kinds:
+        frame, plans[k] = _read_markings(k, filters, columns, dataset, prune, len(kinds) == 1)
+        frames.append(frame)
+    df = frames[0]
+    if kind == "both":
+        df = pd.concat(
+            [frame.assign(kind=k) for k, frame in zip(kinds, frames)], ignore_index=True
+        )
+        df["kind"] = pd.Categorical(df["kind"], categories=MARKING_KINDS)
+        if columns is not None:
+            df = df[["kind"] + list(columns)]
+    df.attrs["query"] = plans
+    if instrument.is_enabled():
+        instrument.record("io.query_markings", rows=len(df))
+    return df
@@ -3,18 +3,16 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/01_markings.ipynb.
 
 # %% auto 0
-__all__ = ['IMG_X_SIZE', 'IMG_Y_SIZE', 'show_subframe', 'set_subframe_size', 'calc_fig_size', 'Blotch', 'TileBlotches',
-           'rotate_vector', 'Fan']
+__all__ = ['IMG_X_SIZE', 'IMG_Y_SIZE', 'show_subframe', 'set_subframe_size', 'calc_fig_size', 'MarkingRecord', 'BlotchRecord',
+           'FanRecord', 'Blotch', 'TileBlotches', 'rotate_vector', 'Fan']
 
 # %% ../notebooks/01_markings.ipynb 2
-import math
 from math import cos, degrees, pi, radians, sin
 from pathlib import Path
 
 import matplotlib.lines as lines
 import matplotlib.patches as mpatches
 import numpy as np
-import pandas as pd
 from matplotlib import pyplot as plt
 from matplotlib.collections import PatchCollection
 from matplotlib.patches import Ellipse
@@ -30,11 +28,18 @@ IMG_X_SIZE = 840
 IMG_Y_SIZE = 648
 
 # %% ../notebooks/01_markings.ipynb 4
-def show_subframe(tile_id, ax=None, aspect="auto"):
-    subframe = io.get_subframe_by_tile_id(tile_id)
+def show_subframe(
+    tile_id,
+    ax=None,
+    aspect="auto",
+    level: int = 1,  # 1 for full resolution, else a `thumbnails` level like 2, 4 or 8
+):
+    from p4tools import thumbnails
+
+    subframe, extent = thumbnails.subframe_image(tile_id, level)
     if ax is None:
         _, ax = plt.subplots(figsize=calc_fig_size(8))
-    ax.imshow(subframe, origin="upper", aspect=aspect)
+    ax.imshow(subframe, origin="upper", aspect=aspect, extent=extent)
     ax.set_axis_off()
     return ax
 
@@ -56,7 +61,229 @@ def calc_fig_size(width):
 #         self.data = data
 #         self.scope = scope
 
-# %% ../notebooks/01_markings.ipynb 8
+# %% ../notebooks/01_markings.ipynb 9
+def _xy_columns(scope):
+    if scope not in ["hirise", "planet4"]:
+        raise TypeError("Unknown scope: {}".format(scope))
+    return ("x", "y") if scope == "planet4" else ("image_x", "image_y")
+
+
+class MarkingRecord:
+    "Base class of the compact marking records."
+
+    __slots__ = ("x", "y", "angle", "tile_id", "n_members")
+    shape_columns = []
+
+    def __init__(self, x, y, angle, tile_id=None, n_members=1):
+        self.x = float(x)
+        self.y = float(y)
+        self.angle = float(angle)
+        self.tile_id = tile_id
+        self.n_members = n_members
+
+    @classmethod
+    def from_data(cls, data, scope="planet4"):
+        "Record from one catalog row (Series or namedtuple); `scope` is 'planet4' or 'hirise'."
+        x, y = _xy_columns(scope)
+        shape = [getattr(data, col) for col in cls.shape_columns]
+        tile_id = getattr(data, "tile_id", None)
+        return cls(getattr(data, x), getattr(data, y), data.angle, *shape, tile_id=tile_id)
+
+    @classmethod
+    def from_frame(cls, df, scope="planet4") -> list:
+        "Records for all rows of a catalog DataFrame, without creating a Series per row."
+        x, y = _xy_columns(scope)
+        columns = [df[col].tolist() for col in [x, y, "angle"] + cls.shape_columns]
+        tile_ids = df.tile_id.tolist() if "tile_id" in df else [None] * len(df)
+        return [cls(*values, tile_id=tile_id) for *values, tile_id in zip(*columns, tile_ids)]
+
+    @property
+    def center(self):
+        return np.array([self.x, self.y])
+
+    def values(self):
+        return [self.x, self.y, self.angle] + [getattr(self, col) for col in self.shape_columns]
+
+    def is_equal(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def store(self) -> dict:
+        "Shape parameters, derived points and n_members as dict, e.g. for a DataFrame row."
+        out = dict(zip(["x", "y", "angle"] + self.shape_columns, self.values()))
+        out["tile_id"] = self.tile_id
+        out.update(self._derived())
+        out["n_members"] = self.n_members
+        return out
+
+    def __repr__(self):
+        params = ", ".join(
+            f"{col}={value:g}"
+            for col, value in zip(["x", "y", "angle"] + self.shape_columns, self.values())
+        )
+        return f"{type(self).__name__}({params}, tile_id={self.tile_id!r})"
+
+# %% ../notebooks/01_markings.ipynb 10
+class BlotchRecord(MarkingRecord):
+    "Geometry of one blotch: an ellipse with half axes `radius_1`, `radius_2` rotated by `angle`."
+
+    __slots__ = ("radius_1", "radius_2")
+    shape_columns = ["radius_1", "radius_2"]
+
+    def __init__(self, x, y, angle, radius_1, radius_2, tile_id=None, n_members=1):
+        super().__init__(x, y, angle, tile_id, n_members)
+        self.radius_1 = float(radius_1)
+        self.radius_2 = float(radius_2)
+
+    @property
+    def area(self):
+        return pi * self.radius_1 * self.radius_2
+
+    @property
+    def x1(self):
+        return cos(radians(self.angle)) * self.radius_1
+
+    @property
+    def y1(self):
+        return sin(radians(self.angle)) * self.radius_1
+
+    @property
+    def x2(self):
+        return cos(radians(self.angle + 90)) * self.radius_2
+
+    @property
+    def y2(self):
+        return sin(radians(self.angle + 90)) * self.radius_2
+
+    @property
+    def p1(self):
+        return self.center + np.array([self.x1, self.y1])
+
+    @property
+    def p2(self):
+        return self.center - np.array([self.x1, self.y1])
+
+    @property
+    def p3(self):
+        return self.center + np.array([self.x2, self.y2])
+
+    @property
+    def p4(self):
+        return self.center - np.array([self.x2, self.y2])
+
+    @property
+    def limit_points(self):
+        return [self.p1, self.p2, self.p3, self.p4]
+
+    def _derived(self):
+        out = {}
+        for i, point in enumerate(self.limit_points):
+            out[f"p{i + 1}_x"], out[f"p{i + 1}_y"] = point
+        return out
+
+    def to_shapely(self):
+        "Ellipse polygon, see `Blotch.to_shapely`."
+        circ = geom.Point(self.x, self.y).buffer(1)
+        ell = affinity.scale(circ, self.radius_1, self.radius_2)
+        return affinity.rotate(ell, self.angle)
+
+    def to_artist(self, **kwargs):
+        "A matplotlib Ellipse styled like `Blotch`."
+        style = dict(alpha=0.65, linewidth=2, fill=False)
+        style.update(kwargs)
+        return Ellipse(
+            (self.x, self.y), self.radius_1 * 2, self.radius_2 * 2, angle=self.angle, **style
+        )
+
+# %% ../notebooks/01_markings.ipynb 11
+class FanRecord(MarkingRecord):
+    "Geometry of one fan: two arms of opening `spread` around `angle`, closed by a semi-circle."
+
+    __slots__ = ("spread", "distance")
+    shape_columns = ["spread", "distance"]
+
+    def __init__(self, x, y, angle, spread, distance, tile_id=None, n_members=1):
+        super().__init__(x, y, angle, tile_id, n_members)
+        self.spread = float(spread)
+        self.distance = float(distance)
+
+    @property
+    def base(self):
+        return np.array([self.x, self.y])
+
+    @property
+    def inside_half(self):
+        return self.spread / 2.0
+
+    @property
+    def armlength(self):
+        half = radians(self.inside_half)
+        return self.distance / (cos(half) + sin(half))
+
+    @staticmethod
+    def _unit(angle):
+        return np.array([cos(radians(angle)), sin(radians(angle))])
+
+    @property
+    def v1(self):
+        return self.armlength * self._unit(self.angle - self.inside_half)
+
+    @property
+    def v2(self):
+        return self.armlength * self._unit(self.angle + self.inside_half)
+
+    @property
+    def coords(self):
+        "float[3, 2] : end of first arm, base, end of second arm."
+        base = self.base
+        return np.vstack((base + self.v1, base, base + self.v2))
+
+    @property
+    def circle_base(self):
+        return self.v1 - self.v2
+
+    @property
+    def semi_circle_center(self):
+        return self.base + self.v2 + 0.5 * self.circle_base
+
+    @property
+    def radius(self):
+        return 0.5 * LA.norm(self.circle_base)
+
+    @property
+    def area(self):
+        tr_h = np.sqrt(self.armlength**2 - self.radius**2)
+        return tr_h * self.radius + 0.5 * pi * self.radius**2
+
+    @property
+    def center(self):
+        "Point at half of the total length, armlength + radius of the semi-circle."
+        return self.base + 0.5 * (self.armlength + self.radius) * self._unit(self.angle)
+
+    def _derived(self):
+        out = {}
+        for i, point in enumerate(self.coords[[0, 2]]):
+            out[f"arm{i + 1}_x"], out[f"arm{i + 1}_y"] = point
+        return out
+
+    def to_shapely(self, numsegments=100):
+        "Polygon of the two arms closed by the semi-circle, see `Fan.to_shapely`."
+        theta = np.radians(np.linspace(self.angle - 90, self.angle + 90, numsegments))
+        centerx, centery = self.semi_circle_center
+        arc = np.column_stack(
+            [centerx + self.radius * np.cos(theta), centery + self.radius * np.sin(theta)]
+        )
+        points = np.vstack([self.coords[::-1][:2], arc]).round(2)
+        _, first = np.unique(points, axis=0, return_index=True)
+        return geom.Polygon(points[np.sort(first)])
+
+    def to_artist(self, **kwargs):
+        "A matplotlib Line2D of the two arms, styled like `Fan`."
+        style = dict(alpha=0.65, color="white")
+        style.update(kwargs)
+        coords = self.coords
+        return lines.Line2D(coords[:, 0], coords[:, 1], **style)
+
+# %% ../notebooks/01_markings.ipynb 12
 class Blotch(Ellipse):
     to_average = "x y image_x image_y angle radius_1 radius_2".split()
 
@@ -93,14 +320,11 @@ class Blotch(Ellipse):
         if scope not in ["hirise", "planet4"]:
             raise TypeError("Unknown scope: {}".format(scope))
         try:
-            self.x = data.x if scope == "planet4" else data.image_x
-            self.y = data.y if scope == "planet4" else data.image_y
+            self.record = BlotchRecord.from_data(data, scope)
         except AttributeError:
             print("No x and y attributes in data:\n{}".format(data))
             raise AttributeError
-        # default member number is 1. This is set to the cluster member inside
-        # clustering execution.
-        self._n_members = 1
+        self.x, self.y = self.record.x, self.record.y
         super(Blotch, self).__init__(
             (self.x, self.y),
             data.radius_1 * 2,
@@ -121,18 +345,14 @@ class Blotch(Ellipse):
     def subframe(self):
         return io.get_subframe_by_tile_id(self.data.tile_id)
 
-    def show_subframe(self, ax=None, aspect="auto"):
-        if ax is None:
-            _, ax = plt.subplots(figsize=calc_fig_size(8))
-        ax.imshow(self.subframe, origin="upper", aspect=aspect)
-        ax.set_axis_off()
-        self.ax = ax
+    def show_subframe(self, ax=None, aspect="auto", level=1):
+        self.ax = show_subframe(self.tile_id, ax=ax, aspect=aspect, level=level)
 
     def is_equal(self, other):
         if (
             self.data.x == other.data.x
             and self.data.y == other.data.y
-            and self.data.image_x == other.data.image_y
+            and self.data.image_x == other.data.image_x
             and self.data.image_y == other.data.image_y
             and self.data.radius_1 == other.data.radius_1
             and self.data.radius_2 == other.data.radius_2
@@ -147,50 +367,47 @@ class Blotch(Ellipse):
 
         Code from https://gis.stackexchange.com/questions/243459/drawing-ellipse-with-shapely/243462
         """
-        circ = geom.Point(self.center).buffer(1)
-        ell = affinity.scale(circ, self.data.radius_1, self.data.radius_2)
-        ellr = affinity.rotate(ell, self.data.angle)
-        return ellr
+        return self.record.to_shapely()
 
     @property
     def area(self):
-        return pi * self.data.radius_1 * self.data.radius_2
+        return self.record.area
 
     @property
     def x1(self):
-        return math.cos(math.radians(self.angle)) * self.data.radius_1
+        return self.record.x1
 
     @property
     def y1(self):
-        return math.sin(self.angle) * self.data.radius_1
+        return self.record.y1
 
     @property
     def p1(self):
-        return np.array(self.center) + np.array([self.x1, self.y1])
+        return self.record.p1
 
     @property
     def p2(self):
-        return np.array(self.center) - np.array([self.x1, self.y1])
+        return self.record.p2
 
     @property
     def x2(self):
-        return math.cos(math.radians(self.angle + 90)) * self.data.radius_2
+        return self.record.x2
 
     @property
     def y2(self):
-        return math.sin(math.radians(self.angle + 90)) * self.data.radius_2
+        return self.record.y2
 
     @property
     def p3(self):
-        return np.array(self.center) + np.array([self.x2, self.y2])
+        return self.record.p3
 
     @property
     def p4(self):
-        return np.array(self.center) - np.array([self.x2, self.y2])
+        return self.record.p4
 
     @property
     def limit_points(self):
-        return [self.p1, self.p2, self.p3, self.p4]
+        return self.record.limit_points
 
     def plot_center(self, ax, color="b"):
         ax.scatter(self.x, self.y, color=color, s=20, marker=".")
@@ -201,16 +418,16 @@ class Blotch(Ellipse):
 
     @property
     def n_members(self):
-        return self._n_members
+        return self.record.n_members
 
     @n_members.setter
     def n_members(self, value):
-        self._n_members = value
+        self.record.n_members = value
 
-    def plot(self, color="green", ax=None):
+    def plot(self, color="green", ax=None, level=1):
         if ax is None:
             _, ax = plt.subplots()
-        self.show_subframe(ax)
+        self.show_subframe(ax, level=level)
         ax = self.ax
         if color is not None:
             self.set_color(color)
@@ -244,7 +461,7 @@ class Blotch(Ellipse):
     def __repr__(self):
         return self.__str__()
 
-# %% ../notebooks/01_markings.ipynb 12
+# %% ../notebooks/01_markings.ipynb 16
 class TileBlotches:
     def __init__(self, tile_id, with_center=False, color="green"):
         """Container for all blotches of a tile.
@@ -270,7 +487,7 @@ class TileBlotches:
         ax.add_collection(self.p)
         set_subframe_size(ax)
 
-# %% ../notebooks/01_markings.ipynb 15
+# %% ../notebooks/01_markings.ipynb 19
 def rotate_vector(v, angle):
     """Rotate vector by angle given in degrees.
 
@@ -285,7 +502,7 @@ def rotate_vector(v, angle):
     rotmat = np.array([[cos(rangle), -sin(rangle)], [sin(rangle), cos(rangle)]])
     return rotmat.dot(v)
 
-# %% ../notebooks/01_markings.ipynb 16
+# %% ../notebooks/01_markings.ipynb 20
 class Fan(lines.Line2D):
     to_average = "x y image_x image_y angle spread distance".split()
 
@@ -333,27 +550,19 @@ class Fan(lines.Line2D):
         self.with_center = with_center
         if scope not in ["hirise", "planet4"]:
             raise TypeError("Unknown scope: {}".format(scope))
-        # first coordinate is the base of fan
-        actual_x = "x" if scope == "planet4" else "image_x"
-        actual_y = "y" if scope == "planet4" else "image_y"
         try:
-            self.base = self.data.loc[[actual_x, actual_y]].values.astype("float")
-        except KeyError:
+            self.record = FanRecord.from_data(data, scope)
+        except AttributeError:
             print("No x and y in the data:\n{}".format(data))
             raise KeyError
-        # default n_members value (property)
-        self._n_members = 1
-        # angles
-        self.inside_half = self.data.spread / 2.0
-        alpha = self.data.angle - self.inside_half
-        beta = self.data.angle + self.inside_half
-        # length of arms
-        # first arm
-        self.v1 = rotate_vector([self.armlength, 0], alpha)
-        # second arm
-        self.v2 = rotate_vector([self.armlength, 0], beta)
+        # first coordinate is the base of fan
+        self.base = self.record.base
+        self.inside_half = self.record.inside_half
+        # first and second arm
+        self.v1 = self.record.v1
+        self.v2 = self.record.v2
         # vector matrix, stows the 1D vectors row-wise
-        self.coords = np.vstack((self.base + self.v1, self.base, self.base + self.v2))
+        self.coords = self.record.coords
         # init fan line, first column are the x-components of the row-vectors
         lines.Line2D.__init__(
             self,
@@ -384,28 +593,24 @@ class Fan(lines.Line2D):
 
     @property
     def n_members(self):
-        return self._n_members
+        return self.record.n_members
 
     @n_members.setter
     def n_members(self, value):
-        self._n_members = value
+        self.record.n_members = value
 
     @property
     def armlength(self):
-        half = radians(self.inside_half)
-        return self.data.distance / (cos(half) + sin(half))
+        return self.record.armlength
 
     @property
     def area(self):
-        tr_h = np.sqrt(self.armlength**2 - self.radius**2)
-        tr_area = tr_h * self.radius
-        half_circ_area = 0.5 * pi * self.radius**2
-        return tr_area + half_circ_area
+        return self.record.area
 
     @property
     def circle_base(self):
         "float[2] : Vector between end of first arm and second arm of fan."
-        return self.v1 - self.v2
+        return self.record.circle_base
 
     @property
     def semi_circle_center(self):
@@ -414,12 +619,12 @@ class Fan(lines.Line2D):
         This is used for the drawing of the semi-circle at the end of the
         two fan arms.
         """
-        return self.base + self.v2 + 0.5 * self.circle_base
+        return self.record.semi_circle_center
 
     @property
     def radius(self):
         "float : for the semi-circle wedge drawing at the end of fan."
-        return 0.5 * LA.norm(self.circle_base)
+        return self.record.radius
 
     def add_semicircle(self, ax, color="b"):
         "Draw a semi-circle at end of fan arms using MPL.Wedge."
@@ -448,10 +653,10 @@ class Fan(lines.Line2D):
         pointer.set_color(color)
         ax.add_line(pointer)
 
-    def plot(self, color="green", ax=None):
+    def plot(self, color="green", ax=None, level=1):
         if ax is None:
             _, ax = plt.subplots()
-        ax = show_subframe(self.tile_id, ax=ax)
+        ax = show_subframe(self.tile_id, ax=ax, level=level)
         if color is not None:
             self.set_color(color)
         ax.add_line(self)
@@ -478,10 +683,7 @@ class Fan(lines.Line2D):
         As total length, I define the armlength + the radius of the semi-circle
         at the end.
         """
-        mid_point_vec = rotate_vector(
-            [0.5 * (self.armlength + self.radius), 0], self.data.angle
-        )
-        return self.base + mid_point_vec
+        return self.record.center
 
     def plot_center(self, ax, color="b"):
         ax.scatter(self.center[0], self.center[1], color=color, s=20, marker=".")
@@ -530,25 +732,4 @@ class Fan(lines.Line2D):
         =====
         `Motivated by: <https://stackoverflow.com/a/30762727/680232>`_
         """
-        # Define the arc (presumably ezdxf uses a similar convention)
-        centerx, centery = self.semi_circle_center
-
-        # make a semi-circle first that points to the x-axis, rotate later.
-        start_angle = 270  # In degrees
-
-        # number of elements for the semi-circle
-        numsegments = 100
-
-        # The coordinates of the arc
-        theta = np.radians(np.linspace(start_angle, start_angle + 180, numsegments))
-        x = centerx + self.radius * np.cos(theta)
-        y = centery + self.radius * np.sin(theta)
-
-        arc = geom.LineString(np.column_stack([x, y]))
-
-        rotated = affinity.rotate(
-            arc, self.data.angle, origin=tuple(self.semi_circle_center)
-        )
-
-        df = pd.DataFrame(np.vstack([self.coords[::-1][:2], np.array(rotated)]))
-        return geom.Polygon(df.round(2).drop_duplicates().values)
+        return self.record.to_shapely()
@@ -0,0 +1,255 @@
+"""Memory-mapped HiRISE obsid mosaics assembled from Planet Four subframes"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/09_mosaic.ipynb.
+
+# %% auto 0
+__all__ = ['OVERLAP_MODES', 'CHECKPOINT_TILES', 'mosaic_shape', 'tile_region', 'ObsidMosaic']
+
+# %% ../notebooks/09_mosaic.ipynb 3
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pooch
+from matplotlib import pyplot as plt
+from matplotlib.collections import PatchCollection
+
+from . import io, markings
+from .transforms import TILE_OVERLAP, TILE_X_STEP, TILE_Y_STEP
+
+# %% ../notebooks/09_mosaic.ipynb 4
+OVERLAP_MODES = ["split", "first", "last"]
+# placed tiles between flushing the mosaic and saving the build state
+CHECKPOINT_TILES = 32
+
+
+def mosaic_shape(n_x_tiles, n_y_tiles):
+    "Shape (rows, columns) of the image covered by a grid of tiles."
+    return (
+        (n_y_tiles - 1) * TILE_Y_STEP + markings.IMG_Y_SIZE,
+        (n_x_tiles - 1) * TILE_X_STEP + markings.IMG_X_SIZE,
+    )
+
+
+def tile_region(x_tile, y_tile, n_x_tiles, n_y_tiles, overlap="split"):
+    """Region (top, bottom, left, right) in image pixels that a tile writes.
+
+    For "split" the overlaps with existing neighbours are shared half and half.
+    """
+    top = (y_tile - 1) * TILE_Y_STEP
+    left = (x_tile - 1) * TILE_X_STEP
+    bottom, right = top + markings.IMG_Y_SIZE, left + markings.IMG_X_SIZE
+    if overlap == "split":
+        half = TILE_OVERLAP // 2
+        top += half if y_tile > 1 else 0
+        bottom -= half if y_tile < n_y_tiles else 0
+        left += half if x_tile > 1 else 0
+        right -= half if x_tile < n_x_tiles else 0
+    return top, bottom, left, right
+
+
+def _extent(x_tile, y_tile, shape):
+    "Region (top, bottom, left, right) in image pixels covered by a tile image of `shape`."
+    top, left = (y_tile - 1) * TILE_Y_STEP, (x_tile - 1) * TILE_X_STEP
+    return top, top + shape[0], left, left + shape[1]
+
+
+def _as_rgb8(im):
+    "Tile image as uint8 RGB, whatever `imread` returned."
+    if im.ndim == 2:
+        im = np.stack([im] * 3, axis=-1)
+    im = im[..., :3]
+    if im.dtype != np.uint8:
+        im = (np.clip(im, 0, 1) * 255).round().astype(np.uint8)
+    return im
+
+# %% ../notebooks/09_mosaic.ipynb 5
+class ObsidMosaic:
+    """Disk-backed mosaic of all tiles of one HiRISE obsid.
+
+    Use `ObsidMosaic.build` to create or complete one, `ObsidMosaic.open` to reopen it.
+    The array is available as read-only memory map in `data`, indexed in HiRISE image pixels.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.state = json.loads(self._state_path(self.path).read_text())
+        self.obsid = self.state["obsid"]
+        self.overlap = self.state["overlap"]
+        self.data = np.load(self.path, mmap_mode="r")
+
+    @staticmethod
+    def _state_path(path):
+        return Path(path).with_suffix(".json")
+
+    @staticmethod
+    def default_path(obsid):
+        return Path(pooch.os_cache("p4tools")) / "mosaics" / f"{obsid}.npy"
+
+    @classmethod
+    def open(cls, path):
+        return cls(path)
+
+    @classmethod
+    def build(
+        cls,
+        obsid: str,  # HiRISE obsid
+        path=None,  # .npy file to write, in the p4tools cache if None
+        overlap: str = "split",  # "split", "first" or "last"
+        workers: int = 8,  # concurrent downloads
+        catalogs=None,  # `io.Catalogs` or dict with "tile_coords" and "tile_urls"
+    ):
+        "Create the mosaic of `obsid`, or complete an interrupted build, and return it."
+        if overlap not in OVERLAP_MODES:
+            raise ValueError(f"Unknown overlap mode: {overlap}")
+        catalogs = io.Catalogs() if catalogs is None else catalogs
+        path = Path(path) if path is not None else cls.default_path(obsid)
+        coords = catalogs["tile_coords"]
+        tiles = coords[coords.obsid == obsid].sort_values(["y_tile", "x_tile"])
+        if len(tiles) == 0:
+            raise ValueError(f"No tiles found for {obsid}")
+        if overlap == "first":
+            # the last written tile wins
+            tiles = tiles.iloc[::-1]
+        n_x, n_y = int(tiles.x_tile.max()), int(tiles.y_tile.max())
+        state_path = cls._state_path(path)
+        if state_path.exists() and path.exists():
+            state = json.loads(state_path.read_text())
+            if state["obsid"] != obsid or state["overlap"] != overlap:
+                raise ValueError(f"{path} holds a different mosaic, remove it or use another path.")
+            data = np.load(path, mmap_mode="r+")
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            state = {"obsid": obsid, "overlap": overlap, "n_x_tiles": n_x, "n_y_tiles": n_y}
+            state.update({"placed": [], "missing": [], "shapes": {}})
+            data = np.lib.format.open_memmap(
+                path, mode="w+", dtype=np.uint8, shape=mosaic_shape(n_x, n_y) + (3,)
+            )
+        placed = set(state["placed"])
+        todo = tiles[~tiles.tile_id.isin(placed)]
+        # position in the writing order, a later tile wins the overlap in "first" and "last" mode
+        rank = {tile_id: i for i, tile_id in enumerate(tiles.tile_id)}
+        grid = {(t.x_tile, t.y_tile): t.tile_id for t in tiles.itertuples()}
+        shapes = state.setdefault("shapes", {})
+        urls = catalogs["tile_urls"].set_index("tile_id").tile_url
+
+        def fetch(tile_id):
+            try:
+                return io.fetch_subframe(urls.at[tile_id], progressbar=False)
+            except Exception as e:
+                return e
+
+        missing = []
+        try:
+            with ThreadPoolExecutor(workers) as pool:
+                # map yields in submission order, so tiles are written in a fixed order
+                for tile, fpath in zip(todo.itertuples(), pool.map(fetch, todo.tile_id)):
+                    if isinstance(fpath, Exception):
+                        missing.append(tile.tile_id)
+                        continue
+                    im = _as_rgb8(io._imread(fpath))
+                    covered = []
+                    if overlap != "split":
+                        # only on resume: placed neighbours that come later in the writing order
+                        for dx, dy in product((-1, 0, 1), repeat=2):
+                            neighbour = grid.get((tile.x_tile + dx, tile.y_tile + dy))
+                            if neighbour in placed and rank[neighbour] > rank[tile.tile_id]:
+                                shape = shapes.get(
+                                    neighbour, (markings.IMG_Y_SIZE, markings.IMG_X_SIZE)
+                                )
+                                covered.append(_extent(tile.x_tile + dx, tile.y_tile + dy, shape))
+                    cls._place(data, im, tile.x_tile, tile.y_tile, n_x, n_y, overlap, covered)
+                    shapes[tile.tile_id] = im.shape[:2]
+                    state["placed"].append(tile.tile_id)
+                    if len(state["placed"]) % CHECKPOINT_TILES == 0:
+                        cls._checkpoint(data, state, state_path)
+            state["missing"] = missing
+        finally:
+            # also when interrupted, so that a resumed build skips the tiles placed so far
+            cls._checkpoint(data, state, state_path)
+        del data
+        return cls(path)
+
+    @staticmethod
+    def _checkpoint(data, state, state_path):
+        "Flush the mosaic, then save the state, so that it only lists tiles that are on disk."
+        data.flush()
+        state_path.write_text(json.dumps(state))
+
+    @staticmethod
+    def _place(data, im, x_tile, y_tile, n_x, n_y, overlap, covered=()):
+        "Write a tile, leaving out its overlaps with the regions in `covered`."
+        top, bottom, left, right = tile_region(x_tile, y_tile, n_x, n_y, overlap)
+        oy, ox = (y_tile - 1) * TILE_Y_STEP, (x_tile - 1) * TILE_X_STEP
+        # edge tiles can be smaller than the standard size
+        bottom = min(bottom, oy + im.shape[0])
+        right = min(right, ox + im.shape[1])
+        window = im[top - oy : bottom - oy, left - ox : right - ox]
+        keep = np.ones(window.shape[:2], dtype=bool)
+        for t, b, l, r in covered:
+            t, b, l, r = max(t, top), min(b, bottom), max(l, left), min(r, right)
+            if b > t and r > l:
+                keep[t - top : b - top, l - left : r - left] = False
+        if keep.all():
+            data[top:bottom, left:right] = window
+        else:
+            data[top:bottom, left:right][keep] = window[keep]
+
+    @property
+    def missing(self):
+        "Tile IDs that could not be downloaded during the last build."
+        return self.state["missing"]
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def read(self, x0=0, y0=0, x1=None, y1=None, step=1) -> np.ndarray:
+        "Copy of the window [y0:y1, x0:x1] in image pixels, optionally subsampled by `step`."
+        return np.array(self.data[y0:y1:step, x0:x1:step])
+
+    def markings_in_window(self, df, x0=0, y0=0, x1=None, y1=None):
+        "The markings of this obsid in `df` whose `image_x/image_y` lie inside the window."
+        x1 = self.shape[1] if x1 is None else x1
+        y1 = self.shape[0] if y1 is None else y1
+        inside = df.image_x.between(x0, x1) & df.image_y.between(y0, y1)
+        return df[(df.obsid == self.obsid) & inside]
+
+    def plot(
+        self,
+        x0=0,
+        y0=0,
+        x1=None,
+        y1=None,
+        step=1,  # subsampling of the displayed image, markings stay exact
+        fans=None,  # fan catalog (part) to overlay
+        blotches=None,  # blotch catalog (part) to overlay
+        ax=None,
+    ):
+        "Show a window of the mosaic with fans and blotches in `image_x/image_y` coordinates."
+        x1 = self.shape[1] if x1 is None else x1
+        y1 = self.shape[0] if y1 is None else y1
+        if ax is None:
+            _, ax = plt.subplots(figsize=markings.calc_fig_size(8))
+        ax.imshow(self.read(x0, y0, x1, y1, step), extent=(x0, x1, y1, y0), origin="upper")
+        if fans is not None:
+            for _, fan in self.markings_in_window(fans, x0, y0, x1, y1).iterrows():
+                f = markings.Fan(fan, scope="hirise")
+                f.set_color("white")
+                ax.add_line(f)
+        if blotches is not None:
+            selected = self.markings_in_window(blotches, x0, y0, x1, y1)
+            patches = [markings.Blotch(b, scope="hirise") for _, b in selected.iterrows()]
+            ax.add_collection(
+                PatchCollection(patches, edgecolor="magenta", facecolor="none", alpha=0.65)
+            )
+        ax.set_xlim(x0, x1)
+        ax.set_ylim(y1, y0)
+        ax.set_axis_off()
+        return ax
+
+    def __repr__(self):
+        n = len(self.state["placed"])
+        return f"<ObsidMosaic {self.obsid} {self.shape[1]}x{self.shape[0]} px, {n} tiles>"
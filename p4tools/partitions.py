@@ -0,0 +1,215 @@
+"""Partitioned catalog datasets for out-of-core and multi-node processing"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/06_partitions.ipynb.
+
+# %% auto 0
+__all__ = ['MANIFEST', 'FORMATS', 'PARTITION_COLUMNS', 'add_region_names', 'enrich_catalog', 'export_partitioned', 'filter_rows',
+           'PartitionedDataset']
+
+# %% ../notebooks/06_partitions.ipynb 3
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import io
+
+# %% ../notebooks/06_partitions.ipynb 4
+MANIFEST = "manifest.json"
+FORMATS = {"parquet": ".parquet", "csv": ".csv"}
+PARTITION_COLUMNS = {"obsid": "obsid", "region": "roi_name"}
+
+# %% ../notebooks/06_partitions.ipynb 5
+def add_region_names(df, region_names) -> pd.DataFrame:
+    "Add the `roi_name` column, 'unknown' for obsids without a region."
+    regions = region_names[["obsid", "roi_name"]].drop_duplicates("obsid")
+    df = df.merge(regions, on="obsid", how="left")
+    df["roi_name"] = df.roi_name.fillna("unknown")
+    return df
+
+
+def enrich_catalog(df, catalogs) -> pd.DataFrame:
+    "Add region names and the obsid metadata columns that are not yet in `df`."
+    df = add_region_names(df, catalogs["region_names"])
+    meta = catalogs["metadata"].rename(columns={"OBSERVATION_ID": "obsid"})
+    meta = meta[["obsid"] + [col for col in meta.columns if col not in df.columns]]
+    return df.merge(meta.drop_duplicates("obsid"), on="obsid", how="left")
+
+# %% ../notebooks/06_partitions.ipynb 6
+def _write(df, fpath, fmt):
+    if fmt == "parquet":
+        df.to_parquet(fpath, index=False)
+    else:
+        df.to_csv(fpath, index=False)
+
+
+def _read(fpath, fmt, columns=None):
+    if fmt == "parquet":
+        return pd.read_parquet(fpath, columns=columns)
+    return pd.read_csv(fpath, usecols=columns)
+
+
+def _describe(key, path, part):
+    "Manifest entry of one partition."
+    entry = {
+        "key": key,
+        "path": path.as_posix(),
+        "rows": len(part),
+        "n_tiles": int(part.tile_id.nunique()),
+        "tile_min": part.tile_id.min(),
+        "tile_max": part.tile_id.max(),
+        "obsids": sorted(part.obsid.unique()),
+    }
+    if "roi_name" in part:
+        entry["regions"] = sorted(part.roi_name.unique())
+    if "l_s" in part:
+        entry["l_s_min"] = float(part.l_s.min())
+        entry["l_s_max"] = float(part.l_s.max())
+    return entry
+
+# %% ../notebooks/06_partitions.ipynb 7
+def export_partitioned(
+    root,  # directory of the dataset, created if needed
+    kinds=("fans", "blotches"),  # which catalogs to export
+    by: str = "obsid",  # partition by "obsid" or "region"
+    enrich: bool = True,  # add region names and obsid metadata to the markings
+    fmt: str = "parquet",  # "parquet" (needs pyarrow) or "csv"
+    catalogs=None,  # `io.Catalogs` or dict with the catalogs, loaded via `io` if None
+) -> dict:
+    """Write the marking catalogs as partitioned dataset and return its manifest.
+
+    The manifest is written last, so an interrupted export is never picked up by
+    `PartitionedDataset`.
+    """
+    if by not in PARTITION_COLUMNS:
+        raise ValueError(f"Unknown partitioning: {by}")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    catalogs = io.Catalogs() if catalogs is None else catalogs
+    root = Path(root)
+    manifest = {"partition_by": by, "format": fmt, "enriched": enrich, "kinds": {}}
+    for kind in kinds:
+        df = catalogs[kind]
+        if enrich:
+            df = enrich_catalog(df, catalogs)
+        elif by == "region":
+            df = add_region_names(df, catalogs["region_names"])
+        entries = []
+        for key, part in df.groupby(PARTITION_COLUMNS[by], sort=True):
+            path = Path(kind) / f"{by}={key}" / f"part{FORMATS[fmt]}"
+            (root / path).parent.mkdir(parents=True, exist_ok=True)
+            _write(part, root / path, fmt)
+            entries.append(_describe(key, path, part))
+        manifest["kinds"][kind] = {
+            "rows": len(df),
+            "columns": list(df.columns),
+            "partitions": entries,
+        }
+    (root / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+# %% ../notebooks/06_partitions.ipynb 8
+def filter_rows(df, tile_ids=None, obsids=None, regions=None, l_s=None) -> pd.DataFrame:
+    "Apply the row selections shared by all readers; `tile_ids` must be normalized."
+    mask = np.ones(len(df), dtype=bool)
+    if tile_ids is not None:
+        mask &= df.tile_id.isin(tile_ids).values
+    if obsids is not None:
+        mask &= df.obsid.isin(obsids).values
+    if regions is not None:
+        mask &= df.roi_name.isin(regions).values
+    if l_s is not None:
+        mask &= df.l_s.between(*l_s).values
+    return df[mask]
+
+# %% ../notebooks/06_partitions.ipynb 9
+class PartitionedDataset:
+    """Reader for a dataset written by `export_partitioned`.
+
+    Parameters
+    ----------
+    root : str or Path
+        Directory containing the `manifest.json`.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.manifest = json.loads((self.root / MANIFEST).read_text())
+        self.partition_by = self.manifest["partition_by"]
+        self.fmt = self.manifest["format"]
+
+    @property
+    def kinds(self):
+        return list(self.manifest["kinds"])
+
+    def columns(self, kind):
+        return self.manifest["kinds"][kind]["columns"]
+
+    def partitions(self, kind) -> pd.DataFrame:
+        "Manifest entries of `kind` as table."
+        return pd.DataFrame(self.manifest["kinds"][kind]["partitions"])
+
+    def prune(self, kind, tile_ids=None, obsids=None, regions=None, l_s=None) -> list:
+        "Manifest entries of the partitions that can contain rows of the selection."
+        entries = self.manifest["kinds"][kind]["partitions"]
+        if regions is not None and "roi_name" not in self.columns(kind):
+            raise ValueError("Dataset has no region names, export it with enrich=True.")
+        if tile_ids is not None:
+            tile_ids = np.sort(np.asarray(tile_ids, dtype=str))
+        selected = []
+        for entry in entries:
+            if obsids is not None and not set(entry["obsids"]).intersection(obsids):
+                continue
+            if regions is not None and not set(entry["regions"]).intersection(regions):
+                continue
+            if l_s is not None and "l_s_min" in entry:
+                if entry["l_s_max"] < l_s[0] or entry["l_s_min"] > l_s[1]:
+                    continue
+            if tile_ids is not None:
+                lo = np.searchsorted(tile_ids, entry["tile_min"], side="left")
+                hi = np.searchsorted(tile_ids, entry["tile_max"], side="right")
+                if lo == hi:
+                    continue
+            selected.append(entry)
+        return selected
+
+    def read(
+        self,
+        kind: str,  # "fans" or "blotches"
+        tile_ids=None,  # list of (partial) tile IDs
+        obsids=None,  # list of HiRISE obsids
+        regions=None,  # list of region names
+        l_s=None,  # (lo, hi) solar longitude range, inclusive
+        columns=None,  # columns to return, all if None
+    ) -> pd.DataFrame:
+        "Read the rows matching all given selections, opening only the needed partitions."
+        if tile_ids is not None:
+            tile_ids = [io.normalize_tile_id(t) for t in tile_ids]
+        selection = dict(tile_ids=tile_ids, obsids=obsids, regions=regions, l_s=l_s)
+        entries = self.prune(kind, **selection)
+        read_columns = columns
+        if columns is not None:
+            filter_columns = {
+                "tile_ids": "tile_id",
+                "obsids": "obsid",
+                "regions": "roi_name",
+                "l_s": "l_s",
+            }
+            needed = [col for key, col in filter_columns.items() if selection[key] is not None]
+            read_columns = list(columns) + [col for col in needed if col not in columns]
+        frames = [
+            filter_rows(_read(self.root / entry["path"], self.fmt, read_columns), **selection)
+            for entry in entries
+        ]
+        if not frames:
+            return pd.DataFrame(columns=columns or self.columns(kind))
+        df = pd.concat(frames, ignore_index=True)
+        return df if columns is None else df[list(columns)]
+
+    def __repr__(self):
+        kinds = ", ".join(
+            f"{kind}: {len(v['partitions'])} partitions"
+            for kind, v in self.manifest["kinds"].items()
+        )
+        return f"<PartitionedDataset {self.root} by {self.partition_by} ({kinds})>"
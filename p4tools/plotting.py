@@ -3,15 +3,26 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/02_plotting.ipynb.
 
 # %% auto 0
-__all__ = ['plot_blotches_for_tile', 'plot_fans_for_tile', 'plot_original_tile', 'plot_original_and_fans',
-           'plot_original_and_blotches', 'plot_original_fans_blotches', 'plot_x_random_tiles_with_n_fans']
+__all__ = ['FIGURES', 'RENDER_FORMATS', 'plot_blotches_for_tile', 'plot_fans_for_tile', 'plot_original_tile',
+           'plot_original_and_fans', 'plot_original_and_blotches', 'plot_original_fans_blotches',
+           'plot_x_random_tiles_with_n_fans', 'RenderCache', 'default_render_cache', 'render_tile']
 
 # %% ../notebooks/02_plotting.ipynb 2
+import hashlib
+import json
+import os
+import time
+from io import BytesIO
+from pathlib import Path
+
+import matplotlib
+import pooch
 from matplotlib import pyplot as plt
 
-from . import io, markings
+from . import __version__, instrument, io, markings, thumbnails
 
 # %% ../notebooks/02_plotting.ipynb 3
+@instrument.timed("plotting.plot_blotches_for_tile")
 def plot_blotches_for_tile(tile_id, ax=None, **plot_kwargs):
     tile_blotches = io.get_blotches_for_tile(tile_id)
     if len(tile_blotches) == 0:
@@ -23,6 +34,7 @@ def plot_blotches_for_tile(tile_id, ax=None, **plot_kwargs):
         m.plot(ax=ax, **plot_kwargs)
 
 # %% ../notebooks/02_plotting.ipynb 6
+@instrument.timed("plotting.plot_fans_for_tile")
 def plot_fans_for_tile(tile_id, ax=None, **plot_kwargs):
     tile_fans = io.get_fans_for_tile(tile_id)
     if len(tile_fans) == 0:
@@ -34,37 +46,50 @@ def plot_fans_for_tile(tile_id, ax=None, **plot_kwargs):
         m.plot(ax=ax, **plot_kwargs)
 
 # %% ../notebooks/02_plotting.ipynb 9
-def plot_original_tile(tileID, ax=None):
+@instrument.timed("plotting.plot_original_tile")
+def plot_original_tile(
+    tileID,
+    ax=None,
+    level: int = 1,  # 1 for full resolution, else a `thumbnails` level like 2, 4 or 8
+):
     if ax is None:
         _, ax = plt.subplots()
-    ax.imshow(io.get_subframe_by_tile_id(tileID), origin="upper", aspect="auto")
+    im, extent = thumbnails.subframe_image(tileID, level)
+    ax.imshow(im, origin="upper", aspect="auto", extent=extent)
     ax.set_axis_off()
 
 # %% ../notebooks/02_plotting.ipynb 11
-def plot_original_and_fans(tileID):
+@instrument.timed("plotting.plot_original_and_fans")
+def plot_original_and_fans(tileID, level=1):
     fig, axes = plt.subplots(ncols=2, figsize=(9, 3))
-    plot_original_tile(tileID, ax=axes[0])
-    plot_fans_for_tile(tileID, ax=axes[1])
+    plot_original_tile(tileID, ax=axes[0], level=level)
+    plot_fans_for_tile(tileID, ax=axes[1], level=level)
     fig.suptitle(f"Planet Four tile ID: {tileID}")
+    return fig
 
 # %% ../notebooks/02_plotting.ipynb 13
-def plot_original_and_blotches(tileID):
+@instrument.timed("plotting.plot_original_and_blotches")
+def plot_original_and_blotches(tileID, level=1):
     fig, axes = plt.subplots(ncols=2, figsize=(9, 3))
-    plot_original_tile(tileID, ax=axes[0])
-    plot_blotches_for_tile(tileID, ax=axes[1], color="magenta")
+    plot_original_tile(tileID, ax=axes[0], level=level)
+    plot_blotches_for_tile(tileID, ax=axes[1], color="magenta", level=level)
     fig.suptitle(f"Planet Four tile ID: {tileID}")
+    return fig
 
 # %% ../notebooks/02_plotting.ipynb 15
-def plot_original_fans_blotches(tileID, save=False):
+@instrument.timed("plotting.plot_original_fans_blotches")
+def plot_original_fans_blotches(tileID, save=False, level=1):
     fig, axes = plt.subplots(ncols=2, figsize=(9, 3))
-    plot_original_tile(tileID, ax=axes[0])
-    plot_fans_for_tile(tileID, ax=axes[1])
-    plot_blotches_for_tile(tileID, ax=axes[1], color="magenta")
+    plot_original_tile(tileID, ax=axes[0], level=level)
+    plot_fans_for_tile(tileID, ax=axes[1], level=level)
+    plot_blotches_for_tile(tileID, ax=axes[1], color="magenta", level=level)
     fig.suptitle(f"Planet Four tile ID: {tileID}")
     if save:
         fig.savefig(f"{tileID}.png", dpi=150)
+    return fig
 
 # %% ../notebooks/02_plotting.ipynb 18
+@instrument.timed("plotting.plot_x_random_tiles_with_n_fans")
 def plot_x_random_tiles_with_n_fans(
     x: int = 3,  # how many of 2 col original+p4 data plots to receive
     n: int = 15,  # whats the minimum number of fans to contain
@@ -78,3 +103,190 @@ def plot_x_random_tiles_with_n_fans(
     tile_ids = n_fans[n_fans >= n].sample(x, random_state=random_state).index
     for tile_id in tile_ids:
         plot_original_fans_blotches(tile_id, save=save)
+
+# %% ../notebooks/02_plotting.ipynb 21
+FIGURES = {
+    "fans": (plot_original_and_fans, ["fans", "tile_urls"]),
+    "blotches": (plot_original_and_blotches, ["blotches", "tile_urls"]),
+    "fans_blotches": (plot_original_fans_blotches, ["fans", "blotches", "tile_urls"]),
+}
+RENDER_FORMATS = ["png", "svg"]
+
+
+class RenderCache:
+    """Directory of rendered figures named by the hash of their inputs, bounded in size.
+
+    Hits refresh the modification time, which orders the eviction.
+    """
+
+    def __init__(
+        self,
+        path=None,  # cache directory, in the p4tools cache if None
+        max_bytes: int = 500 * 2**20,  # total size of the renders kept
+    ):
+        self.path = Path(path) if path is not None else Path(pooch.os_cache("p4tools")) / "renders"
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._entries = {}
+        for fpath in self.path.glob("*/*"):
+            if fpath.suffix[1:] in RENDER_FORMATS:
+                stat = fpath.stat()
+                self._entries[fpath] = (stat.st_mtime, stat.st_size)
+
+    @staticmethod
+    def inputs(tile_id, kind, options) -> dict:
+        "All inputs of a rendered figure."
+        _, catalogs = FIGURES[kind]
+        return {
+            "tile_id": io.normalize_tile_id(tile_id),
+            "kind": kind,
+            "options": options,
+            "catalogs": {name: io.hashes[name] for name in catalogs},
+            "versions": [__version__, matplotlib.__version__],
+        }
+
+    @staticmethod
+    def _hash(inputs):
+        return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def key(cls, tile_id, kind, options) -> str:
+        "Hash of all inputs of a rendered figure."
+        return cls._hash(cls.inputs(tile_id, kind, options))
+
+    def _file(self, key, fmt):
+        return self.path / key[:2] / f"{key}.{fmt}"
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, fmt):
+        "The stored render, or None."
+        fpath = self._file(key, fmt)
+        try:
+            data = fpath.read_bytes()
+        except FileNotFoundError:
+            self._entries.pop(fpath, None)
+            return None
+        os.utime(fpath)
+        self._entries[fpath] = (time.time(), len(data))
+        return data
+
+    def put(self, key, fmt, data, inputs=None):
+        """Store a render, then evict the least recently used ones beyond `max_bytes`.
+
+        `inputs` are stored next to the render, for `migrate`.
+        """
+        fpath = self._file(key, fmt)
+        fpath.parent.mkdir(exist_ok=True)
+        if inputs is not None:
+            fpath.with_suffix(".json").write_text(json.dumps(inputs, sort_keys=True))
+        tmp = fpath.with_name(f"{fpath.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(fpath)
+        self._entries[fpath] = (time.time(), len(data))
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        "Remove the least recently used renders until at most `max_bytes` are left."
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        total = self.nbytes
+        for fpath, (_, size) in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if total <= max_bytes:
+                break
+            fpath.unlink(missing_ok=True)
+            fpath.with_suffix(".json").unlink(missing_ok=True)
+            del self._entries[fpath]
+            total -= size
+
+    def clear(self):
+        self.evict(0)
+
+    def migrate(
+        self,
+        changed: dict,  # catalog name -> tile IDs whose rows differ, see `versions.changed_tiles`
+        hashes=None,  # catalog hashes of the new release, `io.hashes` if None
+    ) -> int:
+        """Store renders of other catalog hashes again under `hashes`, unless their tile changed.
+
+        Renders depending on a catalog with another hash that is not in `changed` are left alone.
+        Returns the number of renders carried over.
+        """
+        hashes = io.hashes if hashes is None else hashes
+        n = 0
+        for fpath in list(self._entries):
+            try:
+                inputs = json.loads(fpath.with_suffix(".json").read_text())
+            except FileNotFoundError:
+                continue
+            catalogs = {name: hashes[name] for name in inputs["catalogs"]}
+            stale = [name for name in catalogs if catalogs[name] != inputs["catalogs"][name]]
+            if not stale or any(
+                name not in changed or inputs["tile_id"] in changed[name] for name in stale
+            ):
+                continue
+            inputs["catalogs"] = catalogs
+            key, fmt = self._hash(inputs), fpath.suffix[1:]
+            if self._file(key, fmt) in self._entries:
+                continue
+            try:
+                data = fpath.read_bytes()
+            except FileNotFoundError:  # evicted while carrying over others
+                continue
+            self.put(key, fmt, data, inputs)
+            n += 1
+        return n
+
+    def __repr__(self):
+        return f"<RenderCache {self.path}: {len(self)} renders, {self.nbytes} bytes>"
+
+
+_render_cache = None
+
+
+def default_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+# %% ../notebooks/02_plotting.ipynb 22
+def render_tile(
+    tile_id,
+    kind: str = "fans_blotches",  # "fans", "blotches" or "fans_blotches"
+    fmt: str = "png",  # "png" or "svg"
+    level: int = 1,  # image level, see `plot_original_tile`
+    dpi: int = 150,
+    cache=None,  # `RenderCache`, the default one if None, False to always render
+) -> bytes:
+    "The overlay figure of a tile as PNG or SVG bytes, rendered only if not cached."
+    if kind not in FIGURES:
+        raise ValueError(f"Unknown figure kind: {kind}")
+    if fmt not in RENDER_FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    cache = default_render_cache() if cache is None else cache
+    if cache is not False:
+        inputs = cache.inputs(tile_id, kind, {"fmt": fmt, "level": level, "dpi": dpi})
+        key = cache._hash(inputs)
+        data = cache.get(key, fmt)
+        if data is not None:
+            instrument.record("plotting.render_tile.cached", cache_hits=1)
+            return data
+    t0 = time.perf_counter()
+    plot, _ = FIGURES[kind]
+    fig = plot(tile_id, level=level)
+    buf = BytesIO()
+    # no creation date and fixed element ids in the SVG, so equal inputs give equal bytes
+    metadata = {"Date": None} if fmt == "svg" else None
+    with matplotlib.rc_context({"svg.hashsalt": "p4tools"}):
+        fig.savefig(buf, format=fmt, dpi=dpi, metadata=metadata)
+    plt.close(fig)
+    data = buf.getvalue()
+    instrument.record("plotting.render_tile.render", time.perf_counter() - t0, cache_misses=1)
+    if cache is not False:
+        cache.put(key, fmt, data, inputs)
+    return data
@@ -0,0 +1,283 @@
+"""Publish catalogs once into shared memory and attach them read-only in worker processes"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/11_shared.ipynb.
+
+# %% auto 0
+__all__ = ['ALIGNMENT', 'SharedTable', 'attach', 'tile_slice', 'imap_tiles', 'map_tiles']
+
+# %% ../notebooks/11_shared.ipynb 3
+import contextlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from . import io
+
+# %% ../notebooks/11_shared.ipynb 4
+ALIGNMENT = 64
+
+
+def _aligned(nbytes):
+    return -(-nbytes // ALIGNMENT) * ALIGNMENT
+
+
+def _is_numeric(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in "biufcmM"
+
+
+def _is_masked(dtype):
+    "Nullable integer, float and boolean dtypes, stored as values plus null mask."
+    return isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "biuf"
+
+
+def _is_string(col):
+    values = col.cat.categories if isinstance(col.dtype, pd.CategoricalDtype) else col
+    return pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty")
+
+
+def _layout(df):
+    "Column layout of `df` in the shared block, the arrays to copy and the total size."
+    layout, arrays, offset = [], [], 0
+    for name in df.columns:
+        col = df[name]
+        if _is_numeric(col.dtype):
+            values = col.to_numpy()
+            entry = {"name": name, "kind": "numeric", "dtype": values.dtype.str, "offset": offset}
+            offset = _aligned(offset + values.nbytes)
+            arrays.append((entry["offset"], values))
+        elif _is_masked(col.dtype):
+            values = col.to_numpy(dtype=col.dtype.numpy_dtype, na_value=0)
+            mask = col.isna().to_numpy()
+            entry = {
+                "name": name,
+                "kind": "masked",
+                "dtype": values.dtype.str,
+                "pandas_dtype": str(col.dtype),
+                "offset": offset,
+            }
+            offset = _aligned(offset + values.nbytes)
+            entry["mask_offset"] = offset
+            offset = _aligned(offset + mask.nbytes)
+            arrays += [(entry["offset"], values), (entry["mask_offset"], mask)]
+        elif _is_string(col):
+            cat = pd.Categorical(col)
+            codes = cat.codes
+            categories = np.array([str(c).encode() for c in cat.categories] or [b""])
+            entry = {
+                "name": name,
+                "kind": "string",
+                "dtype": codes.dtype.str,
+                "offset": offset,
+                "categories_dtype": categories.dtype.str,
+                "n_categories": len(cat.categories),
+            }
+            offset = _aligned(offset + codes.nbytes)
+            entry["categories_offset"] = offset
+            offset = _aligned(offset + categories.nbytes)
+            arrays += [(entry["offset"], codes), (entry["categories_offset"], categories)]
+        else:
+            raise TypeError(
+                f"Cannot publish column {name!r} of dtype {col.dtype}: "
+                "only numeric, nullable numeric and string columns are supported."
+            )
+        layout.append(entry)
+    return layout, arrays, offset
+
+# %% ../notebooks/11_shared.ipynb 5
+def _views(buf, spec, columns=None) -> pd.DataFrame:
+    "DataFrame of read-only views into `buf` laid out as described by `spec`."
+    rows = spec["rows"]
+    data = {}
+    for entry in spec["columns"]:
+        if columns is not None and entry["name"] not in columns:
+            continue
+        values = np.frombuffer(buf, dtype=entry["dtype"], count=rows, offset=entry["offset"])
+        values.flags.writeable = False
+        if entry["kind"] == "string":
+            categories = np.frombuffer(
+                buf,
+                dtype=entry["categories_dtype"],
+                count=entry["n_categories"],
+                offset=entry["categories_offset"],
+            )
+            categories = pd.Index(np.char.decode(categories, "utf-8").astype(object))
+            values = pd.Categorical.from_codes(values, categories=categories, validate=False)
+        elif entry["kind"] == "masked":
+            mask = np.frombuffer(buf, dtype=bool, count=rows, offset=entry["mask_offset"])
+            mask.flags.writeable = False
+            dtype = pd.api.types.pandas_dtype(entry["pandas_dtype"])
+            values = dtype.construct_array_type()(values, mask)
+        data[entry["name"]] = values
+    df = pd.DataFrame(data, copy=False)
+    return df if columns is None else df[list(columns)]
+
+
+class SharedTable:
+    """A DataFrame published into one shared memory block.
+
+    The publishing process owns the block: use it as context manager or call `close()`,
+    which also unlinks it. Pass `spec` to other processes and call `attach(spec)` there.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        sort_by=None,  # column(s) without missing values to sort the rows by, e.g. "tile_id"
+    ):
+        if sort_by is not None:
+            # missing values would break the binary search of `tile_slice`
+            keys = [sort_by] if isinstance(sort_by, str) else list(sort_by)
+            missing = [key for key in keys if df[key].isna().any()]
+            if missing:
+                raise ValueError(f"Cannot sort by columns with missing values: {missing}")
+            df = df.sort_values(sort_by, kind="stable")
+        layout, arrays, nbytes = _layout(df)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        for offset, values in arrays:
+            target = np.frombuffer(self.shm.buf, values.dtype, len(values), offset)
+            target[:] = values
+        self.spec = {
+            "name": self.shm.name,
+            "rows": len(df),
+            "sorted_by": sort_by,
+            "columns": layout,
+        }
+
+    @property
+    def name(self):
+        return self.spec["name"]
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def attach(self, columns=None) -> pd.DataFrame:
+        "Read-only DataFrame view in the publishing process."
+        return _views(self.shm.buf, self.spec, columns)
+
+    def close(self):
+        "Release and unlink the shared block; attached DataFrames must not be used afterwards."
+        try:
+            self.shm.close()
+        except BufferError:
+            # views are still alive, the mapping goes away with them
+            pass
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"<SharedTable {self.name}: {self.spec['rows']} rows, {self.nbytes} bytes>"
+
+# %% ../notebooks/11_shared.ipynb 6
+# blocks attached in this process, by name
+_attached = {}
+
+
+@contextlib.contextmanager
+def _untracked():
+    """Keep the resource tracker of an attaching process from unlinking the block at exit.
+
+    Only the publisher owns the block; Python 3.13 offers `track=False` for this.
+    """
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: (
+        None if rtype == "shared_memory" else register(name, rtype)
+    )
+    try:
+        yield
+    finally:
+        resource_tracker.register = register
+
+
+def _open(name):
+    if name not in _attached:
+        if sys.version_info >= (3, 13):
+            _attached[name] = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            with _untracked():
+                _attached[name] = shared_memory.SharedMemory(name=name)
+    return _attached[name]
+
+
+def attach(spec: dict, columns=None) -> pd.DataFrame:
+    "Zero-copy, read-only DataFrame of a table published by `SharedTable`, by its `spec`."
+    return _views(_open(spec["name"]).buf, spec, columns)
+
+# %% ../notebooks/11_shared.ipynb 7
+def tile_slice(df, tile_id) -> pd.DataFrame:
+    "Rows of `tile_id` in an attached table published with `sort_by='tile_id'`, as view."
+    col = df["tile_id"]
+    code = col.cat.categories.get_indexer([tile_id])[0]
+    if code < 0:
+        return df.iloc[:0]
+    lo, hi = np.searchsorted(col.array.codes, [code, code + 1])
+    return df.iloc[lo:hi]
+
+
+# tables attached by the pool initializer, by kind
+_worker_tables = {}
+
+
+def _init_worker(specs, columns):
+    for kind, spec in specs.items():
+        _worker_tables[kind] = attach(spec, columns[kind])
+
+
+def _run_tile(func, tile_id):
+    tables = {kind: tile_slice(df, tile_id) for kind, df in _worker_tables.items()}
+    return func(tile_id, **tables)
+
+
+def _with_tile_id(columns):
+    return None if columns is None else list(dict.fromkeys(["tile_id", *columns]))
+
+
+def imap_tiles(
+    func,  # picklable function called as func(tile_id, fans=..., blotches=...)
+    tile_ids,  # (partial) tile IDs to process
+    kinds=("fans", "blotches"),  # catalogs to publish, passed to `func` by these names
+    catalogs=None,  # `io.Catalogs` or dict with the catalogs, loaded via `io` if None
+    workers=None,  # number of processes, all CPUs if None
+    columns=None,  # catalog columns the workers need, all if None; a list, or a dict per kind
+    chunksize: int = 16,  # tiles sent to a worker at once
+    mp_context=None,  # multiprocessing context, e.g. `multiprocessing.get_context("spawn")`
+):
+    """Run a per-tile function over a process pool, with the catalogs shared instead of copied.
+
+    Yields the results of `func` in the order of `tile_ids`, as they become available.
+    """
+    catalogs = io.Catalogs() if catalogs is None else catalogs
+    tile_ids = [io.normalize_tile_id(tile_id) for tile_id in tile_ids]
+    if isinstance(columns, dict):
+        columns = {kind: _with_tile_id(columns.get(kind)) for kind in kinds}
+    else:
+        columns = {kind: _with_tile_id(columns) for kind in kinds}
+    tables = {}
+    try:
+        for kind in kinds:
+            tables[kind] = SharedTable(catalogs[kind], sort_by="tile_id")
+        specs = {kind: table.spec for kind, table in tables.items()}
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(specs, columns),
+        ) as pool:
+            yield from pool.map(partial(_run_tile, func), tile_ids, chunksize=chunksize)
+    finally:
+        for table in tables.values():
+            table.close()
+
+
+def map_tiles(func, tile_ids, **kwargs) -> list:
+    "Run `imap_tiles` and return the results as list, in the order of `tile_ids`."
+    return list(imap_tiles(func, tile_ids, **kwargs))
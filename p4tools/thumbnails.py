@@ -0,0 +1,246 @@
+"""Downsampled subframes in a packed on-disk store, for quick-look display and contact sheets"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/13_thumbnails.ipynb.
+
+# %% auto 0
+__all__ = ['LEVELS', 'pyramid', 'ThumbnailStore', 'default_store', 'get_thumbnail', 'subframe_image', 'contact_sheet']
+
+# %% ../notebooks/13_thumbnails.ipynb 3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pooch
+from matplotlib import pyplot as plt
+from PIL import Image
+
+from . import io, markings
+
+# %% ../notebooks/13_thumbnails.ipynb 4
+LEVELS = (2, 4, 8)
+
+
+def _check_levels(levels):
+    levels = tuple(sorted(int(level) for level in levels))
+    if not levels or any(level < 2 or level & (level - 1) for level in levels):
+        raise ValueError(f"Levels must be powers of 2 larger than 1, got {levels}")
+    return levels
+
+
+def _fit(im, shape):
+    "Crop or zero-pad `im` to `shape` (rows, columns)."
+    if im.shape[:2] == tuple(shape):
+        return im
+    out = np.zeros(tuple(shape) + im.shape[2:], im.dtype)
+    rows, cols = min(shape[0], im.shape[0]), min(shape[1], im.shape[1])
+    out[:rows, :cols] = im[:rows, :cols]
+    return out
+
+
+def _downsample(im, factor):
+    "Block mean over `factor` x `factor` pixels of a uint8 image."
+    if factor == 1:
+        return im
+    rows, cols = im.shape[0] // factor, im.shape[1] // factor
+    blocks = im[: rows * factor, : cols * factor].reshape(rows, factor, cols, factor, -1)
+    sums = blocks.sum(axis=(1, 3), dtype=np.uint32)
+    return ((sums + factor * factor // 2) // (factor * factor)).astype(np.uint8)
+
+
+def pyramid(fpath, levels=LEVELS, shape=None) -> dict:
+    """Downsampled levels of an image file, as dict level -> uint8 RGB array.
+
+    `shape` is the full size (rows, columns) the levels are fitted to, the image size if None.
+    """
+    levels = _check_levels(levels)
+    with Image.open(fpath) as im:
+        full = (im.height, im.width) if shape is None else tuple(shape)
+        # only JPEG honours the draft, and never decodes smaller than asked for
+        im.draft("RGB", (im.width // levels[0], im.height // levels[0]))
+        scale = max(1, full[1] // im.width)
+        data = np.asarray(im.convert("RGB"))
+    current = _fit(data, (full[0] // scale, full[1] // scale))
+    out = {}
+    for level in levels:
+        current = _downsample(current, level // scale)
+        scale = level
+        out[level] = _fit(current, (full[0] // level, full[1] // level))
+    return out
+
+# %% ../notebooks/13_thumbnails.ipynb 5
+class ThumbnailStore:
+    """Append-only store of tile thumbnails, one packed file per level.
+
+    Each level file holds fixed-size uint8 RGB records, tile after tile. `tiles.txt` lists the
+    tile_ids in record order and is appended only after the records are written.
+    """
+
+    def __init__(
+        self,
+        path=None,  # directory of the store, in the p4tools cache if None
+        levels=LEVELS,  # downsampling factors, powers of 2
+        shape=(markings.IMG_Y_SIZE, markings.IMG_X_SIZE),  # full subframe size (rows, columns)
+    ):
+        self.path = Path(path) if path is not None else self.default_path()
+        self.levels = _check_levels(levels)
+        self.shape = tuple(shape)
+        self.path.mkdir(parents=True, exist_ok=True)
+        layout = f"levels {' '.join(map(str, self.levels))} shape {self.shape[0]} {self.shape[1]}\n"
+        layout_path = self.path / "layout.txt"
+        if layout_path.exists() and layout_path.read_text() != layout:
+            raise ValueError(f"{self.path} holds a store with another layout, use another path.")
+        layout_path.write_text(layout)
+        self.tiles = {}
+        index = self.path / "tiles.txt"
+        if index.exists():
+            # a line without newline is from an interrupted write
+            for line in index.read_text().splitlines(keepends=True):
+                if line.endswith("\n"):
+                    self.tiles.setdefault(line.strip(), len(self.tiles))
+        self._maps = {}
+
+    @staticmethod
+    def default_path():
+        return Path(pooch.os_cache("p4tools")) / "thumbnails"
+
+    def level_shape(self, level):
+        "Shape of the thumbnails of `level`."
+        return (self.shape[0] // level, self.shape[1] // level, 3)
+
+    def _file(self, level):
+        return self.path / f"level{level}.bin"
+
+    def _check(self, level):
+        if level not in self.levels:
+            raise ValueError(f"Level {level} not in the store levels {self.levels}")
+
+    def __len__(self):
+        return len(self.tiles)
+
+    def __contains__(self, tile_id):
+        return io.normalize_tile_id(tile_id) in self.tiles
+
+    def add(self, tile_id, fpath):
+        "Add the thumbnails of the subframe file `fpath` under `tile_id`."
+        self._write(io.normalize_tile_id(tile_id), pyramid(fpath, self.levels, self.shape))
+
+    def _write(self, tile_id, levels):
+        if tile_id in self.tiles:
+            return
+        slot = len(self.tiles)
+        for level, im in levels.items():
+            path = self._file(level)
+            with open(path, "r+b" if path.exists() else "w+b") as f:
+                f.seek(slot * im.nbytes)
+                f.write(np.ascontiguousarray(im).tobytes())
+        with open(self.path / "tiles.txt", "a") as f:
+            f.write(tile_id + "\n")
+        self.tiles[tile_id] = slot
+
+    def build(
+        self,
+        tile_ids,  # (partial) tile IDs
+        workers: int = 8,  # concurrent downloads and decodes
+        catalogs=None,  # `io.Catalogs` or dict with "tile_urls"
+    ) -> list:
+        "Add the thumbnails of the `tile_ids` not in the store yet; returns those that failed."
+        tile_ids = [io.normalize_tile_id(tile_id) for tile_id in tile_ids]
+        todo = [tile_id for tile_id in dict.fromkeys(tile_ids) if tile_id not in self.tiles]
+        if not todo:
+            return []
+        catalogs = io.Catalogs() if catalogs is None else catalogs
+        urls = catalogs["tile_urls"].set_index("tile_id").tile_url
+
+        def load(tile_id):
+            try:
+                fpath = io.fetch_subframe(urls.at[tile_id], progressbar=False)
+                return pyramid(fpath, self.levels, self.shape)
+            except Exception as e:
+                return e
+
+        failed = []
+        with ThreadPoolExecutor(workers) as pool:
+            for tile_id, levels in zip(todo, pool.map(load, todo)):
+                if isinstance(levels, Exception):
+                    failed.append(tile_id)
+                else:
+                    self._write(tile_id, levels)
+        return failed
+
+    def get(self, tile_id, level: int = 8) -> np.ndarray:
+        "Read-only thumbnail of a stored tile; KeyError if it is not stored."
+        self._check(level)
+        slot = self.tiles[io.normalize_tile_id(tile_id)]
+        data = self._maps.get(level)
+        if data is None or slot >= len(data):
+            # the file grew since it was mapped
+            shape = self.level_shape(level)
+            n = self._file(level).stat().st_size // int(np.prod(shape))
+            data = np.memmap(self._file(level), np.uint8, "r", shape=(n,) + shape)
+            self._maps[level] = data
+        return data[slot]
+
+    def __repr__(self):
+        return f"<ThumbnailStore {self.path}: {len(self)} tiles, levels {self.levels}>"
+
+# %% ../notebooks/13_thumbnails.ipynb 6
+_default_store = None
+
+
+def default_store() -> ThumbnailStore:
+    "The store in the p4tools cache, with the default levels."
+    global _default_store
+    if _default_store is None:
+        _default_store = ThumbnailStore()
+    return _default_store
+
+
+def get_thumbnail(tile_id, level: int = 8, store=None, catalogs=None) -> np.ndarray:
+    "Thumbnail of a tile, added to the store first if needed."
+    store = default_store() if store is None else store
+    tile_id = io.normalize_tile_id(tile_id)
+    if tile_id not in store.tiles:
+        catalogs = io.Catalogs() if catalogs is None else catalogs
+        url = catalogs["tile_urls"].set_index("tile_id").tile_url.at[tile_id]
+        store.add(tile_id, io.fetch_subframe(url, progressbar=False))
+    return store.get(tile_id, level)
+
+
+def subframe_image(tile_id, level: int = 1, store=None):
+    """Image of a tile for `imshow` and its extent, None for the full resolution (`level=1`).
+
+    The extent places a thumbnail onto the pixel grid of the full subframe.
+    """
+    if level == 1:
+        return io.get_subframe_by_tile_id(tile_id), None
+    extent = (-0.5, markings.IMG_X_SIZE - 0.5, markings.IMG_Y_SIZE - 0.5, -0.5)
+    return get_thumbnail(tile_id, level, store), extent
+
+# %% ../notebooks/13_thumbnails.ipynb 7
+def contact_sheet(
+    tile_ids,  # (partial) tile IDs, in display order
+    level: int = 8,  # thumbnail level
+    ncols: int = 10,  # thumbnails per row
+    store=None,  # `ThumbnailStore`, the default one if None
+    catalogs=None,  # `io.Catalogs` or dict with "tile_urls", for tiles not in the store
+    labels: bool = True,  # write the tile_id into each thumbnail
+    ax=None,
+):
+    "Grid of thumbnails drawn as one image; tiles that could not be loaded stay black."
+    store = default_store() if store is None else store
+    tile_ids = [io.normalize_tile_id(tile_id) for tile_id in tile_ids]
+    store.build(tile_ids, catalogs=catalogs)
+    rows, cols, _ = store.level_shape(level)
+    nrows = -(-len(tile_ids) // ncols)
+    sheet = np.zeros((nrows * rows, ncols * cols, 3), np.uint8)
+    if ax is None:
+        _, ax = plt.subplots(figsize=(ncols * 1.5, nrows * 1.5 * rows / cols))
+    for i, tile_id in enumerate(tile_ids):
+        top, left = (i // ncols) * rows, (i % ncols) * cols
+        if tile_id in store.tiles:
+            sheet[top : top + rows, left : left + cols] = store.get(tile_id, level)
+        if labels:
+            ax.text(left + 2, top + 2, tile_id, color="yellow", fontsize=6, va="top")
+    ax.imshow(sheet, origin="upper")
+    ax.set_axis_off()
+    return ax
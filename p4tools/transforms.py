@@ -0,0 +1,236 @@
+"""Batched coordinate transforms between tile, HiRISE image and lat/lon frames"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/08_transforms.ipynb.
+
+# %% auto 0
+__all__ = ['TILE_OVERLAP', 'TILE_X_STEP', 'TILE_Y_STEP', 'BODY_FIXED', 'tile_to_image', 'image_to_tile', 'ObsidGeometry',
+           'Transformer']
+
+# %% ../notebooks/08_transforms.ipynb 3
+import numpy as np
+import pandas as pd
+
+from . import io
+from .markings import IMG_X_SIZE, IMG_Y_SIZE
+
+# %% ../notebooks/08_transforms.ipynb 4
+TILE_OVERLAP = 100
+TILE_X_STEP = IMG_X_SIZE - TILE_OVERLAP
+TILE_Y_STEP = IMG_Y_SIZE - TILE_OVERLAP
+BODY_FIXED = ["BodyFixedCoordinateX", "BodyFixedCoordinateY", "BodyFixedCoordinateZ"]
+
+# %% ../notebooks/08_transforms.ipynb 5
+def tile_to_image(x, y, x_tile, y_tile):
+    "Convert tile pixels to HiRISE image pixels, `x_tile` and `y_tile` counting from 1."
+    image_x = np.asarray(x) + (np.asarray(x_tile) - 1) * TILE_X_STEP
+    image_y = np.asarray(y) + (np.asarray(y_tile) - 1) * TILE_Y_STEP
+    return image_x, image_y
+
+
+def image_to_tile(image_x, image_y, x_tile, y_tile):
+    "Convert HiRISE image pixels to pixels of the given tiles."
+    x = np.asarray(image_x) - (np.asarray(x_tile) - 1) * TILE_X_STEP
+    y = np.asarray(image_y) - (np.asarray(y_tile) - 1) * TILE_Y_STEP
+    return x, y
+
+# %% ../notebooks/08_transforms.ipynb 6
+def _local_basis(r):
+    "Unit vectors east and north at body-fixed positions `r` (n, 3)."
+    east = np.column_stack([-r[:, 1], r[:, 0], np.zeros(len(r))])
+    east /= np.linalg.norm(east, axis=1, keepdims=True)
+    up = r / np.linalg.norm(r, axis=1, keepdims=True)
+    north = np.cross(up, east)
+    return east, north
+
+
+class ObsidGeometry:
+    """Affine model of one HiRISE observation, from image pixels to body-fixed km.
+
+    Parameters
+    ----------
+    obsid : str
+        HiRISE observation ID
+    matrix : array (3, 3)
+        Columns are the body-fixed vectors of one pixel step in x and y, and of the image origin.
+    rms_km : float
+        RMS residual of the fit in km
+    """
+
+    def __init__(self, obsid, matrix, rms_km=0.0):
+        self.obsid = obsid
+        self.matrix = np.asarray(matrix, dtype=float)
+        self.rms_km = rms_km
+        self._a = self.matrix[:, :2]
+        self._origin = self.matrix[:, 2]
+        self._normal = np.cross(self._a[:, 0], self._a[:, 1])
+        self._pinv = np.linalg.pinv(self._a)
+
+    @classmethod
+    def fit(cls, obsid, image_x, image_y, body_fixed):
+        "Least squares fit to points with known image pixels and body-fixed coordinates (km)."
+        design = np.column_stack([image_x, image_y, np.ones(len(image_x))])
+        if np.linalg.matrix_rank(design) < 3:
+            raise ValueError(f"Need at least 3 non-collinear points to fit {obsid}.")
+        body_fixed = np.asarray(body_fixed, dtype=float)
+        coef, *_ = np.linalg.lstsq(design, body_fixed, rcond=None)
+        residual = design @ coef - body_fixed
+        rms = float(np.sqrt((residual**2).sum(axis=1).mean()))
+        return cls(obsid, coef.T, rms)
+
+    def image_to_body_fixed(self, image_x, image_y):
+        "Body-fixed coordinates (n, 3) in km of image pixels, on the fitted plane."
+        pixels = np.column_stack([np.ravel(image_x), np.ravel(image_y)])
+        return pixels @ self._a.T + self._origin
+
+    def image_to_latlon(self, image_x, image_y):
+        "Planetocentric latitude and positive east longitude (0..360) in degrees."
+        r = self.image_to_body_fixed(image_x, image_y)
+        lat = np.degrees(np.arcsin(r[:, 2] / np.linalg.norm(r, axis=1)))
+        lon = np.degrees(np.arctan2(r[:, 1], r[:, 0])) % 360
+        return lat, lon
+
+    def latlon_to_image(self, lat, lon):
+        "Image pixels of planetocentric lat/lon, intersecting the radial ray with the fitted plane."
+        lat, lon = np.radians(np.ravel(lat)), np.radians(np.ravel(lon))
+        u = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+        t = (self._normal @ self._origin) / (u @ self._normal)
+        pixels = (t[:, None] * u - self._origin) @ self._pinv.T
+        return pixels[:, 0], pixels[:, 1]
+
+    def _directions(self, angle):
+        "Body-fixed vectors of one pixel step in the image direction `angle` (degrees)."
+        angle = np.radians(np.ravel(angle))
+        return np.column_stack([np.cos(angle), np.sin(angle)]) @ self._a.T
+
+    def angle_to_azimuth(self, angle, image_x, image_y):
+        "Convert image angles (as `markings.Fan` uses them) into azimuths clockwise from north."
+        east, north = _local_basis(self.image_to_body_fixed(image_x, image_y))
+        d = self._directions(angle)
+        return np.degrees(np.arctan2((d * east).sum(axis=1), (d * north).sum(axis=1))) % 360
+
+    def azimuth_to_angle(self, azimuth, image_x, image_y):
+        "Convert azimuths clockwise from north into image angles."
+        east, north = _local_basis(self.image_to_body_fixed(image_x, image_y))
+        azimuth = np.radians(np.ravel(azimuth))
+        d = (np.sin(azimuth)[:, None] * east + np.cos(azimuth)[:, None] * north) @ self._pinv.T
+        return np.degrees(np.arctan2(d[:, 1], d[:, 0])) % 360
+
+    def meters_per_pixel(self, angle=None):
+        "Pixel scale in m, along the image direction `angle` or the mean scale if None."
+        if angle is None:
+            return np.sqrt(np.linalg.norm(self._normal)) * 1000
+        return np.linalg.norm(self._directions(angle), axis=1) * 1000
+
+    def to_dict(self):
+        d = {
+            "obsid": self.obsid,
+            "meters_per_pixel": self.meters_per_pixel(),
+            "rms_km": self.rms_km,
+        }
+        for name, column in zip(["dx", "dy", "origin"], self.matrix.T):
+            d.update({f"{name}_{axis}": value for axis, value in zip("XYZ", column)})
+        return d
+
+    def __repr__(self):
+        return f"<ObsidGeometry {self.obsid}: {self.meters_per_pixel():.3f} m/pixel>"
+
+# %% ../notebooks/08_transforms.ipynb 7
+class Transformer:
+    """Batched transforms for arrays of points from many tiles and obsids.
+
+    Parameters
+    ----------
+    tile_coords : pd.DataFrame, optional
+        Table as returned by `io.get_tile_coords()`, loaded if not given.
+    """
+
+    def __init__(self, tile_coords=None):
+        self.tile_coords = io.get_tile_coords() if tile_coords is None else tile_coords
+        self._tiles = self.tile_coords.set_index("tile_id")
+        self._geometries = {}
+
+    def geometry(self, obsid) -> ObsidGeometry:
+        "Fitted geometry of `obsid`, cached after the first call."
+        try:
+            return self._geometries[obsid]
+        except KeyError:
+            tiles = self.tile_coords[self.tile_coords.obsid == obsid]
+            if len(tiles) == 0:
+                raise KeyError(f"No tile coordinates for obsid {obsid}")
+            geometry = ObsidGeometry.fit(obsid, tiles.x_hirise, tiles.y_hirise, tiles[BODY_FIXED])
+            return self._geometries.setdefault(obsid, geometry)
+
+    def parameters(self, obsids=None) -> pd.DataFrame:
+        "Geometry parameters of `obsids` (all obsids if None), fitting what is not cached yet."
+        obsids = self.tile_coords.obsid.unique() if obsids is None else obsids
+        return pd.DataFrame([self.geometry(obsid).to_dict() for obsid in obsids]).set_index("obsid")
+
+    def _tile_columns(self, tile_ids, *columns):
+        idx = self._tiles.index.get_indexer(np.ravel(tile_ids))
+        if (idx < 0).any():
+            missing = np.ravel(tile_ids)[idx < 0]
+            raise KeyError(f"Unknown tile IDs: {list(missing[:5])}")
+        return [self._tiles[col].to_numpy()[idx] for col in columns]
+
+    def _per_obsid(self, obsids, method, *arrays, n_out=1):
+        "Call `ObsidGeometry.<method>` for the points of every obsid and reassemble the results."
+        obsids = np.ravel(obsids)
+        arrays = [np.ravel(np.asarray(a, dtype=float)) for a in arrays]
+        unique, inverse = np.unique(obsids, return_inverse=True)
+        # one argsort instead of one comparison over all points per obsid
+        groups = np.split(np.argsort(inverse, kind="stable"), np.cumsum(np.bincount(inverse))[:-1])
+        results = None
+        for obsid, sel in zip(unique, groups):
+            out = getattr(self.geometry(obsid), method)(*[a[sel] for a in arrays])
+            out = out if isinstance(out, tuple) else (out,)
+            if results is None:
+                results = [np.empty(len(obsids)) for _ in out]
+            for result, values in zip(results, out):
+                result[sel] = values
+        if results is None:
+            results = [np.empty(0) for _ in range(n_out)]
+        return tuple(results) if len(results) > 1 else results[0]
+
+    def tile_to_image(self, x, y, tile_ids):
+        x_tile, y_tile = self._tile_columns(tile_ids, "x_tile", "y_tile")
+        return tile_to_image(np.ravel(x), np.ravel(y), x_tile, y_tile)
+
+    def image_to_tile(self, image_x, image_y, tile_ids):
+        x_tile, y_tile = self._tile_columns(tile_ids, "x_tile", "y_tile")
+        return image_to_tile(np.ravel(image_x), np.ravel(image_y), x_tile, y_tile)
+
+    def image_to_latlon(self, image_x, image_y, obsids):
+        return self._per_obsid(obsids, "image_to_latlon", image_x, image_y, n_out=2)
+
+    def latlon_to_image(self, lat, lon, obsids):
+        return self._per_obsid(obsids, "latlon_to_image", lat, lon, n_out=2)
+
+    def tile_to_latlon(self, x, y, tile_ids):
+        (obsids,) = self._tile_columns(tile_ids, "obsid")
+        return self.image_to_latlon(*self.tile_to_image(x, y, tile_ids), obsids)
+
+    def angle_to_azimuth(self, angle, image_x, image_y, obsids):
+        return self._per_obsid(obsids, "angle_to_azimuth", angle, image_x, image_y)
+
+    def azimuth_to_angle(self, azimuth, image_x, image_y, obsids):
+        return self._per_obsid(obsids, "azimuth_to_angle", azimuth, image_x, image_y)
+
+    def pixels_to_meters(self, length, angle, obsids):
+        "Convert pixel lengths along image directions `angle` to meters."
+        scale = self._per_obsid(obsids, "meters_per_pixel", angle)
+        return np.ravel(length) * scale
+
+    def transform_markings(self, df) -> pd.DataFrame:
+        """Add `lat`, `lon`, `azimuth` and metric sizes to a fan or blotch catalog.
+
+        Fans get `distance_m`, blotches `radius_1_m` and `radius_2_m`.
+        """
+        args = (df.image_x.to_numpy(), df.image_y.to_numpy(), df.obsid.to_numpy())
+        lat, lon = self.image_to_latlon(*args)
+        out = df.assign(lat=lat, lon=lon, azimuth=self.angle_to_azimuth(df.angle, *args))
+        if "distance" in df:
+            out["distance_m"] = self.pixels_to_meters(df.distance, df.angle, df.obsid)
+        if "radius_1" in df:
+            out["radius_1_m"] = self.pixels_to_meters(df.radius_1, df.angle, df.obsid)
+            out["radius_2_m"] = self.pixels_to_meters(df.radius_2, df.angle + 90, df.obsid)
+        return out
@@ -0,0 +1,240 @@
+"""Several catalog releases side by side, with per-tile diffs between them"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/16_versions.ipynb.
+
+# %% auto 0
+__all__ = ['RELEASES', 'KEYS', 'row_digests', 'digest_table', 'diff_digests', 'changed_tiles', 'ReleaseCatalogs', 'Registry',
+           'default_registry', 'refresh']
+
+# %% ../notebooks/16_versions.ipynb 3
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pooch
+from yarl import URL
+
+from . import features, io, plotting
+
+# %% ../notebooks/16_versions.ipynb 4
+RELEASES = {
+    "v1.1": {"base_url": str(io.base_url), "urls": dict(io.urls), "hashes": dict(io.hashes)},
+}
+# column identifying a row of the catalogs with a per-tile diff
+KEYS = {
+    "fans": "marking_id",
+    "blotches": "marking_id",
+    "tile_coords": "tile_id",
+    "tile_urls": "tile_id",
+}
+
+
+def row_digests(df, key=None) -> pd.Series:
+    "64 bit digest of every row over all columns but `key`, independent of the column order."
+    columns = sorted(col for col in df.columns if col != key)
+    return pd.util.hash_pandas_object(df[columns], index=False)
+
+
+def digest_table(df, key) -> pd.DataFrame:
+    "Tile ID, key and digest of every row of a catalog."
+    return pd.DataFrame(
+        {
+            "tile_id": df.tile_id.to_numpy(),
+            "key": df[key].to_numpy(),
+            "digest": row_digests(df, key).to_numpy(),
+        }
+    )
+
+
+def diff_digests(old, new) -> pd.DataFrame:
+    "Number of added, removed and changed rows per tile between two digest tables."
+    # equal rows of a tile are paired up one to one
+    on = ["tile_id", "digest", "n"]
+    old = old.assign(n=old.groupby(["tile_id", "digest"]).cumcount())
+    new = new.assign(n=new.groupby(["tile_id", "digest"]).cumcount())
+    old_only = old.merge(new[on], on=on, how="left", indicator=True).query("_merge == 'left_only'")
+    new_only = new.merge(old[on], on=on, how="left", indicator=True).query("_merge == 'left_only'")
+    pairs = ["tile_id", "key"]
+    changed = old_only[pairs].dropna().merge(new_only[pairs].dropna().drop_duplicates())
+    changed = changed.drop_duplicates().groupby("tile_id").size()
+    counts = pd.DataFrame(
+        {
+            "added": new_only.groupby("tile_id").size().sub(changed, fill_value=0),
+            "removed": old_only.groupby("tile_id").size().sub(changed, fill_value=0),
+            "changed": changed,
+        }
+    )
+    counts = counts.fillna(0).astype(int).rename_axis("tile_id").reset_index()
+    return counts.sort_values("tile_id", ignore_index=True)
+
+
+def changed_tiles(diff) -> dict:
+    "Catalog name -> set of tile IDs with any difference, from the result of `Registry.diff`."
+    return {kind: set(group.tile_id) for kind, group in diff.groupby("kind")}
+
+# %% ../notebooks/16_versions.ipynb 5
+class ReleaseCatalogs(io.Catalogs):
+    "`io.Catalogs` reading the files of one release of a `Registry`."
+
+    def __init__(self, registry, name):
+        super().__init__()
+        self.registry = registry
+        self.name = name
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            self._cache[key] = self.registry.load(self.name, key)
+        return self._cache[key]
+
+
+class Registry:
+    """Catalog releases by name, with their files side by side in the cache.
+
+    Parameters
+    ----------
+    path : str or Path, optional
+        Directory for the files of all releases, `versions` in the p4tools cache if None.
+    releases : dict, optional
+        Name -> dict with "base_url", "urls" and "hashes", `RELEASES` if None.
+    """
+
+    def __init__(self, path=None, releases=None):
+        self.path = Path(path) if path is not None else Path(pooch.os_cache("p4tools")) / "versions"
+        self.releases = {}
+        for name, release in (RELEASES if releases is None else releases).items():
+            self.register(name, **release)
+
+    def register(self, name, base_url, urls, hashes):
+        "Add or replace the release `name`; `urls` and `hashes` are keyed like `io.urls`."
+        if set(urls) != set(hashes):
+            raise ValueError(f"Release {name} needs a hash for every file and vice versa.")
+        self.releases[name] = {
+            "base_url": str(base_url),
+            "urls": dict(urls),
+            "hashes": dict(hashes),
+        }
+
+    @property
+    def names(self) -> list:
+        return list(self.releases)
+
+    def fetch(self, name, key) -> str:
+        "Path of the unzipped file `key` of release `name`, downloaded on first use."
+        release = self.releases[name]
+        known_hash = release["hashes"][key]
+        fpath = io._retrieve(
+            str(URL(release["base_url"]) / release["urls"][key]),
+            path=self.path / known_hash.split(":")[-1],
+            known_hash=known_hash,
+            processor=pooch.Unzip(),
+            progressbar=True,
+        )
+        return fpath[0]
+
+    def load(self, name, key) -> pd.DataFrame:
+        "The CSV catalog `key` of release `name`."
+        return pd.read_csv(self.fetch(name, key))
+
+    def catalogs(self, name) -> ReleaseCatalogs:
+        "Lazily loaded catalogs of release `name`, for everything that takes `io.Catalogs`."
+        return ReleaseCatalogs(self, name)
+
+    def digests(self, name, kind) -> pd.DataFrame:
+        "Row digests of catalog `kind` of release `name`, computed once per catalog file."
+        fname = f"{kind}-{self.releases[name]['hashes'][kind].split(':')[-1]}"
+        parquet = io._has_pyarrow()
+        fpath = self.path / "digests" / (fname + (".parquet" if parquet else ".csv"))
+        if fpath.exists():
+            if parquet:
+                return pd.read_parquet(fpath)
+            return pd.read_csv(fpath, dtype={"tile_id": str, "key": str, "digest": np.uint64})
+        df = digest_table(self.load(name, kind), KEYS[kind])
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        tmp = fpath.with_name(fpath.name + ".tmp")
+        if parquet:
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_csv(tmp, index=False)
+        tmp.replace(fpath)
+        return df
+
+    def diff(self, old, new, kinds=None) -> pd.DataFrame:
+        """Per tile differences between releases `old` and `new`, only tiles with any.
+
+        Columns are `kind`, `tile_id` and the numbers of `added`, `removed` and `changed` rows.
+        `kinds` are catalog names of `KEYS`, all that both releases have if None.
+        """
+        old_hashes, new_hashes = self.releases[old]["hashes"], self.releases[new]["hashes"]
+        if kinds is None:
+            kinds = [kind for kind in KEYS if kind in old_hashes and kind in new_hashes]
+        frames = [
+            diff_digests(self.digests(old, kind), self.digests(new, kind)).assign(kind=kind)
+            for kind in kinds
+            if old_hashes[kind] != new_hashes[kind]
+        ]
+        columns = ["kind", "tile_id", "added", "removed", "changed"]
+        if not frames:
+            empty = {col: pd.Series(dtype=str) for col in columns[:2]}
+            return pd.DataFrame({**empty, **{col: pd.Series(dtype=int) for col in columns[2:]}})
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def activate(self, name):
+        "Make `io`, and everything reading catalogs through it, use release `name`."
+        release = self.releases[name]
+        io.base_url = URL(release["base_url"])
+        # updated in place, for modules holding on to the dicts
+        io.urls.clear()
+        io.urls.update(release["urls"])
+        io.hashes.clear()
+        io.hashes.update(release["hashes"])
+
+    def __repr__(self):
+        return f"<Registry {self.path}: {', '.join(self.names)}>"
+
+
+_registry = None
+
+
+def default_registry() -> Registry:
+    global _registry
+    if _registry is None:
+        _registry = Registry()
+    return _registry
+
+# %% ../notebooks/16_versions.ipynb 6
+def refresh(
+    old: str,  # name of the release the caches were built from
+    new: str,  # name of the release to switch to
+    registry=None,  # `Registry`, the default one if None
+    render_cache=None,  # `plotting.RenderCache`, the default one if None, False to skip
+    features_path=None,  # directory of `features.extract_features`, the default one if None
+    workers=None,  # processes for the features, all CPUs if None
+    mp_context=None,  # multiprocessing context for the features
+) -> pd.DataFrame:
+    """Switch `io` to release `new`, updating caches built from `old` for the changed tiles only.
+
+    Stored features of changed tiles are extracted again, renders of the others are carried over.
+    Returns the diff, see `Registry.diff`.
+    """
+    registry = default_registry() if registry is None else registry
+    diff = registry.diff(old, new)
+    changed = changed_tiles(diff)
+    registry.activate(new)
+    render_cache = plotting.default_render_cache() if render_cache is None else render_cache
+    if render_cache is not False:
+        render_cache.migrate(changed)
+    features_path = Path(features_path) if features_path is not None else features.default_path()
+    stored = features.stored_features(features_path)
+    redo = set().union(*[changed.get(kind, set()) for kind in ["fans", "blotches", "tile_urls"]])
+    redo = sorted(redo.intersection(stored.tile_id))
+    if redo:
+        features.drop_features(redo, features_path)
+        features.extract_features(
+            redo,
+            features_path,
+            bins=int(stored.columns.str.startswith("hist_").sum()),
+            workers=workers,
+            catalogs=registry.catalogs(new),
+            mp_context=mp_context,
+        )
+    return diff
@@ -0,0 +1,252 @@
+"""Gridded wind direction fields aggregated from the fan catalog"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../notebooks/10_winds.ipynb.
+
+# %% auto 0
+__all__ = ['FRAMES', 'GROUPINGS', 'SUMS', 'WindAggregator', 'WindField', 'wind_field']
+
+# %% ../notebooks/10_winds.ipynb 3
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from . import io, transforms
+
+# %% ../notebooks/10_winds.ipynb 4
+FRAMES = {
+    "tile": ("x", "y"),
+    "hirise": ("image_x", "image_y"),
+    "latlon": ("Longitude", "PlanetocentricLatitude"),
+}
+GROUPINGS = {"obsid": "obsid", "region": "roi_name", "tile": "tile_id", "l_s": "l_s_bin"}
+SUMS = ["count", "sum_u", "sum_v", "sum_wu", "sum_wv", "sum_w", "sum_spread"]
+
+# %% ../notebooks/10_winds.ipynb 5
+class WindAggregator:
+    """Single pass accumulation of fan directions on a regular grid.
+
+    Call `add` with the fan catalog or chunks of it, then `result` for the `WindField`.
+    In the image frames directions are fan angles, measured from the x axis towards y, which
+    points down the image. In the "latlon" frame they are azimuths clockwise from north.
+    """
+
+    def __init__(
+        self,
+        cell: float = 100.0,  # cell size, in pixels or degrees depending on `frame`
+        frame: str = "hirise",  # "tile", "hirise" or "latlon"
+        by="obsid",  # "obsid", "region", "tile", "l_s", a list of them, or None
+        l_s_bin: float = 10.0,  # width of the l_s bins for by="l_s"
+        weight: str = "distance",  # fan column weighting the vectors
+        origin=(0.0, 0.0),  # grid origin in frame coordinates
+        region_names=None,  # table with obsid and roi_name, loaded via `io` if needed
+        transformer=None,  # `transforms.Transformer` for azimuths, if not in the catalog
+    ):
+        if frame not in FRAMES:
+            raise ValueError(f"Unknown frame: {frame}")
+        by = [] if by is None else [by] if isinstance(by, str) else list(by)
+        unknown = [b for b in by if b not in GROUPINGS]
+        if unknown:
+            raise ValueError(f"Unknown grouping: {unknown}")
+        if frame == "tile" and "tile" not in by:
+            # tile pixel coordinates are only meaningful within one tile
+            by.append("tile")
+        self.cell = float(cell)
+        self.frame = frame
+        self.by = by
+        self.l_s_bin = l_s_bin
+        self.weight = weight
+        self.origin = tuple(float(o) for o in origin)
+        self.region_names = region_names
+        self.transformer = transformer
+        self.group_columns = [GROUPINGS[b] for b in by]
+        self._partials = []
+
+    def _groups(self, df):
+        groups = {}
+        for b, col in zip(self.by, self.group_columns):
+            if b == "region":
+                if "roi_name" not in df:
+                    if self.region_names is None:
+                        self.region_names = io.get_region_names()
+                    names = self.region_names[["obsid", "roi_name"]].drop_duplicates("obsid")
+                    regions = df[["obsid"]].merge(names, on="obsid", how="left").roi_name
+                    groups[col] = regions.fillna("unknown").to_numpy()
+                else:
+                    groups[col] = df.roi_name.to_numpy()
+            elif b == "l_s":
+                groups[col] = np.floor(df.l_s.to_numpy() / self.l_s_bin) * self.l_s_bin
+            else:
+                groups[col] = df[col].to_numpy()
+        return groups
+
+    def _unit_vectors(self, df):
+        "Frame components (u, v) of the unit vectors along the fans."
+        if self.frame != "latlon":
+            angle = np.radians(df.angle.to_numpy(dtype=float))
+            return np.cos(angle), np.sin(angle)
+        if "azimuth" in df:
+            azimuth = df.azimuth.to_numpy(dtype=float)
+        else:
+            if self.transformer is None:
+                self.transformer = transforms.Transformer()
+            azimuth = self.transformer.angle_to_azimuth(
+                df.angle.to_numpy(),
+                df.image_x.to_numpy(),
+                df.image_y.to_numpy(),
+                df.obsid.to_numpy(),
+            )
+        azimuth = np.radians(azimuth)
+        return np.sin(azimuth), np.cos(azimuth)
+
+    def add(self, df: pd.DataFrame):
+        "Accumulate a fan catalog or a chunk of it."
+        if len(df) == 0:
+            return self
+        x_col, y_col = FRAMES[self.frame]
+        u, v = self._unit_vectors(df)
+        w = df[self.weight].to_numpy(dtype=float)
+        part = pd.DataFrame(self._groups(df))
+        part["ix"] = np.floor((df[x_col].to_numpy() - self.origin[0]) / self.cell).astype(np.int64)
+        part["iy"] = np.floor((df[y_col].to_numpy() - self.origin[1]) / self.cell).astype(np.int64)
+        sums = pd.DataFrame(
+            {
+                "count": 1,
+                "sum_u": u,
+                "sum_v": v,
+                "sum_wu": w * u,
+                "sum_wv": w * v,
+                "sum_w": w,
+                "sum_spread": df.spread.to_numpy(dtype=float),
+            }
+        )
+        keys = self.group_columns + ["ix", "iy"]
+        partial = pd.concat([part, sums], axis=1).groupby(keys, sort=False).sum()
+        self._partials.append(partial)
+        if len(self._partials) >= 32:
+            self._partials = [self._combine()]
+        return self
+
+    def _combine(self):
+        keys = self.group_columns + ["ix", "iy"]
+        return pd.concat(self._partials).groupby(level=keys, sort=True).sum()
+
+    def result(self) -> "WindField":
+        "Per cell statistics of everything added so far."
+        if not self._partials:
+            index = pd.MultiIndex.from_tuples([], names=self.group_columns + ["ix", "iy"])
+            sums = pd.DataFrame({col: [] for col in SUMS}, index=index)
+        else:
+            sums = self._combine()
+        return WindField(sums.reset_index(), self)
+
+# %% ../notebooks/10_winds.ipynb 6
+class WindField:
+    """Result of a `WindAggregator`: one row per non-empty cell in `cells`.
+
+    Columns are the group columns, the cell indices `ix`, `iy`, the cell centre `x`, `y` and
+
+    * `count`: number of fans,
+    * `direction`: circular mean of the fan directions, degrees,
+    * `resultant_length`: length of the mean unit vector, 1 for parallel, ~0 for random fans,
+    * `u`, `v`: mean of the fan vectors scaled by the weight column (the length-weighted vector),
+    * `mean_weight`, `mean_spread`: mean of the weight column and of the fan spread.
+    """
+
+    def __init__(self, sums, aggregator):
+        self.frame = aggregator.frame
+        self.cell = aggregator.cell
+        self.origin = aggregator.origin
+        self.group_columns = aggregator.group_columns
+        n = sums["count"].to_numpy(dtype=float)
+        su, sv = sums.sum_u.to_numpy(), sums.sum_v.to_numpy()
+        if self.frame == "latlon":
+            direction = np.degrees(np.arctan2(su, sv)) % 360
+        else:
+            direction = np.degrees(np.arctan2(sv, su)) % 360
+        cells = sums[self.group_columns + ["ix", "iy"]].copy()
+        cells["x"] = self.origin[0] + (sums.ix.to_numpy() + 0.5) * self.cell
+        cells["y"] = self.origin[1] + (sums.iy.to_numpy() + 0.5) * self.cell
+        cells["count"] = sums["count"].to_numpy()
+        cells["direction"] = direction
+        cells["resultant_length"] = np.hypot(su, sv) / n
+        cells["u"] = sums.sum_wu.to_numpy() / n
+        cells["v"] = sums.sum_wv.to_numpy() / n
+        cells["mean_weight"] = sums.sum_w.to_numpy() / n
+        cells["mean_spread"] = sums.sum_spread.to_numpy() / n
+        self.cells = cells
+
+    @property
+    def groups(self) -> list:
+        "Keys of the groups, tuples in the order of `group_columns`."
+        if not self.group_columns:
+            return [()]
+        keys = self.cells[self.group_columns].drop_duplicates()
+        return list(keys.itertuples(index=False, name=None))
+
+    def _select(self, group):
+        if not self.group_columns:
+            return self.cells
+        if group is None:
+            if len(self.groups) > 1:
+                raise ValueError(f"Choose one of {len(self.groups)} groups.")
+            return self.cells
+        group = (group,) if not isinstance(group, tuple) else group
+        mask = np.ones(len(self.cells), dtype=bool)
+        for col, value in zip(self.group_columns, group):
+            mask &= (self.cells[col] == value).to_numpy()
+        return self.cells[mask]
+
+    def quiver_arrays(self, group=None, weighted: bool = True):
+        """X, Y, U, V as 2D grids over the cells of one group, ready for `plt.quiver`.
+
+        U, V are the length-weighted vectors, or the mean unit vectors if not `weighted`.
+        Empty cells are NaN.
+        """
+        cells = self._select(group)
+        if len(cells) == 0:
+            empty = np.empty((0, 0))
+            return empty, empty, empty, empty
+        ix0, iy0 = cells.ix.min(), cells.iy.min()
+        shape = (cells.iy.max() - iy0 + 1, cells.ix.max() - ix0 + 1)
+        xs = self.origin[0] + (np.arange(ix0, ix0 + shape[1]) + 0.5) * self.cell
+        ys = self.origin[1] + (np.arange(iy0, iy0 + shape[0]) + 0.5) * self.cell
+        X, Y = np.meshgrid(xs, ys)
+        U = np.full(shape, np.nan)
+        V = np.full(shape, np.nan)
+        rows, cols = cells.iy.to_numpy() - iy0, cells.ix.to_numpy() - ix0
+        if weighted:
+            U[rows, cols], V[rows, cols] = cells.u, cells.v
+        else:
+            angle = np.radians(cells.direction.to_numpy())
+            r = cells.resultant_length.to_numpy()
+            if self.frame == "latlon":
+                U[rows, cols], V[rows, cols] = r * np.sin(angle), r * np.cos(angle)
+            else:
+                U[rows, cols], V[rows, cols] = r * np.cos(angle), r * np.sin(angle)
+        return X, Y, U, V
+
+    def plot(self, group=None, weighted=True, ax=None, **kwargs):
+        "Quiver plot of one group; image frames are shown with y pointing down."
+        if ax is None:
+            _, ax = plt.subplots()
+        X, Y, U, V = self.quiver_arrays(group, weighted)
+        ax.quiver(X, Y, U, V, angles="xy", **kwargs)
+        if self.frame != "latlon" and not ax.yaxis_inverted():
+            ax.invert_yaxis()
+        ax.set_aspect("equal")
+        return ax
+
+    def __repr__(self):
+        return (
+            f"<WindField {self.frame}, cell {self.cell:g}, {len(self.cells)} cells"
+            f" in {len(self.groups)} groups>"
+        )
+
+# %% ../notebooks/10_winds.ipynb 7
+def wind_field(fans: pd.DataFrame, chunksize=None, **kwargs) -> WindField:
+    "Aggregate a fan catalog at once, or in chunks of `chunksize` rows; see `WindAggregator`."
+    aggregator = WindAggregator(**kwargs)
+    chunksize = chunksize or max(len(fans), 1)
+    for start in range(0, len(fans), chunksize):
+        aggregator.add(fans.iloc[start : start + chunksize])
+    return aggregator.result()
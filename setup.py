@@ -53,6 +53,8 @@ if cfg.get("pip_requirements"):
 min_python = cfg["min_python"]
 lic = licenses.get(cfg["license"].lower(), (cfg["license"], None))
 dev_requirements = (cfg.get("dev_requirements") or "").split()
+aio_requirements = (cfg.get("aio_requirements") or "").split()
+parquet_requirements = (cfg.get("parquet_requirements") or "").split()
 
 setuptools.setup(
     name=cfg["lib_name"],
@@ -71,7 +73,11 @@ setuptools.setup(
     packages=setuptools.find_packages(),
     include_package_data=True,
     install_requires=requirements,
-    extras_require={"dev": dev_requirements},
+    extras_require={
+        "dev": dev_requirements,
+        "aio": aio_requirements,
+        "parquet": parquet_requirements,
+    },
     dependency_links=cfg.get("dep_links", "").split(),
     python_requires=">=" + cfg["min_python"],
     long_description=open("README.md", encoding="utf-8").read(),
@@ -0,0 +1,176 @@
+"""Shared fixtures: small synthetic catalogs standing in for the Zenodo downloads."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p4tools import io
+
+OBSIDS = ["ESP_011296_0975", "ESP_012079_0945", "ESP_020115_0985"]
+REGIONS = {"ESP_011296_0975": "Giza", "ESP_012079_0945": "Ithaca", "ESP_020115_0985": "Giza"}
+L_S = {"ESP_011296_0975": 178.9, "ESP_012079_0945": 214.8, "ESP_020115_0985": 190.2}
+CENTERS = {
+    "ESP_011296_0975": (-82.2, 225.6),
+    "ESP_012079_0945": (-85.4, 103.9),
+    "ESP_020115_0985": (-81.8, 295.3),
+}
+X_TILES = 3
+Y_TILES = 4
+MARS_RADIUS = 3376.2  # km
+PIXEL_SCALE = 0.00025  # km
+
+
+def synthetic_body_fixed(obsid, image_x, image_y):
+    """Body-fixed km of image pixels for a synthetic, rotated image centered on CENTERS[obsid].
+
+    The image plane is tangent to the sphere at its center and projected radially onto it.
+    """
+    lat, lon = np.radians(CENTERS[obsid])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    east = np.array([-np.sin(lon), np.cos(lon), 0.0])
+    north = np.cross(up, east)
+    rot = np.radians(30 + 40 * OBSIDS.index(obsid))
+    ex = np.cos(rot) * east + np.sin(rot) * north
+    ey = np.sin(rot) * east - np.cos(rot) * north
+    cx, cy = X_TILES * 740 / 2, Y_TILES * 548 / 2
+    dx = (np.asarray(image_x, dtype=float) - cx)[:, None]
+    dy = (np.asarray(image_y, dtype=float) - cy)[:, None]
+    r = MARS_RADIUS * up + PIXEL_SCALE * (dx * ex + dy * ey)
+    return MARS_RADIUS * r / np.linalg.norm(r, axis=1, keepdims=True)
+
+
+def add_coordinates(df, x_col="image_x", y_col="image_y"):
+    "Add body-fixed and lat/lon columns as in the catalogs."
+    df = df.copy()
+    r = np.empty((len(df), 3))
+    for obsid, idx in df.groupby("obsid").indices.items():
+        r[idx] = synthetic_body_fixed(obsid, df[x_col].values[idx], df[y_col].values[idx])
+    for i, axis in enumerate("XYZ"):
+        df[f"BodyFixedCoordinate{axis}"] = r[:, i]
+    df["PlanetocentricLatitude"] = np.degrees(np.arcsin(r[:, 2] / MARS_RADIUS))
+    df["Longitude"] = np.degrees(np.arctan2(r[:, 1], r[:, 0])) % 360
+    return df
+
+
+def _tile_id(i):
+    return io.normalize_tile_id(np.base_repr(i, 36).lower())
+
+
+def make_tile_coords():
+    rows = []
+    i = 1
+    for obsid in OBSIDS:
+        for y_tile in range(1, Y_TILES + 1):
+            for x_tile in range(1, X_TILES + 1):
+                rows.append(
+                    dict(
+                        tile_id=_tile_id(i),
+                        obsid=obsid,
+                        x_tile=x_tile,
+                        y_tile=y_tile,
+                        x_hirise=(x_tile - 1) * 740 + 420,
+                        y_hirise=(y_tile - 1) * 548 + 324,
+                    )
+                )
+                i += 1
+    df = add_coordinates(pd.DataFrame(rows), "x_hirise", "y_hirise")
+    return df.rename(columns={"Longitude": "PositiveEast360Longitude"})
+
+
+def _markings(kind, n, seed):
+    rng = np.random.default_rng(seed)
+    coords = make_tile_coords()
+    tiles = coords.sample(n, replace=True, random_state=seed).reset_index(drop=True)
+    x = rng.uniform(0, 840, n).round(2)
+    y = rng.uniform(0, 648, n).round(2)
+    df = pd.DataFrame(
+        {
+            "marking_id": [f"{kind[0].upper()}{i:06d}" for i in range(n)],
+            "angle": rng.uniform(0, 360, n).round(2),
+            "tile_id": tiles.tile_id,
+            "image_x": (x + (tiles.x_tile - 1) * 740).round(2),
+            "image_y": (y + (tiles.y_tile - 1) * 548).round(2),
+            "n_votes": rng.integers(3, 40, n),
+            "obsid": tiles.obsid,
+            "x": x,
+            "y": y,
+        }
+    )
+    if kind == "fans":
+        df["spread"] = rng.uniform(5, 90, n).round(2)
+        df["distance"] = rng.uniform(10, 200, n).round(2)
+    else:
+        df["radius_1"] = rng.uniform(10, 60, n).round(2)
+        df["radius_2"] = rng.uniform(5, 30, n).round(2)
+    df["l_s"] = df.obsid.map(L_S)
+    return add_coordinates(df)
+
+
+@pytest.fixture
+def fan_catalog():
+    return _markings("fans", 200, 1)
+
+
+@pytest.fixture
+def blotch_catalog():
+    return _markings("blotches", 150, 2)
+
+
+@pytest.fixture
+def tile_coords():
+    return make_tile_coords()
+
+
+@pytest.fixture
+def region_names():
+    return pd.DataFrame({"obsid": list(REGIONS), "roi_name": list(REGIONS.values())})
+
+
+@pytest.fixture
+def meta_data():
+    return pd.DataFrame(
+        {
+            "OBSERVATION_ID": OBSIDS,
+            "IMAGE_CENTER_LATITUDE": [CENTERS[obsid][0] for obsid in OBSIDS],
+            "IMAGE_CENTER_LONGITUDE": [CENTERS[obsid][1] for obsid in OBSIDS],
+            "SOLAR_LONGITUDE": [L_S[obsid] for obsid in OBSIDS],
+            "START_TIME": ["2008-12-30", "2009-02-20", "2010-10-27"],
+            "map_scale": [0.25, 0.25, 0.5],
+            "north_azimuth": [111.8, 126.9, 98.2],
+            "# of tiles": [X_TILES * Y_TILES] * len(OBSIDS),
+        }
+    )
+
+
+@pytest.fixture
+def tile_urls(tile_coords):
+    return pd.DataFrame(
+        {
+            "tile_id": tile_coords.tile_id,
+            "tile_url": "http://127.0.0.1/subjects/" + tile_coords.tile_id + ".jpg",
+        }
+    )
+
+
+@pytest.fixture
+def fake_catalogs(
+    monkeypatch, fan_catalog, blotch_catalog, meta_data, tile_coords, region_names, tile_urls
+):
+    """Replace the io catalog loaders with the synthetic catalogs, counting the loads."""
+    loads = {}
+    tables = {
+        "get_fan_catalog": fan_catalog,
+        "get_blotch_catalog": blotch_catalog,
+        "get_meta_data": meta_data,
+        "get_tile_coords": tile_coords,
+        "get_region_names": region_names,
+        "get_tile_urls": tile_urls,
+    }
+    for name, df in tables.items():
+
+        def loader(name=name, df=df):
+            loads[name] = loads.get(name, 0) + 1
+            return df.copy()
+
+        monkeypatch.setattr(io, name, loader)
+    return loads
@@ -0,0 +1,243 @@
+"""Tests for the asyncio API, against a local HTTP server standing in for the tile host."""
+
+import asyncio
+import io as bytesio
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pooch
+import pytest
+from matplotlib import image as mplimg
+
+from p4tools import aio, io
+
+
+def png(value):
+    buf = bytesio.BytesIO()
+    mplimg.imsave(buf, np.full((8, 12, 3), value, np.uint8), format="png")
+    return buf.getvalue()
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    """Serves /tiles/<tile_id>.png, redirects from /redirect/, chunked from /chunked/, else 404."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits.append(self.path)
+            server.hosts.append(self.headers["Host"])
+            server.inflight += 1
+            server.max_inflight = max(server.max_inflight, server.inflight)
+        try:
+            time.sleep(server.delay)
+            prefix, _, name = self.path.strip("/").partition("/")
+            tile_id = name.split(".")[0]
+            if prefix == "redirect":
+                self.send_response(302)
+                self.send_header("Location", f"/tiles/{name}")
+                self.send_header("Content-Length", "0")
+                self.send_header("Connection", "close")
+                self.end_headers()
+            elif prefix in ("tiles", "chunked") and tile_id in server.values:
+                body = png(server.values[tile_id])
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Connection", "close")
+                if prefix == "chunked":
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for i in range(0, len(body), 100):
+                        chunk = body[i : i + 100]
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.write(b"0\r\n\r\n")
+                else:
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+            else:
+                self.send_error(404)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tile_coords):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), TileHandler)
+    httpd.lock = threading.Lock()
+    httpd.hits = []
+    httpd.hosts = []
+    httpd.inflight = httpd.max_inflight = 0
+    httpd.delay = 0.05
+    httpd.values = {tile_id: 10 + i for i, tile_id in enumerate(tile_coords.tile_id)}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True, params=["aiohttp", "stdlib"])
+def backend(request, monkeypatch):
+    "Run every test with aiohttp, if installed, and with the fallback client."
+    if request.param == "aiohttp":
+        pytest.importorskip("aiohttp")
+    monkeypatch.setattr(aio, "_has_aiohttp", lambda: request.param == "aiohttp")
+    return request.param
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path, fake_catalogs):
+    monkeypatch.setattr(pooch, "os_cache", lambda name: tmp_path / "cache" / name)
+    return fake_catalogs
+
+
+def client_for(server, prefix="tiles", **kwargs):
+    tile_ids = list(server.values)
+    urls = pd.DataFrame(
+        {"tile_id": tile_ids, "tile_url": [f"{server.base}/{prefix}/{t}.png" for t in tile_ids]}
+    )
+    return aio.AsyncClient(catalogs={"tile_urls": urls}, **kwargs)
+
+
+def test_same_tile_is_downloaded_once(server, cache):
+    tile_id = list(server.values)[0]
+
+    async def main():
+        client = client_for(server)
+        return await asyncio.gather(*[client.aget_subframe(tile_id) for _ in range(10)])
+
+    images = asyncio.run(main())
+    assert len(server.hits) == 1
+    for im in images:
+        np.testing.assert_allclose(im[..., :3], server.values[tile_id] / 255, atol=1e-6)
+
+
+def test_bounded_concurrency(server, cache):
+    async def main():
+        client = client_for(server, max_concurrency=2)
+        return await client.aprefetch(list(server.values)[:8])
+
+    paths, failures = asyncio.run(main())
+    assert not failures and len(paths) == 8
+    assert len(server.hits) == 8
+    assert server.max_inflight <= 2
+
+
+def test_host_header_has_port(server, cache):
+    tile_id = list(server.values)[0]
+    asyncio.run(client_for(server).aget_subframe(tile_id))
+    assert server.hosts == [f"127.0.0.1:{server.server_address[1]}"]
+
+
+@pytest.fixture
+def broken_server():
+    "Answers every request with an empty status line."
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            self.rfile.readline()
+            self.wfile.write(b"\r\n")
+
+    httpd = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/tile.png"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_malformed_response_is_oserror(broken_server):
+    with pytest.raises(OSError):
+        asyncio.run(aio.http_get(broken_server, timeout=5))
+
+
+@pytest.mark.parametrize("prefix", ["redirect", "chunked"])
+def test_redirects_and_chunked_bodies(server, cache, prefix):
+    tile_id = list(server.values)[3]
+
+    async def main():
+        return await client_for(server, prefix).aget_subframe(tile_id)
+
+    im = asyncio.run(main())
+    assert im.shape[:2] == (8, 12)
+    np.testing.assert_allclose(im[..., :3], server.values[tile_id] / 255, atol=1e-6)
+
+
+def test_prefetch_reports_failures(server, cache):
+    tile_ids = list(server.values)[:3]
+    client = client_for(server)
+    del server.values[tile_ids[1]]
+
+    async def main():
+        return await client.aprefetch(tile_ids)
+
+    paths, failures = asyncio.run(main())
+    assert set(paths) == {tile_ids[0], tile_ids[2]}
+    assert list(failures) == [tile_ids[1]]
+    assert "404" in str(failures[tile_ids[1]])
+    # nothing half-written is left in the cache
+    cached = list((pooch.os_cache("p4tools/tiles")).iterdir())
+    assert sorted(cached) == sorted(map(type(cached[0]), paths.values()))
+
+
+def test_cache_is_shared_with_io(server, cache):
+    tile_id = list(server.values)[5]
+    url = f"{server.base}/tiles/{tile_id}.png"
+
+    async def main():
+        return await client_for(server).afetch_subframe(url)
+
+    path = asyncio.run(main())
+    assert io.fetch_subframe(url, progressbar=False) == path
+    assert asyncio.run(main()) == path
+    assert len(server.hits) == 1
+
+
+def test_markings_for_tile(cache, fan_catalog):
+    tile_id = fan_catalog.tile_id.iloc[0]
+
+    async def main():
+        client = aio.AsyncClient(catalogs={})
+        results = await asyncio.gather(
+            *[client.aget_markings_for_tile(tile_id, columns=["angle"]) for _ in range(5)]
+        )
+        blotches = await aio.aget_markings_for_tile(tile_id[-4:], kind="blotches")
+        return results, blotches
+
+    results, blotches = asyncio.run(main())
+    expected = fan_catalog[fan_catalog.tile_id == tile_id]
+    assert all(r is results[0] for r in results)
+    assert sorted(results[0].angle) == sorted(expected.angle)
+    assert (blotches.tile_id == tile_id).all()
+    assert cache["get_fan_catalog"] == 1
+
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_markings_on_cold_cache(cache, monkeypatch, fan_catalog, blotch_catalog, parquet):
+    monkeypatch.setattr(io, "_has_pyarrow", lambda: parquet)
+    tile_ids = list(fan_catalog.tile_id.unique()[:4])
+
+    async def main():
+        client = aio.AsyncClient(catalogs={})
+        query = client.aget_markings_for_tile
+        return await asyncio.gather(
+            *[query(tile_id, kind="both", columns=["tile_id"]) for tile_id in tile_ids]
+        )
+
+    results = asyncio.run(main())
+    for tile_id, df in zip(tile_ids, results):
+        n = (fan_catalog.tile_id == tile_id).sum() + (blotch_catalog.tile_id == tile_id).sum()
+        assert len(df) == n
+    # every catalog was read once, not once per tile
+    assert cache["get_fan_catalog"] == 1 and cache["get_blotch_catalog"] == 1
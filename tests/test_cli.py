@@ -0,0 +1,118 @@
+"""Tests for the `p4tools` batch command line tool."""
+
+import io as stdio
+import json
+
+import pandas as pd
+import pytest
+from click.testing import CliRunner
+
+from p4tools import cli, io
+
+
+def invoke(*args, **kwargs):
+    result = CliRunner().invoke(cli.main, list(args), **kwargs)
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def test_read_ids(tmp_path):
+    fpath = tmp_path / "ids.txt"
+    fpath.write_text("APF0000001\n\n 0002 \n")
+    assert cli.read_ids(["a,b", "c", f"@{fpath}"]) == ["a", "b", "c", "APF0000001", "0002"]
+
+
+def test_export_tile_ids_loads_catalog_once(fake_catalogs, fan_catalog, tmp_path):
+    tile_ids = fan_catalog.tile_id.unique()[:5]
+    fpath = tmp_path / "ids.txt"
+    fpath.write_text("\n".join(t[3:] for t in tile_ids))
+    result = invoke("export", "fans", "-t", f"@{fpath}")
+    df = pd.read_csv(stdio.StringIO(result.stdout))
+    expected = fan_catalog[fan_catalog.tile_id.isin(tile_ids)]
+    assert len(df) == len(expected)
+    assert set(df.marking_id) == set(expected.marking_id)
+    assert fake_catalogs == {"get_fan_catalog": 1}
+
+
+def test_export_region_and_obsid_combined(fake_catalogs, blotch_catalog):
+    result = invoke("export", "blotches", "-r", "Giza", "--obsid", "ESP_020115_0985", "-f", "jsonl")
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert len(records) == (blotch_catalog.obsid == "ESP_020115_0985").sum()
+    assert {r["obsid"] for r in records} == {"ESP_020115_0985"}
+
+
+def test_export_in_chunks(fake_catalogs, fan_catalog, tmp_path):
+    out = tmp_path / "fans.csv"
+    invoke("export", "fans", "-r", "Giza,Ithaca", "--chunksize", "7", "--output", str(out))
+    df = pd.read_csv(out)
+    assert len(df) == len(fan_catalog)
+    assert list(df.columns) == list(fan_catalog.columns)
+
+
+def test_short_output_option(fake_catalogs, fan_catalog, tmp_path):
+    tile_id = fan_catalog.tile_id.iloc[0]
+    out = tmp_path / "fans.csv"
+    result = invoke("export", "fans", "-t", tile_id, "-o", str(out))
+    assert result.stdout == ""
+    assert len(pd.read_csv(out)) == (fan_catalog.tile_id == tile_id).sum()
+
+
+def test_urls(fake_catalogs, tile_coords):
+    result = invoke("urls", "--obsid", "ESP_012079_0945")
+    df = pd.read_csv(stdio.StringIO(result.stdout))
+    assert set(df.tile_id) == set(tile_coords.query("obsid == 'ESP_012079_0945'").tile_id)
+
+
+def test_urls_needs_selection(fake_catalogs):
+    result = CliRunner().invoke(cli.main, ["urls"])
+    assert result.exit_code != 0
+
+
+def test_prefetch(fake_catalogs, monkeypatch, tile_urls):
+    fetched = []
+
+    def fetch_subframe(url, progressbar=True):
+        fetched.append(url)
+        return "/cache/" + url.rsplit("/", 1)[-1]
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    tile_ids = list(tile_urls.tile_id[:4])
+    result = invoke("prefetch", "-t", ",".join(tile_ids))
+    assert len(fetched) == 4
+    assert len(result.stdout.splitlines()) == 4
+
+
+def test_counts(fake_catalogs, fan_catalog, blotch_catalog, tmp_path):
+    profile = tmp_path / "profile.json"
+    result = invoke("counts", "-t", "APF0000001,APF9999999", "--profile", str(profile))
+    df = pd.read_csv(stdio.StringIO(result.stdout)).set_index("tile_id")
+    assert df.at["APF0000001", "n_fans"] == (fan_catalog.tile_id == "APF0000001").sum()
+    assert df.at["APF0000001", "n_blotches"] == (blotch_catalog.tile_id == "APF0000001").sum()
+    assert df.loc["APF9999999"].tolist() == [0, 0]
+    assert "operations" in json.loads(profile.read_text())
+
+
+def test_export_parquet(fake_catalogs, fan_catalog, tmp_path):
+    pytest.importorskip("pyarrow")
+    out = tmp_path / "fans.parquet"
+    invoke(
+        "export", "fans", "--obsid", "ESP_011296_0975", "-f", "parquet",
+        "--chunksize", "10", "-o", str(out),
+    )
+    df = pd.read_parquet(out)
+    assert len(df) == (fan_catalog.obsid == "ESP_011296_0975").sum()
+
+
+def test_parquet_chunks_share_schema(tmp_path):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame(
+        {
+            "note": pd.Series([None] * 10 + ["split"] * 5, dtype=object),
+            "count": pd.array([pd.NA] * 10 + list(range(5)), dtype="Int64"),
+        }
+    )
+    out = tmp_path / "notes.parquet"
+    assert cli.write_chunked(df, str(out), "parquet", chunksize=10) == 15
+    written = pd.read_parquet(out)
+    assert written.note.isna().sum() == 10 and (written.note[10:] == "split").all()
+    pd.testing.assert_series_equal(written["count"], df["count"])
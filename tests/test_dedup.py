@@ -0,0 +1,111 @@
+"""Tests for the vectorized duplicate detection, against a brute-force reference."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p4tools import dedup, markings
+
+
+def brute_force_groups(df, tolerances, period, group_col="obsid"):
+    "Pairwise comparison plus naive transitive grouping."
+    n = len(df)
+    labels = list(range(n))
+
+    def find(i):
+        while labels[i] != i:
+            i = labels[i]
+        return i
+
+    rows = df.to_dict("records")
+    for i, j in itertools.combinations(range(n), 2):
+        a, b = rows[i], rows[j]
+        if a[group_col] != b[group_col]:
+            continue
+        ok = True
+        for col, tol in tolerances.items():
+            diff = abs(a[col] - b[col])
+            if col == "angle":
+                diff = abs((diff + period / 2) % period - period / 2)
+            ok &= diff <= tol
+        if ok:
+            ri, rj = find(i), find(j)
+            labels[max(ri, rj)] = min(ri, rj)
+    return [find(i) for i in range(n)]
+
+
+def with_near_duplicates(df, n, seed):
+    "Append `n` jittered copies of random rows, some of them moved to another tile."
+    rng = np.random.default_rng(seed)
+    copies = df.sample(n, random_state=seed).copy()
+    for col in ["image_x", "image_y"]:
+        copies[col] += rng.uniform(-0.4, 0.4, n)
+    copies["angle"] = (copies.angle + rng.uniform(-0.9, 0.9, n)) % 360
+    copies["tile_id"] = np.where(rng.random(n) < 0.5, "APF00000zz", copies.tile_id)
+    return pd.concat([df, copies], ignore_index=True)
+
+
+@pytest.mark.parametrize("kind", ["fans", "blotches"])
+def test_against_brute_force(kind, fan_catalog, blotch_catalog):
+    df = fan_catalog if kind == "fans" else blotch_catalog
+    df = with_near_duplicates(df, 40, 3)
+    tol = dedup.FAN_TOLERANCES if kind == "fans" else dedup.BLOTCH_TOLERANCES
+    expected = brute_force_groups(df, tol, dedup.ANGLE_PERIODS[kind])
+    assert dedup.duplicate_groups(df).tolist() == expected
+    assert len(dedup.deduplicate(df)) == len(set(expected))
+
+
+def test_large_tolerance_matches_brute_force(fan_catalog):
+    tol = {"image_x": 60, "image_y": 60, "angle": 90, "spread": 40, "distance": 80}
+    expected = brute_force_groups(fan_catalog, tol, 360)
+    assert dedup.duplicate_groups(fan_catalog, tol).tolist() == expected
+
+
+def test_within_tiles_only(fan_catalog):
+    df = with_near_duplicates(fan_catalog, 40, 5)
+    expected = brute_force_groups(df, dedup.FAN_TOLERANCES, 360, group_col="tile_id")
+    assert dedup.duplicate_groups(df, across_tiles=False).tolist() == expected
+
+
+def test_exact(blotch_catalog):
+    df = pd.concat([blotch_catalog, blotch_catalog.iloc[[3, 7]]], ignore_index=True)
+    df.loc[len(df) - 1, "image_x"] += 0.01
+    groups = dedup.duplicate_groups(df, tolerances=0)
+    assert groups.iloc[-2] == 3
+    assert groups.iloc[-1] == len(df) - 1
+    assert len(dedup.find_duplicates(df, tolerances=0)) == 2
+
+
+def test_blotch_angle_period():
+    blotches = pd.DataFrame(
+        {
+            "tile_id": ["APF0000001"] * 2,
+            "obsid": ["ESP_011296_0975"] * 2,
+            "image_x": [10.0, 10.0],
+            "image_y": [10.0, 10.0],
+            "angle": [179.5, 0.2],
+            "radius_1": [20.0, 20.0],
+            "radius_2": [10.0, 10.0],
+        }
+    )
+    assert dedup.duplicate_groups(blotches).tolist() == [0, 0]
+
+
+def test_keep_column(fan_catalog):
+    df = fan_catalog.iloc[:5].copy()
+    df = pd.concat([df, df.iloc[[2]].assign(n_votes=100)], ignore_index=True)
+    result = dedup.deduplicate(df, keep="n_votes")
+    assert len(result) == 5
+    assert 100 in result.n_votes.values
+    assert list(result.index) == [0, 1, 3, 4, 5]
+
+
+def test_blotch_is_equal(blotch_catalog):
+    a = markings.Blotch(blotch_catalog.iloc[0])
+    b = markings.Blotch(blotch_catalog.iloc[0].copy())
+    assert a.is_equal(b)
+    c = blotch_catalog.iloc[0].copy()
+    c["image_x"] += 1
+    assert not a.is_equal(markings.Blotch(c))
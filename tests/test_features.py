@@ -0,0 +1,119 @@
+"""Tests for the per-tile image features, computed in worker processes from synthetic tiles."""
+
+import math
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+from PIL import Image
+
+from p4tools import features, io, markings
+
+SHAPE = (markings.IMG_Y_SIZE, markings.IMG_X_SIZE)
+FORK = multiprocessing.get_context("fork")
+
+
+def tile_image(i):
+    rng = np.random.default_rng(i)
+    return rng.integers(0, 256, SHAPE + (3,), dtype=np.uint8)
+
+
+@pytest.fixture
+def tiles(monkeypatch, tmp_path, tile_coords):
+    """Serve every tile as PNG from a fake `io.fetch_subframe`, logging each fetch to a file.
+
+    The fake is inherited by forked workers, the log shows which tiles they fetched.
+    """
+    index = {tile_id: i for i, tile_id in enumerate(tile_coords.tile_id)}
+    log = tmp_path / "fetched.txt"
+
+    def fetch_subframe(url, progressbar=True):
+        tile_id = url.rsplit("/", 1)[-1].split(".")[0]
+        fpath = tmp_path / "tiles" / f"{tile_id}.png"
+        fpath.parent.mkdir(exist_ok=True)
+        Image.fromarray(tile_image(index[tile_id])).save(fpath)
+        with open(log, "a") as f:
+            f.write(tile_id + "\n")
+        return str(fpath)
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    return index, log
+
+
+@pytest.fixture
+def catalogs(fan_catalog, blotch_catalog, tile_urls):
+    return {"fans": fan_catalog, "blotches": blotch_catalog, "tile_urls": tile_urls}
+
+
+def test_footprint_mask():
+    blotch = markings.BlotchRecord(100, 200, 30, 20, 20)
+    mask = features.footprint_mask([blotch])
+    assert mask.sum() == pytest.approx(math.pi * 20**2, rel=0.02)
+    assert mask[200, 100] and not mask[200, 125]
+    # clipped at the tile edges
+    corner = markings.BlotchRecord(0, 0, 0, 10, 10)
+    assert features.footprint_mask([corner]).sum() == pytest.approx(math.pi * 100 / 4, rel=0.1)
+    fan = markings.FanRecord(400, 300, 0, 20, 100)
+    fan_mask = features.footprint_mask([fan])
+    assert fan_mask[300, 450] and not fan_mask[300, 390] and not fan_mask[250, 450]
+    assert features.footprint_mask([]).sum() == 0
+
+
+def test_tile_features(fan_catalog, blotch_catalog):
+    im = tile_image(1)
+    tile_id = fan_catalog.tile_id.iloc[0]
+    fans = fan_catalog[fan_catalog.tile_id == tile_id]
+    blotches = blotch_catalog[blotch_catalog.tile_id == tile_id]
+    f = features.tile_features(im, fans, blotches, bins=8)
+    np.testing.assert_allclose(f["mean_g"], im[..., 1].mean(), rtol=1e-5)
+    np.testing.assert_allclose(f["std_b"], im[..., 2].std(), rtol=1e-4)
+    hist = [f[f"hist_{i:02d}"] for i in range(8)]
+    expected = np.histogram(im.mean(axis=2), bins=8, range=(0, 256))[0] / im[..., 0].size
+    np.testing.assert_allclose(hist, expected)
+    assert (f["n_fans"], f["n_blotches"]) == (len(fans), len(blotches))
+    assert max(f["fan_fraction"], f["blotch_fraction"]) <= f["marked_fraction"]
+    assert f["marked_fraction"] <= f["fan_fraction"] + f["blotch_fraction"]
+    empty = features.tile_features(im)
+    assert empty["marked_fraction"] == 0 and empty["n_fans"] == 0
+
+
+def test_extract_resume_and_failures(tmp_path, tiles, catalogs, fan_catalog, blotch_catalog):
+    index, log = tiles
+    tile_ids = list(index)
+    store = tmp_path / "features"
+    catalogs["tile_urls"] = catalogs["tile_urls"][catalogs["tile_urls"].tile_id != tile_ids[3]]
+    kwargs = dict(path=store, catalogs=catalogs, workers=2, batch_size=4, mp_context=FORK)
+    df = features.extract_features(tile_ids[:10], **kwargs)
+    assert sorted(df.tile_id) == sorted(set(tile_ids[:10]) - {tile_ids[3]})
+    assert list(df.attrs["failed"]) == [tile_ids[3]]
+    assert len(list(store.glob("part-*"))) == 3
+    assert df.mean_r.dtype == np.float32 and df.n_fans.dtype == np.int32
+
+    row = df.set_index("tile_id").loc[tile_ids[5]]
+    fans = fan_catalog[fan_catalog.tile_id == tile_ids[5]]
+    blotches = blotch_catalog[blotch_catalog.tile_id == tile_ids[5]]
+    expected = features.tile_features(tile_image(5), fans, blotches)
+    for key, value in expected.items():
+        assert row[key] == pytest.approx(value, rel=1e-5, abs=1e-7)
+
+    log.unlink()
+    df = features.extract_features(tile_ids[8:14], **kwargs)
+    assert sorted(log.read_text().split()) == sorted(tile_ids[10:14])
+    assert sorted(df.tile_id) == sorted(tile_ids[8:14])
+    # joinable to the catalogs
+    joined = fan_catalog.merge(df, on="tile_id")
+    assert len(joined) == fan_catalog.tile_id.isin(tile_ids[8:14]).sum()
+    assert len(features.stored_features(store)) == 13
+    with pytest.raises(ValueError):
+        features.extract_features(tile_ids[:2], path=store, bins=8)
+
+
+def test_nothing_to_do_needs_no_catalogs(tmp_path):
+    store = tmp_path / "features"
+    store.mkdir()
+    pd.DataFrame({"tile_id": ["APF0000001"], "hist_00": [1.0]}).to_csv(
+        store / "part-00000.csv", index=False
+    )
+    df = features.extract_features(["1"], path=store, bins=1, catalogs={})
+    assert df.tile_id.tolist() == ["APF0000001"]
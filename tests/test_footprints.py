@@ -0,0 +1,135 @@
+"""Tests for the streaming GeoJSON lines and GeoPackage export of marking footprints."""
+
+import json
+import sqlite3
+import struct
+
+import conftest
+import numpy as np
+import pytest
+import shapely
+from conftest import OBSIDS
+
+from p4tools import footprints, io, markings, transforms
+
+
+def read_geojsonl(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_geojsonl_tile_frame(tmp_path, fan_catalog):
+    fans = fan_catalog.copy()
+    fans.loc[3, "n_votes"] = None
+    path = tmp_path / "fans.geojsonl"
+    assert footprints.to_geojsonl(fans, path, frame="tile", chunksize=7) == len(fans)
+    features = read_geojsonl(path)
+    assert len(features) == len(fans)
+    for i in [0, 3, len(fans) - 1]:
+        feature = features[i]
+        assert feature["type"] == "Feature"
+        assert feature["properties"]["marking_id"] == fans.marking_id.iloc[i]
+        polygon = shapely.from_geojson(json.dumps(feature["geometry"]))
+        expected = markings.FanRecord.from_data(fans.iloc[i]).to_shapely()
+        assert polygon.area == pytest.approx(expected.area, rel=1e-6)
+        assert feature["geometry"]["type"] == "Polygon"
+    assert features[3]["properties"]["n_votes"] is None
+
+
+def test_chunks_from_catalog_file(tmp_path, monkeypatch, blotch_catalog):
+    fpath = tmp_path / "blotches.csv"
+    blotch_catalog.to_csv(fpath, index=False)
+    monkeypatch.setattr(io, "fetch_zipped_file", lambda key: str(fpath))
+    chunks = list(footprints.iter_footprints("blotches", frame="hirise", chunksize=40))
+    assert [len(polygons) for _, _, polygons in chunks][:-1] == [40] * (len(chunks) - 1)
+    assert sum(len(attributes) for _, attributes, _ in chunks) == len(blotch_catalog)
+    kind, attributes, polygons = chunks[1]
+    assert kind == "blotches"
+    first = blotch_catalog.iloc[40]
+    assert attributes.marking_id.iloc[0] == first.marking_id
+    centroid = polygons[0].centroid
+    assert (centroid.x, centroid.y) == pytest.approx((first.image_x, first.image_y), abs=1e-6)
+    with pytest.raises(ValueError):
+        next(footprints.iter_footprints("craters"))
+    with pytest.raises(ValueError):
+        next(footprints.iter_footprints(blotch_catalog, frame="polar"))
+
+
+def test_latlon_polygons(fan_catalog, blotch_catalog, tile_coords):
+    transformer = transforms.Transformer(tile_coords)
+    chunks = footprints.iter_footprints(blotch_catalog, frame="latlon", transformer=transformer)
+    _, attributes, polygons = next(chunks)
+    centroids = shapely.centroid(polygons)
+    # lon/lat order, close to the catalog coordinates of the blotch centres
+    np.testing.assert_allclose(shapely.get_x(centroids), attributes.Longitude, atol=1e-4)
+    np.testing.assert_allclose(
+        shapely.get_y(centroids), attributes.PlanetocentricLatitude, atol=1e-4
+    )
+
+
+def parse_gpkg_geometry(blob):
+    magic, version, flags, srs_id, *envelope = struct.unpack("<2sBBi4d", blob[:40])
+    assert (magic, version, flags) == (b"GP", 0, 3)
+    return srs_id, envelope, shapely.from_wkb(blob[40:])
+
+
+def test_geopackage(tmp_path, fan_catalog, blotch_catalog, tile_coords):
+    path = tmp_path / "markings.gpkg"
+    transformer = transforms.Transformer(tile_coords)
+    n = footprints.to_geopackage(
+        blotch_catalog, path, frame="latlon", chunksize=50, transformer=transformer
+    )
+    assert n == len(blotch_catalog)
+    footprints.to_geopackage(fan_catalog.iloc[:10], path, frame="hirise")
+    footprints.to_geopackage(fan_catalog, path, frame="hirise", chunksize=33)
+    con = sqlite3.connect(path)
+    assert con.execute("PRAGMA application_id").fetchone()[0] == 0x47504B47
+    contents = con.execute(
+        "SELECT table_name, srs_id, min_x, max_x FROM gpkg_contents ORDER BY table_name"
+    ).fetchall()
+    assert [row[:2] for row in contents] == [("blotches", 49900), ("fans", -1)]
+    assert contents[1][2] < fan_catalog.image_x.min() < contents[1][3]
+    columns = {row[1]: row[2] for row in con.execute('PRAGMA table_info("fans")')}
+    assert columns["geom"] == "POLYGON" and columns["n_votes"] == "INTEGER"
+    assert columns["angle"] == "DOUBLE" and columns["obsid"] == "TEXT"
+    assert con.execute('SELECT COUNT(*) FROM "fans"').fetchone()[0] == len(fan_catalog)
+    marking_id, n_votes, blob = con.execute(
+        'SELECT marking_id, n_votes, geom FROM "fans" WHERE fid = 5'
+    ).fetchone()
+    fan = fan_catalog.iloc[4]
+    assert (marking_id, n_votes) == (fan.marking_id, fan.n_votes)
+    srs_id, envelope, polygon = parse_gpkg_geometry(blob)
+    expected = markings.FanRecord.from_data(fan, scope="hirise").to_shapely()
+    assert srs_id == -1
+    assert polygon.equals_exact(expected, 1e-9)
+    assert envelope == pytest.approx([expected.bounds[i] for i in (0, 2, 1, 3)])
+    srs_id, _, polygon = parse_gpkg_geometry(
+        con.execute('SELECT geom FROM "blotches" WHERE fid = 1').fetchone()[0]
+    )
+    assert srs_id == 49900
+    assert polygon.centroid.x == pytest.approx(blotch_catalog.Longitude.iloc[0], abs=1e-4)
+    con.close()
+
+
+def test_latlon_across_zero_longitude(monkeypatch, tmp_path):
+    monkeypatch.setitem(conftest.CENTERS, OBSIDS[0], (-82.2, 0.0))
+    transformer = transforms.Transformer(conftest.make_tile_coords())
+    fans = conftest._markings("fans", 400, 3)
+    fans = fans[fans.obsid == OBSIDS[0]].reset_index(drop=True)
+    path = tmp_path / "fans.geojsonl"
+    footprints.to_geojsonl(fans, path, frame="latlon", transformer=transformer)
+    polygons = [shapely.from_geojson(json.dumps(f["geometry"])) for f in read_geojsonl(path)]
+    bounds = shapely.bounds(polygons)
+    # some fans straddle 0 degrees, none of them spans the globe
+    assert ((bounds[:, 0] < 0) | (bounds[:, 2] > 360)).any()
+    assert (bounds[:, 2] - bounds[:, 0]).max() < 0.1
+    # next to the apex in the catalog, on either side of 0 degrees
+    offset = (shapely.get_x(shapely.centroid(polygons)) - fans.Longitude + 180) % 360 - 180
+    np.testing.assert_allclose(offset, 0, atol=0.01)
+    gpkg = tmp_path / "fans.gpkg"
+    footprints.to_geopackage(fans, gpkg, frame="latlon", transformer=transformer)
+    con = sqlite3.connect(gpkg)
+    for (blob,) in con.execute('SELECT geom FROM "fans"'):
+        _, (min_x, max_x, _, _), _ = parse_gpkg_geometry(blob)
+        assert max_x - min_x < 0.1
+    con.close()
@@ -0,0 +1,91 @@
+"""Tests for `p4tools.instrument` and the instrumented io hot paths."""
+
+import functools
+import http.server
+import threading
+
+import pandas as pd
+import pytest
+
+from p4tools import instrument, io
+
+
+@pytest.fixture
+def http_dir(tmp_path):
+    """Serve a temporary directory over local HTTP, yield (root dir, base url)."""
+    root = tmp_path / "served"
+    root.mkdir()
+    handler = functools.partial(
+        http.server.SimpleHTTPRequestHandler, directory=str(root)
+    )
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_disabled_by_default():
+    assert not instrument.is_enabled()
+    # recording without an active profiler is a no-op
+    instrument.record("nothing", 1.0, rows=1)
+
+
+def test_timed_and_counters():
+    @instrument.timed("test.op")
+    def op(x):
+        return 2 * x
+
+    assert op(2) == 4
+    with instrument.profile() as prof:
+        assert instrument.is_enabled()
+        op(1)
+        op(2)
+        instrument.record("test.op", rows=5, bytes_read=10)
+    assert not instrument.is_enabled()
+    summary = prof.summary()
+    assert summary.at["test.op", "count"] == 2
+    assert summary.at["test.op", "rows"] == 5
+    assert summary.at["test.op", "bytes_read"] == 10
+    ops = prof.to_dict()["operations"]
+    assert ops[0]["operation"] == "test.op"
+    assert "test.op" in prof.report()
+
+
+def test_unknown_counter():
+    with instrument.profile():
+        with pytest.raises(ValueError):
+            instrument.record("test.op", parrots=1)
+
+
+def test_nested_profilers():
+    with instrument.profile() as outer:
+        instrument.record("a", 0.1)
+        with instrument.profile() as inner:
+            instrument.record("b", 0.1)
+    assert set(outer.stats) == {"a", "b"}
+    assert set(inner.stats) == {"b"}
+
+
+def test_read_csv_counters(tmp_path):
+    fpath = tmp_path / "cat.csv"
+    pd.DataFrame({"tile_id": ["APF0000001", "APF0000002"]}).to_csv(fpath, index=False)
+    with instrument.profile() as prof:
+        io._read_csv(fpath)
+    stats = prof.stats["io.read_csv"]
+    assert stats.rows == 2
+    assert stats.bytes_read == fpath.stat().st_size
+
+
+def test_retrieve_hits_and_misses(http_dir, tmp_path):
+    root, base = http_dir
+    (root / "tile.txt").write_text("x" * 100)
+    cache = tmp_path / "cache"
+    with instrument.profile() as prof:
+        for _ in range(2):
+            io._retrieve(f"{base}/tile.txt", path=cache, known_hash=None)
+    assert prof.stats["io.retrieve.download"].cache_misses == 1
+    assert prof.stats["io.retrieve.download"].bytes_downloaded == 100
+    assert prof.stats["io.retrieve.cached"].cache_hits == 1
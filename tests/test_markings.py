@@ -0,0 +1,86 @@
+"""Tests for the compact marking records and the Fan/Blotch artists built on them."""
+
+import math
+
+import numpy as np
+import pytest
+from matplotlib.lines import Line2D
+from matplotlib.patches import Ellipse
+
+from p4tools import markings
+
+
+def test_records_are_slotted(fan_catalog, blotch_catalog):
+    fan = markings.FanRecord.from_data(fan_catalog.iloc[0])
+    blotch = markings.BlotchRecord.from_data(blotch_catalog.iloc[0])
+    for record in [fan, blotch]:
+        assert not hasattr(record, "__dict__")
+        with pytest.raises(AttributeError):
+            record.color = "red"
+
+
+@pytest.mark.parametrize("scope", ["planet4", "hirise"])
+def test_from_frame_matches_from_data(fan_catalog, scope):
+    records = markings.FanRecord.from_frame(fan_catalog, scope)
+    assert len(records) == len(fan_catalog)
+    for record, (_, row) in zip(records[:10], fan_catalog.iterrows()):
+        assert record.is_equal(markings.FanRecord.from_data(row, scope))
+        assert record.tile_id == row.tile_id
+    with pytest.raises(TypeError):
+        markings.FanRecord.from_frame(fan_catalog, "tile")
+
+
+def test_fan_wrapper(fan_catalog):
+    row = fan_catalog.iloc[3]
+    fan = markings.Fan(row)
+    record = fan.record
+    np.testing.assert_allclose(fan.coords, record.coords)
+    np.testing.assert_allclose(fan.get_xydata(), record.coords)
+    assert fan.armlength == record.armlength
+    assert fan.area == pytest.approx(record.area)
+    np.testing.assert_allclose(fan.center, record.center)
+    # arms of length armlength at angle -+ spread/2
+    arm = record.coords[0] - record.coords[1]
+    assert np.linalg.norm(arm) == pytest.approx(record.armlength)
+    assert math.degrees(math.atan2(arm[1], arm[0])) % 360 == pytest.approx(
+        (row.angle - row.spread / 2) % 360
+    )
+    fan.n_members = 3
+    assert record.n_members == 3
+
+
+def test_fan_shapely(fan_catalog):
+    record = markings.FanRecord.from_data(fan_catalog.iloc[5])
+    polygon = record.to_shapely()
+    assert polygon.is_valid
+    assert polygon.area == pytest.approx(record.area, rel=0.01)
+    assert markings.Fan(fan_catalog.iloc[5]).to_shapely().equals(polygon)
+
+
+def test_blotch_wrapper(blotch_catalog):
+    row = blotch_catalog.iloc[2]
+    blotch = markings.Blotch(row, scope="hirise")
+    record = blotch.record
+    assert (record.x, record.y) == (row.image_x, row.image_y)
+    assert blotch.area == pytest.approx(math.pi * row.radius_1 * row.radius_2)
+    for p in blotch.limit_points:
+        assert np.linalg.norm(p - record.center) in [
+            pytest.approx(row.radius_1),
+            pytest.approx(row.radius_2),
+        ]
+    assert blotch.to_shapely().area == pytest.approx(record.area, rel=0.01)
+
+
+def test_store_and_artist(fan_catalog, blotch_catalog):
+    fan = markings.FanRecord.from_data(fan_catalog.iloc[0])
+    stored = fan.store()
+    assert stored["arm1_x"] == fan.coords[0, 0]
+    assert stored["n_members"] == 1
+    artist = fan.to_artist(color="red")
+    assert isinstance(artist, Line2D)
+    assert artist.get_color() == "red"
+    blotch = markings.BlotchRecord.from_data(blotch_catalog.iloc[0])
+    assert {"p1_x", "p4_y", "radius_1"} <= set(blotch.store())
+    ellipse = blotch.to_artist()
+    assert isinstance(ellipse, Ellipse)
+    assert ellipse.width == 2 * blotch.radius_1
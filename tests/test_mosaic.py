@@ -0,0 +1,165 @@
+"""Tests for the memory-mapped obsid mosaics, built from synthetic single-colour tiles."""
+
+import json
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pytest
+from matplotlib import image as mplimg
+
+from p4tools import io, markings, mosaic
+from p4tools.transforms import TILE_X_STEP, TILE_Y_STEP
+
+from conftest import OBSIDS, X_TILES, Y_TILES
+
+OBSID = OBSIDS[1]
+
+
+@pytest.fixture
+def catalogs(tile_coords, tile_urls):
+    return {"tile_coords": tile_coords, "tile_urls": tile_urls}
+
+
+@pytest.fixture
+def tiles(monkeypatch, tmp_path, tile_coords):
+    """Serve every tile as PNG filled with a grey value unique to the tile; return the values."""
+    coords = tile_coords[tile_coords.obsid == OBSID]
+    values = {tile_id: 10 * (i + 1) for i, tile_id in enumerate(coords.tile_id)}
+    fetched = []
+
+    def fetch_subframe(url, progressbar=True):
+        tile_id = url.rsplit("/", 1)[-1].split(".")[0]
+        fpath = tmp_path / "tiles" / f"{tile_id}.png"
+        fpath.parent.mkdir(exist_ok=True)
+        im = np.full((markings.IMG_Y_SIZE, markings.IMG_X_SIZE, 3), values[tile_id], np.uint8)
+        mplimg.imsave(fpath, im)
+        fetched.append(tile_id)
+        return str(fpath)
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    return coords.set_index(["x_tile", "y_tile"]).tile_id.map(values), fetched
+
+
+def test_shape_and_placement(tmp_path, catalogs, tiles):
+    values, _ = tiles
+    mos = mosaic.ObsidMosaic.build(OBSID, tmp_path / "m.npy", catalogs=catalogs)
+    assert mos.shape == mosaic.mosaic_shape(X_TILES, Y_TILES) + (3,)
+    assert mos.missing == []
+    for (x_tile, y_tile), value in values.items():
+        # centre of every tile is only covered by that tile
+        cx = (x_tile - 1) * TILE_X_STEP + markings.IMG_X_SIZE // 2
+        cy = (y_tile - 1) * TILE_Y_STEP + markings.IMG_Y_SIZE // 2
+        assert (mos.data[cy, cx] == value).all()
+
+
+@pytest.mark.parametrize("overlap", mosaic.OVERLAP_MODES)
+def test_overlap(tmp_path, catalogs, tiles, overlap):
+    values, _ = tiles
+    mos = mosaic.ObsidMosaic.build(OBSID, tmp_path / "m.npy", overlap=overlap, catalogs=catalogs)
+    y = markings.IMG_Y_SIZE // 2
+    # overlap of tiles 1 and 2 in the first row is [740, 840)
+    left, right = values[(1, 1)], values[(2, 1)]
+    expected = {
+        "first": [left, left],
+        "last": [right, right],
+        "split": [left, right],
+    }[overlap]
+    assert mos.data[y, 760, 0] == expected[0]
+    assert mos.data[y, 820, 0] == expected[1]
+
+
+def test_resume_and_open(tmp_path, catalogs, tiles, monkeypatch):
+    _, fetched = tiles
+    path = tmp_path / "m.npy"
+    original = io.fetch_subframe
+
+    def flaky(url, progressbar=True):
+        if url.endswith(catalogs["tile_urls"].tile_url.iloc[X_TILES * Y_TILES + 5]):
+            raise OSError("offline")
+        return original(url, progressbar)
+
+    monkeypatch.setattr(io, "fetch_subframe", flaky)
+    mos = mosaic.ObsidMosaic.build(OBSID, path, workers=2, catalogs=catalogs)
+    assert len(mos.missing) == 1
+    assert len(fetched) == X_TILES * Y_TILES - 1
+
+    monkeypatch.setattr(io, "fetch_subframe", original)
+    mos = mosaic.ObsidMosaic.build(OBSID, path, catalogs=catalogs)
+    assert mos.missing == []
+    # only the missing tile was downloaded again
+    assert len(fetched) == X_TILES * Y_TILES
+    reopened = mosaic.ObsidMosaic.open(path)
+    np.testing.assert_array_equal(reopened.read(), mos.read())
+    with pytest.raises(ValueError):
+        mosaic.ObsidMosaic.build(OBSID, path, overlap="last", catalogs=catalogs)
+
+
+@pytest.mark.parametrize("overlap", mosaic.OVERLAP_MODES)
+@pytest.mark.parametrize("failed", [0, 5])
+def test_resume_equals_clean_build(tmp_path, catalogs, tiles, monkeypatch, overlap, failed):
+    clean = mosaic.ObsidMosaic.build(OBSID, tmp_path / "clean.npy", overlap, catalogs=catalogs)
+    original = io.fetch_subframe
+    offline = catalogs["tile_urls"].tile_url.iloc[X_TILES * Y_TILES + failed]
+
+    def flaky(url, progressbar=True):
+        if url.endswith(offline):
+            raise OSError("offline")
+        return original(url, progressbar)
+
+    monkeypatch.setattr(io, "fetch_subframe", flaky)
+    path = tmp_path / "resumed.npy"
+    assert len(mosaic.ObsidMosaic.build(OBSID, path, overlap, catalogs=catalogs).missing) == 1
+    monkeypatch.setattr(io, "fetch_subframe", original)
+    resumed = mosaic.ObsidMosaic.build(OBSID, path, overlap, catalogs=catalogs)
+    assert resumed.missing == []
+    np.testing.assert_array_equal(resumed.read(), clean.read())
+
+
+@pytest.mark.parametrize("overlap", mosaic.OVERLAP_MODES)
+def test_interrupted_build_resumes(tmp_path, catalogs, tiles, monkeypatch, overlap):
+    clean = mosaic.ObsidMosaic.build(OBSID, tmp_path / "clean.npy", overlap, catalogs=catalogs)
+    monkeypatch.setattr(mosaic, "CHECKPOINT_TILES", 4)
+    path = tmp_path / "resumed.npy"
+    state_path = mosaic.ObsidMosaic._state_path(path)
+    original = io._imread
+    saved = []
+
+    def n_placed():
+        return len(json.loads(state_path.read_text())["placed"]) if state_path.exists() else 0
+
+    def interrupted(fpath):
+        saved.append(n_placed())
+        if len(saved) == 7:
+            raise KeyboardInterrupt
+        return original(fpath)
+
+    monkeypatch.setattr(io, "_imread", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        mosaic.ObsidMosaic.build(OBSID, path, overlap, catalogs=catalogs)
+    # saved every 4 tiles while running, and with all 6 placed tiles when interrupted
+    assert saved == [0, 0, 0, 0, 4, 4, 4]
+    assert n_placed() == 6
+    monkeypatch.setattr(io, "_imread", original)
+    resumed = mosaic.ObsidMosaic.build(OBSID, path, overlap, catalogs=catalogs)
+    np.testing.assert_array_equal(resumed.read(), clean.read())
+
+
+def test_window_and_plot(tmp_path, catalogs, tiles, fan_catalog, blotch_catalog):
+    mos = mosaic.ObsidMosaic.build(OBSID, tmp_path / "m.npy", catalogs=catalogs)
+    window = mos.read(100, 200, 500, 400)
+    assert window.shape == (200, 400, 3)
+    assert mos.read(step=4).shape[:2] == mos.data[::4, ::4].shape[:2]
+    selected = mos.markings_in_window(fan_catalog, 0, 0, 1000, 1000)
+    assert (selected.obsid == OBSID).all()
+    assert selected.image_x.le(1000).all()
+    ax = mos.plot(0, 0, 1000, 1000, step=2, fans=fan_catalog, blotches=blotch_catalog)
+    assert len(ax.lines) == len(selected)
+    assert ax.get_xlim() == (0, 1000)
+
+
+def test_unknown_obsid(tmp_path, catalogs):
+    with pytest.raises(ValueError):
+        mosaic.ObsidMosaic.build("ESP_000000_0000", tmp_path / "m.npy", catalogs=catalogs)
@@ -0,0 +1,61 @@
+"""Tests for the partitioned catalog datasets."""
+
+import pytest
+
+from p4tools import partitions
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def fmt(request):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    return request.param
+
+
+def test_export_by_obsid(fake_catalogs, fan_catalog, tmp_path, fmt):
+    manifest = partitions.export_partitioned(tmp_path, fmt=fmt)
+    fans = manifest["kinds"]["fans"]
+    assert fans["rows"] == len(fan_catalog)
+    assert sum(entry["rows"] for entry in fans["partitions"]) == len(fan_catalog)
+    assert [entry["key"] for entry in fans["partitions"]] == sorted(fan_catalog.obsid.unique())
+    assert "roi_name" in fans["columns"] and "IMAGE_CENTER_LATITUDE" in fans["columns"]
+    # every catalog is only read once for both kinds
+    assert fake_catalogs["get_region_names"] == 1
+    assert fake_catalogs["get_meta_data"] == 1
+
+
+def test_read_opens_only_needed_partitions(fake_catalogs, fan_catalog, tmp_path, fmt):
+    partitions.export_partitioned(tmp_path, fmt=fmt)
+    ds = partitions.PartitionedDataset(tmp_path)
+    assert len(ds.prune("fans", obsids=["ESP_012079_0945"])) == 1
+    df = ds.read("fans", obsids=["ESP_012079_0945"], columns=["marking_id", "angle"])
+    expected = fan_catalog[fan_catalog.obsid == "ESP_012079_0945"]
+    assert list(df.columns) == ["marking_id", "angle"]
+    assert set(df.marking_id) == set(expected.marking_id)
+
+
+def test_read_selections(fake_catalogs, fan_catalog, tmp_path):
+    partitions.export_partitioned(tmp_path, fmt="csv")
+    ds = partitions.PartitionedDataset(tmp_path)
+    tile_ids = list(fan_catalog.tile_id.unique()[:3])
+    df = ds.read("fans", tile_ids=[t[3:] for t in tile_ids])
+    assert len(df) == fan_catalog.tile_id.isin(tile_ids).sum()
+    df = ds.read("fans", regions=["Giza"], l_s=(170, 180))
+    assert set(df.obsid) == {"ESP_011296_0975"}
+    assert len(ds.prune("fans", l_s=(300, 310))) == 0
+    assert len(ds.read("fans", l_s=(300, 310), columns=["angle"])) == 0
+
+
+def test_export_by_region(fake_catalogs, blotch_catalog, tmp_path):
+    partitions.export_partitioned(tmp_path, kinds=["blotches"], by="region", enrich=False, fmt="csv")
+    ds = partitions.PartitionedDataset(tmp_path)
+    giza = ds.partitions("blotches").set_index("key").loc["Giza"]
+    assert sorted(giza.obsids) == ["ESP_011296_0975", "ESP_020115_0985"]
+    df = ds.read("blotches", regions=["Ithaca"])
+    assert len(df) == (blotch_catalog.obsid == "ESP_012079_0945").sum()
+
+
+def test_regions_need_region_names(fake_catalogs, tmp_path):
+    partitions.export_partitioned(tmp_path, kinds=["fans"], enrich=False, fmt="csv")
+    with pytest.raises(ValueError):
+        partitions.PartitionedDataset(tmp_path).read("fans", regions=["Giza"])
@@ -0,0 +1,102 @@
+"""Tests for the render cache of the tile overlay figures."""
+
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pytest
+from matplotlib import image as mplimg
+
+from p4tools import io, markings, plotting
+
+
+@pytest.fixture
+def tiles(monkeypatch, tmp_path, fake_catalogs):
+    """Serve grey tiles from a fake `io.fetch_subframe`; return the fetched urls.
+
+    Every marking plot draws the tile again, so a render fetches it more than once.
+    """
+    fetched = []
+
+    def fetch_subframe(url, progressbar=True):
+        fpath = tmp_path / "tile.png"
+        if not fpath.exists():
+            im = np.full((markings.IMG_Y_SIZE, markings.IMG_X_SIZE, 3), 90, np.uint8)
+            mplimg.imsave(fpath, im)
+        fetched.append(url)
+        return str(fpath)
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    return fetched
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return plotting.RenderCache(tmp_path / "renders")
+
+
+def test_hit_returns_stored_render(tiles, cache, fan_catalog):
+    tile_id = fan_catalog.tile_id.iloc[0]
+    data = plotting.render_tile(tile_id, cache=cache, dpi=50)
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    n = len(tiles)
+    assert n > 0 and len(cache) == 1
+    assert plotting.render_tile(tile_id[-4:], cache=cache, dpi=50) == data
+    assert len(tiles) == n
+    # a new instance finds the render on disk
+    again = plotting.RenderCache(cache.path)
+    assert again.nbytes == len(data)
+    assert plotting.render_tile(tile_id, cache=again, dpi=50) == data
+    assert len(tiles) == n
+
+
+def test_any_changed_input_renders_again(tiles, cache, fan_catalog, monkeypatch):
+    tile_id = fan_catalog.tile_id.iloc[0]
+
+    def rendered(**kwargs):
+        n = len(tiles)
+        plotting.render_tile(tile_id, cache=cache, dpi=kwargs.pop("dpi", 50), **kwargs)
+        return len(tiles) > n
+
+    assert rendered()
+    assert not rendered()
+    assert rendered(dpi=60)
+    assert rendered(kind="fans")
+    monkeypatch.setitem(io.hashes, "blotches", "md5:0")
+    assert rendered()
+    # fans only do not depend on the blotch catalog
+    assert not rendered(kind="fans")
+    monkeypatch.setattr(plotting, "__version__", "99.0")
+    assert rendered(kind="fans")
+    assert len(cache) == 5
+
+
+def test_svg_and_uncached(tiles, cache, blotch_catalog):
+    tile_id = blotch_catalog.tile_id.iloc[0]
+    svg = plotting.render_tile(tile_id, kind="blotches", fmt="svg", cache=False)
+    assert svg.startswith(b"<?xml") and len(cache) == 0
+    assert plotting.render_tile(tile_id, kind="blotches", fmt="svg", cache=False) == svg
+    with pytest.raises(ValueError):
+        plotting.render_tile(tile_id, fmt="jpg", cache=cache)
+    with pytest.raises(ValueError):
+        plotting.render_tile(tile_id, kind="craters", cache=cache)
+
+
+def test_eviction_is_least_recently_used(cache):
+    cache.max_bytes = 250
+    for key in ["aa1", "bb2", "cc3"]:
+        cache.put(key, "png", b"x" * 100)
+        time.sleep(0.01)
+    assert cache.get("aa1", "png") is None
+    assert len(cache) == 2 and cache.nbytes == 200
+    assert cache.get("bb2", "png") == b"x" * 100
+    time.sleep(0.01)
+    cache.put("dd4", "png", b"y" * 100)
+    assert cache.get("cc3", "png") is None
+    assert cache.get("bb2", "png") is not None
+    assert sorted(p.name for p in cache.path.glob("*/*")) == ["bb2.png", "dd4.png"]
+    cache.clear()
+    assert len(cache) == 0 and not list(cache.path.glob("*/*"))
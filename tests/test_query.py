@@ -0,0 +1,145 @@
+"""Tests for io.query_markings against plain pandas filtering of the synthetic catalogs."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pooch
+import pytest
+
+from p4tools import io, partitions
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path, fake_catalogs):
+    monkeypatch.setattr(pooch, "os_cache", lambda name: tmp_path / "cache" / name)
+    return fake_catalogs
+
+
+def expected(df, mask, columns):
+    return df[mask][columns].sort_values(columns).reset_index(drop=True)
+
+
+def normalized(df, columns):
+    return df[columns].sort_values(columns).reset_index(drop=True)
+
+
+def test_region_and_season(cache, fan_catalog):
+    columns = ["marking_id", "obsid", "angle"]
+    df = io.query_markings("fans", regions="Giza", l_s=(170, 185), columns=columns)
+    assert list(df.columns) == columns
+    mask = (fan_catalog.obsid == "ESP_011296_0975").values
+    pd.testing.assert_frame_equal(
+        normalized(df, columns), expected(fan_catalog, mask, columns)
+    )
+    plan = df.attrs["query"]["fans"]
+    assert plan["source"].startswith("parquet")
+    assert set(plan["columns"]) == {"marking_id", "obsid", "angle", "l_s"}
+
+
+def test_columnar_cache_built_once(cache):
+    io.query_markings("blotches", obsids=["ESP_012079_0945"])
+    io.query_markings("blotches", tile_ids=["1", "2"])
+    assert cache["get_blotch_catalog"] == 1
+    assert "get_fan_catalog" not in cache
+
+
+def test_tile_ids_and_bbox(cache, fan_catalog):
+    lat, lon = fan_catalog.PlanetocentricLatitude, fan_catalog.Longitude
+    bbox = (lon.quantile(0.2), lat.quantile(0.2), lon.quantile(0.8), lat.quantile(0.8))
+    tile_ids = sorted(fan_catalog.tile_id.unique())[:20]
+    df = io.query_markings("fans", tile_ids=tile_ids, bbox=bbox, columns=["marking_id"])
+    mask = (
+        fan_catalog.tile_id.isin(tile_ids)
+        & lon.between(bbox[0], bbox[2])
+        & lat.between(bbox[1], bbox[3])
+    ).values
+    assert sorted(df.marking_id) == sorted(fan_catalog.marking_id[mask])
+
+
+def test_bbox_across_zero_longitude(cache, fan_catalog):
+    lon = fan_catalog.Longitude
+    bbox = (250.0, -90.0, 110.0, 0.0)
+    df = io.query_markings("fans", bbox=bbox, columns=["marking_id"])
+    mask = ((lon >= 250) | (lon <= 110)).values
+    assert sorted(df.marking_id) == sorted(fan_catalog.marking_id[mask])
+
+
+def test_joined_columns_and_both(cache, fan_catalog, blotch_catalog):
+    columns = ["tile_id", "obsid", "roi_name", "START_TIME", "spread"]
+    df = io.query_markings("both", obsids="ESP_020115_0985", columns=columns)
+    assert list(df.columns) == ["kind"] + columns
+    assert isinstance(df["kind"].dtype, pd.CategoricalDtype)
+    counts = df["kind"].value_counts()
+    assert counts["fans"] == (fan_catalog.obsid == "ESP_020115_0985").sum()
+    assert counts["blotches"] == (blotch_catalog.obsid == "ESP_020115_0985").sum()
+    assert (df.roi_name == "Giza").all()
+    assert (df.START_TIME == "2010-10-27").all()
+    assert df.loc[df["kind"] == "blotches", "spread"].isna().all()
+    with pytest.raises(KeyError):
+        io.query_markings("fans", columns=["radius_1"])
+    with pytest.raises(ValueError):
+        io.query_markings("slopes")
+
+
+def test_empty_result_keeps_dtypes(cache):
+    df = io.query_markings("fans", obsids="ESP_000000_0000", columns=["angle", "tile_id"])
+    assert len(df) == 0
+    assert df.angle.dtype == float
+
+
+def test_csv_fallback(cache, monkeypatch, blotch_catalog):
+    monkeypatch.setattr(io, "_has_pyarrow", lambda: False)
+    df = io.query_markings("blotches", regions=["Ithaca"], columns=["marking_id"])
+    assert df.attrs["query"]["blotches"]["source"] == "csv"
+    mask = (blotch_catalog.obsid == "ESP_012079_0945").values
+    assert sorted(df.marking_id) == sorted(blotch_catalog.marking_id[mask])
+
+
+def test_csv_fallback_reads_catalog_once(cache, monkeypatch, blotch_catalog):
+    monkeypatch.setattr(io, "_has_pyarrow", lambda: False)
+    tile_ids = sorted(blotch_catalog.tile_id.unique())[:8]
+    with ThreadPoolExecutor(4) as pool:
+        frames = list(pool.map(lambda t: io.query_markings("blotches", tile_ids=[t]), tile_ids))
+    io.query_markings("blotches", obsids="ESP_012079_0945")
+    assert cache["get_blotch_catalog"] == 1
+    for tile_id, df in zip(tile_ids, frames):
+        assert len(df) == (blotch_catalog.tile_id == tile_id).sum()
+
+
+def test_partitioned_dataset(cache, tmp_path, fan_catalog):
+    root = tmp_path / "ds"
+    partitions.export_partitioned(root, kinds=["fans"])
+    columns = ["marking_id", "angle"]
+    df = io.query_markings("fans", l_s=(200, 230), columns=columns, dataset=root)
+    assert df.attrs["query"]["fans"]["source"].startswith("dataset")
+    mask = fan_catalog.l_s.between(200, 230).values
+    pd.testing.assert_frame_equal(
+        normalized(df, columns), expected(fan_catalog, mask, columns)
+    )
+
+
+@pytest.mark.parametrize(
+    "selection",
+    [
+        dict(regions="Nowhere"),
+        dict(tile_ids=[]),
+        dict(obsids=["ESP_011296_0975"], regions="Ithaca"),
+    ],
+)
+def test_selection_without_ids_is_empty(cache, monkeypatch, tmp_path, selection):
+    columns = ["marking_id", "angle"]
+    df = io.query_markings("fans", columns=columns, **selection)
+    assert len(df) == 0 and list(df.columns) == columns
+    assert df.angle.dtype == float
+    root = tmp_path / "ds"
+    partitions.export_partitioned(root, kinds=["fans"])
+    assert len(io.query_markings("fans", columns=columns, dataset=root, **selection)) == 0
+    monkeypatch.setattr(io, "_has_pyarrow", lambda: False)
+    assert len(io.query_markings("fans", columns=columns, **selection)) == 0
+
+
+def test_concurrent_columnar_builds(cache):
+    with ThreadPoolExecutor(4) as pool:
+        paths = list(pool.map(io.columnar_catalog, ["fans"] * 4))
+    assert len(set(paths)) == 1 and paths[0].exists()
+    assert list(paths[0].parent.glob("*.tmp")) == []
@@ -0,0 +1,124 @@
+"""Tests for publishing catalogs into shared memory and the per-tile process pool."""
+
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p4tools import shared
+
+
+def count_markings(tile_id, fans, blotches):
+    "Per-tile function for the pool tests, must be importable by the workers."
+    return tile_id, len(fans), len(blotches), float(fans.angle.sum())
+
+
+def attach_and_sum(spec):
+    df = shared.attach(spec, columns=["angle", "obsid"])
+    return float(df.angle.sum()), sorted(df.obsid.unique())
+
+
+def test_roundtrip_and_zero_copy(fan_catalog):
+    with shared.SharedTable(fan_catalog) as table:
+        df = table.attach()
+        assert list(df.columns) == list(fan_catalog.columns)
+        for col in fan_catalog.columns:
+            assert df[col].tolist() == fan_catalog[col].tolist()
+        buf = np.frombuffer(table.shm.buf, np.uint8)
+        assert np.shares_memory(df.angle.to_numpy(), buf)
+        assert np.shares_memory(df.tile_id.array.codes, buf)
+        assert isinstance(df.obsid.dtype, pd.CategoricalDtype)
+        with pytest.raises(ValueError):
+            df.angle.to_numpy()[0] = 1.0
+        del df, buf
+
+
+def test_missing_strings_and_empty_frames():
+    df = pd.DataFrame({"a": [1.5, 2.5, np.nan], "s": ["x", None, "ü"], "i": [1, 2, 3]})
+    with shared.SharedTable(df) as table:
+        out = table.attach(columns=["s", "i"])
+        assert list(out.columns) == ["s", "i"]
+        assert out.s.iloc[0] == "x" and pd.isna(out.s.iloc[1]) and out.s.iloc[2] == "ü"
+        assert out.i.dtype == np.int64
+        del out
+    with shared.SharedTable(df.iloc[:0]) as table:
+        assert len(table.attach()) == 0
+
+
+def test_nullable_columns_keep_their_dtype():
+    df = pd.DataFrame(
+        {
+            "n": pd.array([3, None, 5], dtype="Int64"),
+            "b": pd.array([True, None, False], dtype="boolean"),
+            "f": pd.array([1.5, None, 2.0], dtype="Float32"),
+        }
+    )
+    with shared.SharedTable(df) as table:
+        out = table.attach()
+        pd.testing.assert_frame_equal(out, df)
+        del out
+
+
+@pytest.mark.parametrize(
+    "values", [[True, None, False], [1, "a", None], pd.date_range("2020", periods=3, tz="UTC")]
+)
+def test_unsupported_columns_raise(values):
+    with pytest.raises(TypeError):
+        shared.SharedTable(pd.DataFrame({"x": values}))
+
+
+def test_attach_in_other_process(fan_catalog):
+    ctx = multiprocessing.get_context("spawn")
+    with shared.SharedTable(fan_catalog) as table:
+        with ctx.Pool(1) as pool:
+            total, obsids = pool.apply(attach_and_sum, (table.spec,))
+        assert total == pytest.approx(fan_catalog.angle.sum())
+        assert obsids == sorted(fan_catalog.obsid.unique())
+        # the worker's exit did not remove the block
+        assert len(table.attach()) == len(fan_catalog)
+
+
+def test_tile_slice(fan_catalog):
+    with shared.SharedTable(fan_catalog, sort_by="tile_id") as table:
+        df = table.attach()
+        for tile_id in fan_catalog.tile_id.unique()[:5]:
+            expected = fan_catalog[fan_catalog.tile_id == tile_id]
+            got = shared.tile_slice(df, tile_id)
+            assert sorted(got.marking_id) == sorted(expected.marking_id)
+        assert len(shared.tile_slice(df, "APF9999999")) == 0
+        del df, got
+
+
+def test_tile_slice_rejects_missing_tile_ids(fan_catalog):
+    fans = fan_catalog.copy()
+    fans.loc[3, "tile_id"] = None
+    with pytest.raises(ValueError, match="tile_id"):
+        shared.SharedTable(fans, sort_by="tile_id")
+    with pytest.raises(ValueError):
+        list(shared.imap_tiles(count_markings, ["1"], catalogs={"fans": fans}, kinds=["fans"]))
+
+
+def test_map_tiles(fan_catalog, blotch_catalog, tile_coords):
+    catalogs = {"fans": fan_catalog, "blotches": blotch_catalog}
+    tile_ids = tile_coords.tile_id.tolist()
+    results = shared.map_tiles(
+        count_markings, tile_ids, catalogs=catalogs, workers=2, columns=["angle"], chunksize=4
+    )
+    assert [r[0] for r in results] == tile_ids
+    for tile_id, n_fans, n_blotches, angles in results:
+        fans = fan_catalog[fan_catalog.tile_id == tile_id]
+        assert n_fans == len(fans)
+        assert n_blotches == (blotch_catalog.tile_id == tile_id).sum()
+        assert angles == pytest.approx(fans.angle.sum())
+
+
+def test_imap_tiles_with_columns_per_kind(fan_catalog, blotch_catalog, tile_coords):
+    catalogs = {"fans": fan_catalog, "blotches": blotch_catalog}
+    tile_ids = tile_coords.tile_id.tolist()[:6]
+    columns = {"fans": ["angle"], "blotches": ["radius_1"]}
+    results = shared.imap_tiles(
+        count_markings, tile_ids, catalogs=catalogs, workers=2, columns=columns
+    )
+    assert not isinstance(results, list)
+    assert [r[0] for r in results] == tile_ids
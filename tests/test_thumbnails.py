@@ -0,0 +1,125 @@
+"""Tests for the thumbnail pyramid and the `level=` option of the display functions."""
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pooch
+import pytest
+from PIL import Image
+
+from p4tools import io, markings, plotting, thumbnails
+
+SHAPE = (markings.IMG_Y_SIZE, markings.IMG_X_SIZE)
+
+
+def tile_image(i):
+    "Smooth, tile specific RGB gradient."
+    rows, cols = np.mgrid[: SHAPE[0], : SHAPE[1]]
+    im = np.stack([rows * 255 // SHAPE[0], cols * 255 // SHAPE[1], np.full(SHAPE, 7 * i)], -1)
+    return (im % 256).astype(np.uint8)
+
+
+@pytest.fixture
+def tiles(monkeypatch, tmp_path, fake_catalogs, tile_coords):
+    """Serve every tile as JPEG from a fake `io.fetch_subframe`; return the fetched tile_ids."""
+    monkeypatch.setattr(pooch, "os_cache", lambda name: tmp_path / "cache" / name)
+    monkeypatch.setattr(thumbnails, "_default_store", None)
+    index = {tile_id: i for i, tile_id in enumerate(tile_coords.tile_id)}
+    fetched = []
+
+    def fetch_subframe(url, progressbar=True):
+        tile_id = url.rsplit("/", 1)[-1].split(".")[0]
+        fpath = tmp_path / "tiles" / f"{tile_id}.jpg"
+        if not fpath.exists():
+            fpath.parent.mkdir(exist_ok=True)
+            Image.fromarray(tile_image(index[tile_id])).save(fpath, quality=95)
+        fetched.append(tile_id)
+        return str(fpath)
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    return fetched
+
+
+def test_pyramid_is_block_mean(tmp_path):
+    im = tile_image(3)
+    fpath = tmp_path / "tile.png"
+    Image.fromarray(im).save(fpath)
+    levels = thumbnails.pyramid(fpath)
+    assert sorted(levels) == [2, 4, 8]
+    for level, thumb in levels.items():
+        assert thumb.shape == (SHAPE[0] // level, SHAPE[1] // level, 3)
+        expected = im.reshape(SHAPE[0] // level, level, SHAPE[1] // level, level, 3).mean((1, 3))
+        # each level is rounded before the next one is computed from it
+        assert np.abs(thumb - expected).max() <= 1.5
+
+
+def test_jpeg_is_decoded_at_reduced_size(tmp_path, monkeypatch):
+    fpath = tmp_path / "tile.jpg"
+    Image.fromarray(tile_image(5)).save(fpath, quality=95)
+    sizes = []
+    convert = Image.Image.convert
+
+    def spy(self, *args, **kwargs):
+        sizes.append(self.size)
+        return convert(self, *args, **kwargs)
+
+    monkeypatch.setattr(Image.Image, "convert", spy)
+    levels = thumbnails.pyramid(fpath, levels=(4, 8))
+    assert sizes == [(SHAPE[1] // 4, SHAPE[0] // 4)]
+    reference = thumbnails._downsample(tile_image(5), 8).astype(int)
+    assert np.abs(levels[8] - reference).mean() < 2
+
+
+def test_build_get_and_resume(tmp_path, tiles, tile_coords):
+    store = thumbnails.ThumbnailStore(tmp_path / "store")
+    tile_ids = tile_coords.tile_id.tolist()[:6]
+    assert store.build(tile_ids + ["APF9999999"]) == ["APF9999999"]
+    assert len(store) == 6 and tile_ids[0][-3:] in store
+    first = store.get(tile_ids[0], 8).copy()
+    assert first.shape == (81, 105, 3)
+    with pytest.raises(ValueError):
+        store.get(tile_ids[0], 16)
+    with pytest.raises(KeyError):
+        store.get("APF9999999")
+    # an interrupted append leaves a partial index line, which is ignored
+    with open(tmp_path / "store" / "tiles.txt", "a") as f:
+        f.write(tile_coords.tile_id.iloc[6][:5])
+    tiles.clear()
+    store = thumbnails.ThumbnailStore(tmp_path / "store")
+    assert len(store) == 6
+    assert store.build(tile_coords.tile_id.tolist()[:8]) == []
+    assert sorted(tiles) == tile_coords.tile_id.tolist()[6:8]
+    np.testing.assert_array_equal(store.get(tile_ids[0], 8), first)
+    # slots stay in step after the resume
+    assert int(store.get(tile_coords.tile_id.iloc[7], 2)[0, 0, 2]) == pytest.approx(49, abs=3)
+    with pytest.raises(ValueError):
+        thumbnails.ThumbnailStore(tmp_path / "store", levels=(2, 4))
+
+
+def test_display_levels(tiles, tile_coords, monkeypatch):
+    tile_id = tile_coords.tile_id.iloc[2]
+    ax = markings.show_subframe(tile_id, level=4)
+    image = ax.get_images()[0]
+    assert image.get_array().shape == (162, 210, 3)
+    assert image.get_extent() == [-0.5, SHAPE[1] - 0.5, SHAPE[0] - 0.5, -0.5]
+
+    def no_full_decode(tile_id):
+        raise AssertionError("full resolution subframe loaded")
+
+    monkeypatch.setattr(io, "get_subframe_by_tile_id", no_full_decode)
+    plotting.plot_original_fans_blotches(tile_coords.tile_id.iloc[0], level=8)
+    assert len(thumbnails.default_store()) == 2
+    with pytest.raises(AssertionError):
+        plotting.plot_original_tile(tile_id)
+
+
+def test_contact_sheet(tmp_path, tiles, tile_coords):
+    store = thumbnails.ThumbnailStore(tmp_path / "store", levels=(8,))
+    tile_ids = tile_coords.tile_id.tolist()[:7] + ["APF9999999"]
+    ax = thumbnails.contact_sheet(tile_ids, ncols=3, store=store, labels=False)
+    sheet = ax.get_images()[0].get_array()
+    assert sheet.shape == (3 * 81, 3 * 105, 3)
+    np.testing.assert_array_equal(sheet[81:162, 105:210], store.get(tile_ids[4], 8))
+    assert (sheet[162:, 105:] == 0).all()
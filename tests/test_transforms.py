@@ -0,0 +1,90 @@
+"""Tests for the batched coordinate transforms, on synthetic image geometries."""
+
+import numpy as np
+import pytest
+
+from p4tools import transforms
+
+
+@pytest.fixture
+def transformer(tile_coords):
+    return transforms.Transformer(tile_coords)
+
+
+def test_tile_image_roundtrip(transformer, fan_catalog):
+    image_x, image_y = transformer.tile_to_image(fan_catalog.x, fan_catalog.y, fan_catalog.tile_id)
+    np.testing.assert_allclose(image_x, fan_catalog.image_x)
+    np.testing.assert_allclose(image_y, fan_catalog.image_y)
+    x, y = transformer.image_to_tile(image_x, image_y, fan_catalog.tile_id)
+    np.testing.assert_allclose(x, fan_catalog.x)
+    np.testing.assert_allclose(y, fan_catalog.y)
+
+
+def test_unknown_tile(transformer):
+    with pytest.raises(KeyError):
+        transformer.tile_to_image([1.0], [1.0], ["APF9999999"])
+
+
+def test_latlon_matches_catalog(transformer, fan_catalog):
+    lat, lon = transformer.image_to_latlon(
+        fan_catalog.image_x, fan_catalog.image_y, fan_catalog.obsid
+    )
+    np.testing.assert_allclose(lat, fan_catalog.PlanetocentricLatitude, atol=1e-6)
+    np.testing.assert_allclose(lon, fan_catalog.Longitude, atol=1e-5)
+    lat2, lon2 = transformer.tile_to_latlon(fan_catalog.x, fan_catalog.y, fan_catalog.tile_id)
+    np.testing.assert_allclose(lat2, lat)
+    np.testing.assert_allclose(lon2, lon)
+
+
+def test_latlon_roundtrip(transformer, blotch_catalog):
+    args = blotch_catalog.image_x, blotch_catalog.image_y, blotch_catalog.obsid
+    lat, lon = transformer.image_to_latlon(*args)
+    x, y = transformer.latlon_to_image(lat, lon, blotch_catalog.obsid)
+    np.testing.assert_allclose(x, blotch_catalog.image_x, atol=1e-3)
+    np.testing.assert_allclose(y, blotch_catalog.image_y, atol=1e-3)
+
+
+def test_azimuth_against_finite_differences(transformer, fan_catalog):
+    df = fan_catalog
+    azimuth = transformer.angle_to_azimuth(df.angle, df.image_x, df.image_y, df.obsid)
+    # bearing from the base to a point 1 pixel away along the fan angle
+    step = np.radians(df.angle)
+    lat0, lon0 = np.radians(transformer.image_to_latlon(df.image_x, df.image_y, df.obsid))
+    lat1, lon1 = np.radians(
+        transformer.image_to_latlon(
+            df.image_x + np.cos(step), df.image_y + np.sin(step), df.obsid
+        )
+    )
+    dlon = lon1 - lon0
+    bearing = np.degrees(
+        np.arctan2(
+            np.sin(dlon) * np.cos(lat1),
+            np.cos(lat0) * np.sin(lat1) - np.sin(lat0) * np.cos(lat1) * np.cos(dlon),
+        )
+    ) % 360
+    diff = (azimuth - bearing + 180) % 360 - 180
+    np.testing.assert_allclose(diff, 0, atol=1e-3)
+    angle = transformer.azimuth_to_angle(azimuth, df.image_x, df.image_y, df.obsid)
+    np.testing.assert_allclose((angle - df.angle + 180) % 360 - 180, 0, atol=1e-6)
+
+
+def test_lengths_and_parameters(transformer, fan_catalog, blotch_catalog):
+    params = transformer.parameters()
+    np.testing.assert_allclose(params.meters_per_pixel, 0.25, rtol=1e-3)
+    assert (params.rms_km < 1e-3).all()
+    fans = transformer.transform_markings(fan_catalog)
+    np.testing.assert_allclose(fans.distance_m, fan_catalog.distance * 0.25, rtol=1e-3)
+    blotches = transformer.transform_markings(blotch_catalog)
+    assert {"lat", "lon", "azimuth", "radius_1_m", "radius_2_m"} <= set(blotches.columns)
+
+
+def test_geometry_is_cached(transformer):
+    obsid = "ESP_012079_0945"
+    assert transformer.geometry(obsid) is transformer.geometry(obsid)
+    with pytest.raises(KeyError):
+        transformer.geometry("ESP_000000_0000")
+
+
+def test_fit_needs_three_points():
+    with pytest.raises(ValueError):
+        transforms.ObsidGeometry.fit("x", [0, 1, 2], [0, 1, 2], np.ones((3, 3)))
@@ -0,0 +1,189 @@
+"""Tests for the catalog release registry, with two releases served by a local HTTP server."""
+
+import functools
+import multiprocessing
+import threading
+import zipfile
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pooch
+import pytest
+from PIL import Image
+
+from p4tools import features, io, markings, plotting, versions
+
+FORK = multiprocessing.get_context("fork")
+
+
+class Handler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(Handler, directory=root))
+    httpd.hits = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield root, f"http://127.0.0.1:{httpd.server_address[1]}/", httpd.hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def publish(root, base_url, name, tables):
+    "Zip the CSV tables into `root/name/` and return the release."
+    (root / name).mkdir()
+    urls, hashes = {}, {}
+    for key, df in tables.items():
+        fpath = root / name / f"{key}.csv.zip"
+        with zipfile.ZipFile(fpath, "w") as zf:
+            zf.writestr(f"{key}.csv", df.to_csv(index=False))
+        urls[key] = f"{name}/{fpath.name}"
+        hashes[key] = "md5:" + pooch.file_hash(str(fpath), alg="md5")
+    return {"base_url": base_url, "urls": urls, "hashes": hashes}
+
+
+@pytest.fixture
+def tile_ids(fan_catalog):
+    return list(fan_catalog.tile_id.value_counts().index[:4])
+
+
+@pytest.fixture
+def registry(server, tmp_path, fan_catalog, blotch_catalog, tile_urls, tile_ids):
+    """Release "old" and release "new" with a changed, a removed and an added fan."""
+    root, base_url, _ = server
+    old = {"fans": fan_catalog, "blotches": blotch_catalog, "tile_urls": tile_urls}
+    fans = fan_catalog.copy()
+    fans.loc[fans.index[fans.tile_id == tile_ids[0]][0], "angle"] += 10
+    fans = fans.drop(fans.index[fans.tile_id == tile_ids[1]][0])
+    added = fans[fans.tile_id == tile_ids[2]].iloc[[0]].assign(marking_id="F999999", x=1.5)
+    new = {**old, "fans": pd.concat([fans, added], ignore_index=True)}
+    registry = versions.Registry(tmp_path / "versions", releases={})
+    registry.register("old", **publish(root, base_url, "old", old))
+    registry.register("new", **publish(root, base_url, "new", new))
+    return registry
+
+
+@pytest.fixture
+def release(monkeypatch, tmp_path):
+    "Restore the release `io` uses after the test, and keep its downloads in `tmp_path`."
+    monkeypatch.setattr(pooch, "os_cache", lambda name: tmp_path / "cache" / name)
+    monkeypatch.setattr(io, "base_url", io.base_url)
+    monkeypatch.setattr(io, "urls", dict(io.urls))
+    monkeypatch.setattr(io, "hashes", dict(io.hashes))
+
+
+def test_digests(fan_catalog):
+    digests = versions.row_digests(fan_catalog, "marking_id")
+    assert digests.dtype == np.uint64 and digests.is_unique
+    shuffled = fan_catalog[fan_catalog.columns[::-1]].assign(marking_id="x")
+    assert (versions.row_digests(shuffled, "marking_id") == digests).all()
+    old = pd.DataFrame(
+        {"tile_id": list("aaabbc"), "key": list("123456"), "digest": [1, 1, 2, 3, 4, 5]}
+    )
+    # one of two equal rows gone, one renamed, one changed, one added
+    new = pd.DataFrame(
+        {"tile_id": list("aabbc"), "key": list("1X457"), "digest": [1, 2, 3, 9, 6]}
+    )
+    diff = versions.diff_digests(old, new)
+    assert diff.to_dict("list") == {
+        "tile_id": ["a", "b", "c"],
+        "added": [0, 0, 1],
+        "removed": [1, 0, 1],
+        "changed": [0, 1, 0],
+    }
+
+
+def test_registry_diff(server, registry, tile_ids):
+    _, _, hits = server
+    diff = registry.diff("old", "new")
+    assert diff.kind.unique().tolist() == ["fans"]
+    counts = diff.set_index("tile_id")[["added", "removed", "changed"]]
+    assert counts.loc[tile_ids[0]].tolist() == [0, 0, 1]
+    assert counts.loc[tile_ids[1]].tolist() == [0, 1, 0]
+    assert counts.loc[tile_ids[2]].tolist() == [1, 0, 0]
+    assert len(diff) == 3
+    assert versions.changed_tiles(diff) == {"fans": set(tile_ids[:3])}
+    # catalogs with equal hashes are not even downloaded
+    assert sorted(hits) == ["/new/fans.csv.zip", "/old/fans.csv.zip"]
+    assert len(list((registry.path / "digests").glob("fans-*"))) == 2
+    # digests are stored per catalog file
+    assert versions.Registry(registry.path, registry.releases).diff("old", "new").equals(diff)
+    assert len(hits) == 2
+    assert len(registry.diff("old", "old")) == 0
+
+
+def test_releases_side_by_side(registry, release, fan_catalog):
+    old, new = registry.load("old", "fans"), registry.load("new", "fans")
+    assert len(old) == len(fan_catalog) and len(new) == len(fan_catalog)
+    assert not old.equals(new)
+    assert registry.fetch("old", "fans") != registry.fetch("new", "fans")
+    assert registry.catalogs("new")["fans"].equals(new)
+    with pytest.raises(ValueError):
+        registry.register("broken", "http://127.0.0.1/", {"fans": "a.zip"}, {})
+    urls = io.urls
+    registry.activate("new")
+    assert io.hashes == registry.releases["new"]["hashes"] and io.urls is urls
+    assert io.get_fan_catalog().equals(new)
+    assert "v1.1" in versions.Registry(registry.path).names
+
+
+@pytest.fixture
+def tiles(monkeypatch, tmp_path):
+    "Serve grey tiles from a fake `io.fetch_subframe`, logging each fetch to a file."
+    log = tmp_path / "fetched.txt"
+
+    def fetch_subframe(url, progressbar=True):
+        tile_id = url.rsplit("/", 1)[-1].split(".")[0]
+        fpath = tmp_path / "tile.png"
+        if not fpath.exists():
+            im = np.full((markings.IMG_Y_SIZE, markings.IMG_X_SIZE, 3), 90, np.uint8)
+            Image.fromarray(im).save(fpath)
+        with open(log, "a") as f:
+            f.write(tile_id + "\n")
+        return str(fpath)
+
+    monkeypatch.setattr(io, "fetch_subframe", fetch_subframe)
+    return log
+
+
+def test_refresh(registry, release, tiles, tmp_path, tile_ids, fan_catalog):
+    features_path = tmp_path / "features"
+    extracted = tile_ids[1:]
+    catalogs = registry.catalogs("old")
+    features.extract_features(
+        extracted, features_path, bins=4, workers=2, catalogs=catalogs, mp_context=FORK
+    )
+    registry.activate("old")
+    cache = plotting.RenderCache(tmp_path / "renders")
+    options = {"fmt": "png", "level": 1, "dpi": 50}
+    for tile_id in tile_ids:
+        for kind in ["fans", "blotches"]:
+            inputs = cache.inputs(tile_id, kind, options)
+            cache.put(cache.key(tile_id, kind, options), "png", tile_id.encode(), inputs)
+    tiles.write_text("")
+    diff = versions.refresh("old", "new", registry, cache, features_path, 2, FORK)
+    assert io.hashes == registry.releases["new"]["hashes"]
+    assert len(diff) == 3
+    # only the changed tiles that had features are extracted again
+    assert sorted(tiles.read_text().split()) == sorted(tile_ids[1:3])
+    stored = features.stored_features(features_path).set_index("tile_id")
+    assert sorted(stored.index) == sorted(extracted)
+    n_fans = (fan_catalog.tile_id == tile_ids[1]).sum()
+    assert stored.loc[tile_ids[1], "n_fans"] == n_fans - 1
+    assert stored.columns.str.startswith("hist_").sum() == 4
+    # renders of the unchanged tile are carried over, blotch renders did not need to
+    assert len(cache) == 9
+    assert cache.get(cache.key(tile_ids[3], "fans", options), "png") == tile_ids[3].encode()
+    for tile_id in tile_ids[:3]:
+        assert cache.get(cache.key(tile_id, "fans", options), "png") is None
+        assert cache.get(cache.key(tile_id, "blotches", options), "png") is not None
@@ -0,0 +1,143 @@
+"""Tests for the gridded wind fields, checked against a brute-force loop over the fans."""
+
+import math
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p4tools import transforms, winds
+
+
+def brute_force(fans, cell, x_col, y_col, group_cols, azimuth=False):
+    "Per cell statistics with plain Python loops."
+    out = {}
+    for _, fan in fans.iterrows():
+        key = tuple(fan[col] for col in group_cols) + (
+            math.floor(fan[x_col] / cell),
+            math.floor(fan[y_col] / cell),
+        )
+        if azimuth:
+            a = math.radians(fan.azimuth)
+            u, v = math.sin(a), math.cos(a)
+        else:
+            a = math.radians(fan.angle)
+            u, v = math.cos(a), math.sin(a)
+        acc = out.setdefault(key, [0, 0.0, 0.0, 0.0, 0.0])
+        acc[0] += 1
+        acc[1] += u
+        acc[2] += v
+        acc[3] += fan.distance * u
+        acc[4] += fan.distance * v
+    rows = []
+    for key, (n, su, sv, wu, wv) in out.items():
+        direction = math.atan2(su, sv) if azimuth else math.atan2(sv, su)
+        rows.append(
+            key
+            + (
+                n,
+                math.degrees(direction) % 360,
+                math.hypot(su, sv) / n,
+                wu / n,
+                wv / n,
+            )
+        )
+    columns = group_cols + ["ix", "iy", "count", "direction", "resultant_length", "u", "v"]
+    return pd.DataFrame(rows, columns=columns).sort_values(group_cols + ["ix", "iy"])
+
+
+def compare(field, expected):
+    got = field.cells[expected.columns].sort_values(list(expected.columns[:-5]))
+    assert len(got) == len(expected)
+    for col in expected.columns:
+        if not pd.api.types.is_numeric_dtype(expected[col]):
+            assert got[col].tolist() == expected[col].tolist()
+        elif col == "direction":
+            diff = (got[col].to_numpy() - expected[col].to_numpy() + 180) % 360 - 180
+            np.testing.assert_allclose(diff, 0, atol=1e-8)
+        else:
+            np.testing.assert_allclose(got[col].to_numpy(), expected[col].to_numpy(), atol=1e-9)
+
+
+@pytest.mark.parametrize("chunksize", [None, 17])
+def test_hirise_by_obsid(fan_catalog, chunksize):
+    field = winds.wind_field(fan_catalog, chunksize=chunksize, cell=300)
+    compare(field, brute_force(fan_catalog, 300, "image_x", "image_y", ["obsid"]))
+    assert field.cells["count"].sum() == len(fan_catalog)
+
+
+def test_tile_frame_groups_by_tile(fan_catalog):
+    field = winds.wind_field(fan_catalog, cell=200, frame="tile", by=None)
+    assert field.group_columns == ["tile_id"]
+    compare(field, brute_force(fan_catalog, 200, "x", "y", ["tile_id"]))
+
+
+def test_region_and_l_s(fan_catalog, region_names):
+    field = winds.wind_field(
+        fan_catalog, cell=1000, by=["region", "l_s"], l_s_bin=20, region_names=region_names
+    )
+    fans = fan_catalog.merge(region_names, on="obsid")
+    fans["l_s_bin"] = np.floor(fans.l_s / 20) * 20
+    compare(field, brute_force(fans, 1000, "image_x", "image_y", ["roi_name", "l_s_bin"]))
+    assert set(field.groups) == {("Giza", 160.0), ("Giza", 180.0), ("Ithaca", 200.0)}
+
+
+def test_latlon_uses_azimuths(fan_catalog, tile_coords):
+    transformer = transforms.Transformer(tile_coords)
+    field = winds.wind_field(
+        fan_catalog, cell=0.5, frame="latlon", by=None, transformer=transformer
+    )
+    fans = transformer.transform_markings(fan_catalog)
+    expected = brute_force(fans, 0.5, "Longitude", "PlanetocentricLatitude", [], azimuth=True)
+    compare(field, expected)
+    # precomputed azimuths give the same field
+    again = winds.wind_field(fans, cell=0.5, frame="latlon", by=None)
+    np.testing.assert_allclose(again.cells.direction, field.cells.direction)
+
+
+def test_parallel_fans_have_unit_resultant():
+    fans = pd.DataFrame(
+        {
+            "obsid": "ESP_011296_0975",
+            "image_x": [10.0, 20.0, 30.0, 40.0],
+            "image_y": [10.0, 20.0, 30.0, 40.0],
+            "angle": [350.0, 10.0, 350.0, 10.0],
+            "spread": 20.0,
+            "distance": [1.0, 1.0, 3.0, 3.0],
+        }
+    )
+    cell = winds.wind_field(fans, cell=100).cells.iloc[0]
+    assert cell.direction == pytest.approx(0.0, abs=1e-9) or cell.direction == pytest.approx(360)
+    assert cell.resultant_length == pytest.approx(math.cos(math.radians(10)))
+    assert cell.u == pytest.approx(2 * math.cos(math.radians(10)))
+    assert cell.v == pytest.approx(0.0, abs=1e-12)
+
+
+def test_quiver_arrays_and_plot(fan_catalog):
+    field = winds.wind_field(fan_catalog, cell=250)
+    obsid = field.groups[0]
+    X, Y, U, V = field.quiver_arrays(obsid)
+    cells = field.cells[field.cells.obsid == obsid[0]]
+    assert X.shape == Y.shape == U.shape == V.shape
+    assert np.isfinite(U).sum() == len(cells)
+    first = cells.iloc[0]
+    row, col = first.iy - cells.iy.min(), first.ix - cells.ix.min()
+    assert (X[row, col], Y[row, col]) == (first.x, first.y)
+    assert (U[row, col], V[row, col]) == (first.u, first.v)
+    with pytest.raises(ValueError):
+        field.quiver_arrays()
+    ax = field.plot(obsid, weighted=False)
+    assert ax.yaxis_inverted()
+
+
+def test_empty_and_invalid():
+    field = winds.WindAggregator().result()
+    assert len(field.cells) == 0
+    with pytest.raises(ValueError):
+        winds.WindAggregator(frame="polar")
+    with pytest.raises(ValueError):
+        winds.WindAggregator(by="season")